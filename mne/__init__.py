@@ -93,6 +93,7 @@ from . import cuda
 from . import datasets
 from . import epochs
 from . import externals
+from . import fft
 from . import io
 from . import filter
 from . import gui
@@ -76,7 +76,9 @@ def rescale(data, times, baseline, mode='mean', copy=True, verbose=None):
 
     # avoid potential "empty slice" warning
     if data.shape[-1] > 0:
-        mean = np.mean(data[..., imin:imax], axis=-1)[..., None]
+        from .filter import _polyfit
+        # zeroth-order fit of all signals at once, i.e. the baseline means
+        mean = _polyfit(data, 0, slice(imin, imax))[0]
     else:
         mean = 0  # otherwise we get an ugly nan
     if mode == 'mean':
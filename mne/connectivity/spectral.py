@@ -14,8 +14,7 @@ from ..parallel import parallel_func
 from ..source_estimate import _BaseSourceEstimate
 from ..epochs import _BaseEpochs
 from ..time_frequency.multitaper import (dpss_windows, _mt_spectra,
-                                         _psd_from_mt, _csd_from_mt,
-                                         _psd_from_mt_adaptive)
+                                         _psd_from_mt, _psd_from_mt_adaptive)
 from ..time_frequency.tfr import morlet, cwt
 from ..utils import logger, verbose, _time_mask, warn
 
@@ -286,12 +285,51 @@ class _PPCEst(_EpochMeanConEstBase):
 
 
 ###############################################################################
+def _iter_mt_csd_blocks(x_mt, idx_map, block_size, all_to_all):
+    """Helper to get the CSD of blocks of connections from tapered spectra
+
+    x_mt has shape (n_signals, n_tapers, n_freqs), with the weights of the
+    tapers folded in, so that the CSD of two signals is the sum over tapers
+    of their Hermitian product (see _csd_from_mt). If all_to_all, the
+    connections are the lower triangle of the connectivity matrix, row by
+    row, and the CSD of blocks of rows are computed as the Hermitian product
+    X X^H of the spectra of each frequency.
+    """
+    if not all_to_all:
+        for i in range(0, len(idx_map[0]), block_size):
+            con_idx = slice(i, i + block_size)
+            csd = np.sum(x_mt[idx_map[0][con_idx]] *
+                         x_mt[idx_map[1][con_idx]].conj(), axis=-2)
+            yield con_idx, csd
+        return
+
+    # spectra of each frequency, shape (n_freqs, n_signals, n_tapers)
+    x_f = np.ascontiguousarray(np.transpose(x_mt, (2, 0, 1)))
+    x_f_h = np.ascontiguousarray(np.transpose(x_mt.conj(), (2, 1, 0)))
+    n_signals = len(x_mt)
+    start = 1
+    while start < n_signals:
+        # at most block_size products for each frequency (or one row)
+        stop = start + 1
+        while stop < n_signals and (stop + 1 - start) * (stop + 1) <= \
+                block_size:
+            stop += 1
+        csd = np.empty((len(x_f), stop - start, stop), x_mt.dtype)
+        for x, x_h, out in zip(x_f, x_f_h, csd):
+            np.dot(x[start:stop], x_h[:, :stop], out=out)
+        lower = np.arange(stop) < np.arange(start, stop)[:, np.newaxis]
+        yield slice(start * (start - 1) // 2, stop * (stop - 1) // 2), \
+            csd[:, lower].T
+        start = stop
+
+
 def _epoch_spectral_connectivity(data, sig_idx, tmin_idx, tmax_idx, sfreq,
                                  mode, window_fun, eigvals, wavelets,
                                  freq_mask, mt_adaptive, idx_map, block_size,
                                  psd, accumulate_psd, con_method_types,
                                  con_methods, n_signals, n_times,
-                                 accumulate_inplace=True):
+                                 accumulate_inplace=True, all_to_all=False,
+                                 csd_dtype=np.complex128):
     """Connectivity estimation for one epoch see spectral_connectivity"""
 
     n_cons = len(idx_map[0])
@@ -355,17 +393,20 @@ def _epoch_spectral_connectivity(data, sig_idx, tmin_idx, tmax_idx, sfreq,
                 if accumulate_psd:
                     _this_psd = _psd_from_mt(this_x_mt, weights)
 
-            x_mt.append(this_x_mt)
+            # fold the weights in the spectra (see _iter_mt_csd_blocks)
+            weights = weights * np.sqrt(2. / (weights * weights).sum(
+                axis=-2))[:, np.newaxis]
+            x_mt.append((this_x_mt * weights).astype(csd_dtype))
             if accumulate_psd:
                 this_psd.append(_this_psd)
 
+            # advance position
+            sig_pos_start = sig_pos_end
+
         x_mt = np.concatenate(x_mt, axis=0)
         if accumulate_psd:
             this_psd = np.concatenate(this_psd, axis=0)
 
-        # advance position
-        sig_pos_start = sig_pos_end
-
     elif mode == 'cwt_morlet':
         # estimate spectra using CWT
         x_cwt = list()
@@ -418,18 +459,8 @@ def _epoch_spectral_connectivity(data, sig_idx, tmin_idx, tmax_idx, sfreq,
 
     # accumulate connectivity scores
     if mode in ['multitaper', 'fourier']:
-        for i in range(0, n_cons, block_size):
-            con_idx = slice(i, i + block_size)
-            if mt_adaptive:
-                csd = _csd_from_mt(x_mt[idx_map[0][con_idx]],
-                                   x_mt[idx_map[1][con_idx]],
-                                   weights[idx_map[0][con_idx]],
-                                   weights[idx_map[1][con_idx]])
-            else:
-                csd = _csd_from_mt(x_mt[idx_map[0][con_idx]],
-                                   x_mt[idx_map[1][con_idx]],
-                                   weights, weights)
-
+        for con_idx, csd in _iter_mt_csd_blocks(x_mt, idx_map, block_size,
+                                                all_to_all):
             for method in con_methods:
                 method.accumulate(con_idx, csd)
     else:
@@ -517,7 +548,7 @@ def spectral_connectivity(data, method='coh', indices=None, sfreq=2 * np.pi,
                           mt_bandwidth=None, mt_adaptive=False,
                           mt_low_bias=True, cwt_frequencies=None,
                           cwt_n_cycles=7, block_size=1000, n_jobs=1,
-                          verbose=None):
+                          dtype=np.float64, verbose=None):
     """Compute frequency-domain and time-frequency domain connectivity measures
 
     The connectivity method(s) are specified using the "method" parameter.
@@ -681,6 +712,13 @@ def spectral_connectivity(data, method='coh', indices=None, sfreq=2 * np.pi,
         but require more memory).
     n_jobs : int
         How many epochs to process in parallel.
+    dtype : np.float64 | np.float32
+        The precision of the cross-spectral densities of each epoch, in
+        'multitaper' and 'fourier' modes. np.float32 uses half the memory
+        and is faster for many connections. The connectivity is always
+        accumulated over epochs in double precision.
+
+        .. versionadded:: 0.12.0
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
 
@@ -704,6 +742,11 @@ def spectral_connectivity(data, method='coh', indices=None, sfreq=2 * np.pi,
         The number of DPSS tapers used. Only defined in 'multitaper' mode.
         Otherwise None is returned.
     """
+    if np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError('dtype must be np.float32 or np.float64, got %s'
+                         % dtype)
+    csd_dtype = np.result_type(dtype, np.complex64)
+
     if n_jobs > 1:
         parallel, my_epoch_spectral_connectivity, _ = \
             parallel_func(_epoch_spectral_connectivity, n_jobs,
@@ -975,7 +1018,8 @@ def spectral_connectivity(data, method='coh', indices=None, sfreq=2 * np.pi,
                     tmax_idx, sfreq, mode, window_fun, eigvals, wavelets,
                     freq_mask, mt_adaptive, idx_map, block_size, psd,
                     accumulate_psd, con_method_types, con_methods,
-                    n_signals, n_times, accumulate_inplace=True)
+                    n_signals, n_times, accumulate_inplace=True,
+                    all_to_all=indices is None, csd_dtype=csd_dtype)
                 epoch_idx += 1
         else:
             # process epochs in parallel
@@ -987,7 +1031,8 @@ def spectral_connectivity(data, method='coh', indices=None, sfreq=2 * np.pi,
                 tmin_idx, tmax_idx, sfreq, mode, window_fun, eigvals,
                 wavelets, freq_mask, mt_adaptive, idx_map, block_size, psd,
                 accumulate_psd, con_method_types, None, n_signals, n_times,
-                accumulate_inplace=False) for this_epoch in epoch_block)
+                accumulate_inplace=False, all_to_all=indices is None,
+                csd_dtype=csd_dtype) for this_epoch in epoch_block)
 
             # do the accumulation
             for this_out in out:
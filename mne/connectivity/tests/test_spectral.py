@@ -1,13 +1,13 @@
 import os
 import numpy as np
-from numpy.testing import assert_array_almost_equal
+from numpy.testing import assert_array_almost_equal, assert_allclose
 from nose.tools import assert_true, assert_raises
 from nose.plugins.skip import SkipTest
 import warnings
 
 from mne.fixes import tril_indices
 from mne.connectivity import spectral_connectivity
-from mne.connectivity.spectral import _CohEst
+from mne.connectivity.spectral import _CohEst, _CON_METHOD_MAP
 
 from mne import SourceEstimate
 from mne.utils import run_tests_if_main, slow_test
@@ -224,4 +224,40 @@ def test_spectral_connectivity():
                             assert_array_almost_equal(con2_avg, con3[j][:, i])
 
 
+def test_spectral_connectivity_all_to_all():
+    """Test all-to-all connectivity computed as Hermitian products"""
+    rng = np.random.RandomState(0)
+    data = rng.randn(4, 7, 128)
+    data[:, 1] += data[:, 0]
+    methods = sorted(_CON_METHOD_MAP.keys())
+    indices = tril_indices(7, -1)
+    for mode, mt_adaptive in (('multitaper', False), ('multitaper', True),
+                              ('fourier', False)):
+        kwargs = dict(method=methods, sfreq=50., mode=mode, fmin=5.,
+                      mt_adaptive=mt_adaptive)
+        with warnings.catch_warnings(record=True):  # adaptive tapers
+            con_ref = spectral_connectivity(data, indices=indices,
+                                            **kwargs)[0]
+            for block_size in (1, 10, 1000):
+                con = spectral_connectivity(data, block_size=block_size,
+                                            **kwargs)[0]
+                for c, c_ref in zip(con, con_ref):
+                    assert_allclose(c[indices], c_ref, rtol=1e-10,
+                                    atol=1e-12)
+            # epochs made of several arrays
+            data_split = [(d[:2], d[2:]) for d in data]
+            for these_indices in (None, indices):
+                con = spectral_connectivity(data, indices=these_indices,
+                                            **kwargs)[0]
+                con_split = spectral_connectivity(
+                    data_split, indices=these_indices, **kwargs)[0]
+                for c, c_split in zip(con, con_split):
+                    assert_allclose(c_split, c, rtol=1e-10, atol=1e-12)
+            con = spectral_connectivity(data, dtype=np.float32, **kwargs)[0]
+        for method, c, c_ref in zip(methods, con, con_ref):
+            if method in ('coh', 'cohy', 'imcoh', 'plv', 'ppc', 'wpli'):
+                assert_allclose(c[indices], c_ref, rtol=1e-3, atol=1e-4)
+    assert_raises(ValueError, spectral_connectivity, data, dtype=np.int64)
+
+
 run_tests_if_main()
@@ -3,8 +3,9 @@
 # License: BSD (3-clause)
 
 import numpy as np
-from scipy.fftpack import fft, ifft, rfft, irfft
+from scipy.fftpack import rfft, irfft
 
+from .fft import rfft as rfft_c, irfft as irfft_c
 from .utils import sizeof_fmt, logger, get_config, warn
 
 
@@ -197,8 +198,9 @@ def fft_multiply_repeated(h_fft, x, cuda_dict=dict(use_cuda=False)):
         Filtered version of x.
     """
     if not cuda_dict['use_cuda']:
-        # do the fourier-domain operations
-        x = np.real(ifft(h_fft * fft(x), overwrite_x=True)).ravel()
+        # do the fourier-domain operations, h_fft is Hermitian-symmetric
+        n_fft = len(x)
+        x = irfft_c(h_fft[:n_fft // 2 + 1] * rfft_c(x), n_fft).ravel()
     else:
         cudafft = _get_cudafft()
         # do the fourier-domain operations, results in second param
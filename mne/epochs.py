@@ -48,6 +48,9 @@ from .utils import deprecated
 from .externals.six import iteritems, string_types
 from .externals.six.moves import zip
 
+# size of the blocks of epochs detrended and baseline corrected at once
+_DETREND_BLOCK_BYTES = 2 ** 26
+
 
 def _save_split(epochs, fname, part_idx, n_parts):
     """Split epochs"""
@@ -564,31 +567,45 @@ class _BaseEpochs(ProjMixin, ContainsMixin, UpdateChannelsMixin,
     def _detrend_offset_decim(self, epoch, verbose=None):
         """Aux Function: detrend, baseline correct, offset, decim
 
+        The epoch can also be an array of epochs (n_epochs, n_channels,
+        n_times), which are then processed in blocks of epochs.
+
         Note: operates inplace
         """
         if (epoch is None) or isinstance(epoch, string_types):
             return epoch
 
+        if epoch.ndim == 3:
+            n_block = max(_DETREND_BLOCK_BYTES // max(epoch[0].nbytes, 1), 1)
+            for start in range(0, len(epoch), n_block):
+                self._detrend_offset(epoch[start:start + n_block])
+        else:
+            self._detrend_offset(epoch)
+
+        # Decimate if necessary (i.e., epoch not preloaded)
+        epoch = epoch[..., self._decim_slice]
+        return epoch
+
+    def _detrend_offset(self, epoch):
+        """Aux Function: detrend, baseline correct and offset inplace"""
         # Detrend
         if self.detrend is not None:
             picks = _pick_data_channels(self.info, exclude=[])
-            epoch[picks] = detrend(epoch[picks], self.detrend, axis=1)
+            epoch[..., picks, :] = detrend(epoch[..., picks, :],
+                                           self.detrend, axis=-1)
 
         # Baseline correct
         picks = pick_types(self.info, meg=True, eeg=True, stim=False,
                            ref_meg=True, eog=True, ecg=True, seeg=True,
                            emg=True, bio=True, ecog=True, exclude=[])
-        epoch[picks] = rescale(epoch[picks], self._raw_times, self.baseline,
-                               copy=False, verbose=False)
+        epoch[..., picks, :] = rescale(epoch[..., picks, :], self._raw_times,
+                                       self.baseline, copy=False,
+                                       verbose=False)
 
         # handle offset
         if self._offset is not None:
             epoch += self._offset
 
-        # Decimate if necessary (i.e., epoch not preloaded)
-        epoch = epoch[:, self._decim_slice]
-        return epoch
-
     def iter_evoked(self):
         """Iterate over epochs as a sequence of Evoked objects
 
@@ -2186,9 +2203,8 @@ class EpochsArray(_BaseEpochs):
                                list(self.event_id.values())).sum():
             raise ValueError('The events must only contain event numbers from '
                              'event_id')
-        for ii, e in enumerate(self._data):
-            # This is safe without assignment b/c there is no decim
-            self._detrend_offset_decim(e)
+        # This is safe without assignment b/c there is no decim
+        self._detrend_offset_decim(self._data)
         self.drop_bad()
 
 
@@ -0,0 +1,226 @@
+"""Selectable FFT backends
+
+The FFTs done by filtering, time-frequency and multitaper functions go
+through :func:`fft`, :func:`ifft`, :func:`rfft` and :func:`irfft`, which
+dispatch to the backend chosen with :func:`set_fft_backend` or the
+``MNE_FFT_BACKEND`` config variable (see :func:`mne.set_config`).
+"""
+
+# License: BSD (3-clause)
+
+import atexit
+import os
+import os.path as op
+
+import numpy as np
+
+from .externals.six.moves import cPickle as pickle
+from .utils import get_config, get_config_path, logger, warn
+
+
+_fft_backends = dict()
+_backend = dict(name=None, funcs=None)
+
+
+def register_fft_backend(name, setup):
+    """Register an FFT backend
+
+    Parameters
+    ----------
+    name : str
+        Name of the backend, to be used with :func:`set_fft_backend` or as
+        the ``MNE_FFT_BACKEND`` config variable.
+    setup : callable
+        Function called with the number of threads to use when the backend
+        is selected. It must return a dict with the entries ``'fft'``,
+        ``'ifft'``, ``'rfft'`` and ``'irfft'``, functions that have the
+        same signature and semantics as their :mod:`numpy.fft`
+        counterparts (``func(x, n=None, axis=-1)``).
+    """
+    if not callable(setup):
+        raise TypeError('setup must be callable')
+    _fft_backends[name] = setup
+
+
+def set_fft_backend(backend=None, n_threads=None):
+    """Select the backend used for FFTs
+
+    Parameters
+    ----------
+    backend : str | None
+        The backend to use, 'scipy' (default, uses :mod:`scipy.fftpack`),
+        'numpy', 'pyfftw' or any backend added with
+        :func:`register_fft_backend`. If None, the ``MNE_FFT_BACKEND``
+        config variable is used.
+    n_threads : int | None
+        Number of threads to use for each FFT, for backends that support
+        it (e.g., 'pyfftw'). -1 uses all cores. If None, the
+        ``MNE_FFT_N_THREADS`` config variable (default 1) is used.
+
+    Notes
+    -----
+    If the 'pyfftw' backend cannot be imported, the 'scipy' backend is used
+    instead. FFTW wisdom is loaded from the mne-python config folder when
+    the backend is selected and saved back when the interpreter exits.
+    """
+    if backend is None:
+        backend = get_config('MNE_FFT_BACKEND', 'scipy')
+    if n_threads is None:
+        n_threads = get_config('MNE_FFT_N_THREADS', '1')
+    n_threads = int(n_threads)
+    if n_threads <= 0:
+        import multiprocessing
+        n_threads = max(multiprocessing.cpu_count() + n_threads + 1, 1)
+    if backend not in _fft_backends:
+        raise ValueError('FFT backend must be one of %s, not "%s"'
+                         % (sorted(_fft_backends.keys()), backend))
+    try:
+        funcs = _fft_backends[backend](n_threads)
+    except ImportError as exp:
+        warn('FFT backend "%s" could not be set up (%s), using "scipy" '
+             'instead' % (backend, exp))
+        backend, funcs = 'scipy', _fft_backends['scipy'](n_threads)
+    _backend.update(name=backend, funcs=funcs)
+
+
+def get_fft_backend():
+    """Get the name of the backend used for FFTs
+
+    Returns
+    -------
+    backend : str
+        The name of the backend.
+    """
+    if _backend['name'] is None:
+        set_fft_backend()
+    return _backend['name']
+
+
+def _get_func(kind):
+    """Helper to get a function of the current backend"""
+    if _backend['funcs'] is None:
+        set_fft_backend()
+    return _backend['funcs'][kind]
+
+
+def fft(x, n=None, axis=-1):
+    """Compute the one-dimensional discrete Fourier transform
+
+    See :func:`numpy.fft.fft` for details.
+    """
+    return _get_func('fft')(x, n=n, axis=axis)
+
+
+def ifft(x, n=None, axis=-1):
+    """Compute the one-dimensional inverse discrete Fourier transform
+
+    See :func:`numpy.fft.ifft` for details.
+    """
+    return _get_func('ifft')(x, n=n, axis=axis)
+
+
+def rfft(x, n=None, axis=-1):
+    """Compute the one-dimensional discrete Fourier transform of real input
+
+    See :func:`numpy.fft.rfft` for details.
+    """
+    return _get_func('rfft')(x, n=n, axis=axis)
+
+
+def irfft(x, n=None, axis=-1):
+    """Compute the inverse of the discrete Fourier transform of real input
+
+    See :func:`numpy.fft.irfft` for details.
+    """
+    return _get_func('irfft')(x, n=n, axis=axis)
+
+
+###############################################################################
+# Built-in backends
+
+def _setup_numpy(n_threads):
+    """Set up the NumPy backend"""
+    return dict(fft=np.fft.fft, ifft=np.fft.ifft, rfft=np.fft.rfft,
+                irfft=np.fft.irfft)
+
+
+def _scipy_rfft(x, n=None, axis=-1):
+    """Helper to unpack the output of scipy.fftpack.rfft"""
+    from scipy import fftpack
+    y = np.swapaxes(fftpack.rfft(x, n, axis=axis), axis, -1)
+    n = y.shape[-1]
+    out = np.zeros(y.shape[:-1] + (n // 2 + 1,), np.complex128)
+    out.real[..., 0] = y[..., 0]
+    out.real[..., 1:] = y[..., 1::2]
+    out.imag[..., 1:(n + 1) // 2] = y[..., 2::2]
+    return np.swapaxes(out, axis, -1)
+
+
+def _scipy_irfft(x, n=None, axis=-1):
+    """Helper to pack the input of scipy.fftpack.irfft"""
+    from scipy import fftpack
+    x = np.swapaxes(x, axis, -1)
+    if n is None:
+        n = 2 * (x.shape[-1] - 1)
+    n_use = min(x.shape[-1], n // 2 + 1)
+    y = np.zeros(x.shape[:-1] + (n,))
+    y[..., 0] = x[..., 0].real
+    y[..., 1:2 * n_use - 1:2] = x[..., 1:n_use].real
+    n_imag = min(n_use, (n + 1) // 2)
+    y[..., 2:2 * n_imag - 1:2] = x[..., 1:n_imag].imag
+    return np.swapaxes(fftpack.irfft(y, n, axis=-1), axis, -1)
+
+
+def _setup_scipy(n_threads):
+    """Set up the SciPy fftpack backend"""
+    from scipy import fftpack
+    return dict(fft=fftpack.fft, ifft=fftpack.ifft, rfft=_scipy_rfft,
+                irfft=_scipy_irfft)
+
+
+def _get_wisdom_fname():
+    """Helper to get the file FFTW wisdom is cached in"""
+    return op.join(op.dirname(get_config_path()), 'fftw_wisdom.pkl')
+
+
+def _save_wisdom():
+    """Helper to save the FFTW wisdom accumulated in this session"""
+    import pyfftw
+    fname = _get_wisdom_fname()
+    try:
+        if not op.isdir(op.dirname(fname)):
+            os.mkdir(op.dirname(fname))
+        with open(fname, 'wb') as fid:
+            pickle.dump(pyfftw.export_wisdom(), fid)
+    except (IOError, OSError) as exp:
+        logger.info('Could not save FFTW wisdom to %s (%s)' % (fname, exp))
+
+
+def _setup_pyfftw(n_threads):
+    """Set up the pyFFTW backend, with caching of plans and wisdom"""
+    import pyfftw
+    from pyfftw.interfaces import cache, numpy_fft
+    cache.enable()
+    fname = _get_wisdom_fname()
+    if op.isfile(fname):
+        try:
+            with open(fname, 'rb') as fid:
+                pyfftw.import_wisdom(pickle.load(fid))
+        except Exception as exp:
+            logger.info('Could not load FFTW wisdom from %s (%s)'
+                        % (fname, exp))
+    if not _backend.get('wisdom_saved', False):
+        atexit.register(_save_wisdom)
+        _backend['wisdom_saved'] = True
+
+    def wrap(func):
+        def wrapped(x, n=None, axis=-1):
+            return func(x, n=n, axis=axis, threads=n_threads)
+        return wrapped
+    return dict(fft=wrap(numpy_fft.fft), ifft=wrap(numpy_fft.ifft),
+                rfft=wrap(numpy_fft.rfft), irfft=wrap(numpy_fft.irfft))
+
+
+register_fft_backend('numpy', _setup_numpy)
+register_fft_backend('scipy', _setup_scipy)
+register_fft_backend('pyfftw', _setup_pyfftw)
@@ -1,17 +1,19 @@
 """IIR and FIR filtering functions"""
 
 from copy import deepcopy
+from functools import partial
 
 import numpy as np
-from scipy.fftpack import fft, ifftshift, fftfreq
+from scipy.fftpack import ifftshift, fftfreq
 
 from .cuda import (setup_cuda_fft_multiply_repeated, fft_multiply_repeated,
                    setup_cuda_fft_resample, fft_resample, _smart_pad)
 from .externals.six import string_types, integer_types
-from .fixes import get_firwin2, get_filtfilt
+from .fft import fft, rfft
+from .fixes import get_firwin2, get_filtfilt, get_sosfiltfilt
 from .parallel import parallel_func, check_n_jobs
-from .time_frequency.multitaper import dpss_windows, _mt_spectra
-from .utils import logger, verbose, sum_squared, check_version, warn
+from .time_frequency.multitaper import dpss_windows
+from .utils import logger, verbose, sum_squared, warn
 
 
 def is_power2(num):
@@ -377,42 +379,74 @@ def _filter(x, Fs, freq, gain, filter_length='10s', picks=None, n_jobs=1,
     return x
 
 
-def _check_coefficients(b, a):
+# upper bound on the memory used by a block of channels during IIR filtering
+_IIR_BLOCK_BYTES = 2 ** 28
+
+
+def _check_coefficients(system):
     """Check for filter stability"""
-    from scipy.signal import tf2zpk
-    z, p, k = tf2zpk(b, a)
+    if isinstance(system, tuple):
+        from scipy.signal import tf2zpk
+        z, p, k = tf2zpk(*system)
+    else:
+        sos = np.atleast_2d(system)
+        p = np.concatenate([np.roots(section[3:]) for section in sos])
     if np.any(np.abs(p) > 1.0):
         raise RuntimeError('Filter poles outside unit circle, filter will be '
                            'unstable. Consider using different filter '
                            'coefficients.')
 
 
-def _filtfilt(x, b, a, padlen, picks, n_jobs, copy):
-    """Helper to more easily call filtfilt"""
+def _filtfilt(x, iir_params, picks, n_jobs, copy):
+    """Helper to more easily call filtfilt or sosfiltfilt
+
+    The channels are filtered in blocks, each block being passed as one 2D
+    array so that the filtering loops over time samples (and not channels)
+    happen in compiled code.
+    """
     # set up array for filtering, reshape to 2D, operate on last axis
-    filtfilt = get_filtfilt()
     n_jobs = check_n_jobs(n_jobs)
     x, orig_shape, picks = _prep_for_filtering(x, copy, picks)
-    _check_coefficients(b, a)
+    padlen = min(iir_params['padlen'], x.shape[-1] - 1)
+    if 'sos' in iir_params:
+        sos = iir_params['sos']
+        _check_coefficients(sos)
+        fun = partial(get_sosfiltfilt(), sos, padlen=padlen)
+    else:
+        b, a = iir_params['b'], iir_params['a']
+        _check_coefficients((b, a))
+        fun = partial(get_filtfilt(), b, a, padlen=padlen)
+    # keep the (padded) blocks small enough not to blow up the memory
+    n_per_block = max(_IIR_BLOCK_BYTES // (8 * (x.shape[-1] + 2 * padlen)),
+                      1)
+    n_blocks = min(max(n_jobs, int(np.ceil(len(picks) /
+                                           float(n_per_block)))),
+                   max(len(picks), 1))
+    blocks = np.array_split(picks, n_blocks)
     if n_jobs == 1:
-        for p in picks:
-            x[p] = filtfilt(b, a, x[p], padlen=padlen)
+        for block in blocks:
+            x[block] = fun(x[block])
     else:
-        parallel, p_fun, _ = parallel_func(filtfilt, n_jobs)
-        data_new = parallel(p_fun(b, a, x[p], padlen=padlen)
-                            for p in picks)
-        for pp, p in enumerate(picks):
-            x[p] = data_new[pp]
+        parallel, p_fun, _ = parallel_func(fun, n_jobs)
+        for bi in range(0, len(blocks), n_jobs):
+            data_new = parallel(p_fun(x[block])
+                                for block in blocks[bi:bi + n_jobs])
+            for block, this_data in zip(blocks[bi:bi + n_jobs], data_new):
+                x[block] = this_data
     x.shape = orig_shape
     return x
 
 
-def _estimate_ringing_samples(b, a):
+def _estimate_ringing_samples(system):
     """Helper function for determining IIR padding"""
-    from scipy.signal import lfilter
     x = np.zeros(1000)
     x[0] = 1
-    h = lfilter(b, a, x)
+    if isinstance(system, tuple):
+        from scipy.signal import lfilter
+        h = lfilter(system[0], system[1], x)
+    else:
+        from scipy.signal import sosfilt
+        h = sosfilt(system, x)
     return np.where(np.abs(h) > 0.001 * np.max(np.abs(h)))[0][-1]
 
 
@@ -425,21 +459,27 @@ def construct_iir_filter(iir_params=dict(b=[1, 0], a=[1, 0], padlen=0),
     scipy.signal to make filter coefficients for IIR filtering. It also
     estimates the number of padding samples based on the filter ringing.
     It creates a new iir_params dict (or updates the one passed to the
-    function) with the filter coefficients ('b' and 'a') and an estimate
-    of the padding necessary ('padlen') so IIR filtering can be performed.
+    function) with the filter coefficients ('b' and 'a', or 'sos') and an
+    estimate of the padding necessary ('padlen') so IIR filtering can be
+    performed.
 
     Parameters
     ----------
     iir_params : dict
         Dictionary of parameters to use for IIR filtering.
-        If iir_params['b'] and iir_params['a'] exist, these will be used
-        as coefficients to perform IIR filtering. Otherwise, if
+        If iir_params['sos'] exists, or iir_params['b'] and
+        iir_params['a'] exist, these will be used as coefficients to
+        perform IIR filtering. Otherwise, if
         iir_params['order'] and iir_params['ftype'] exist, these will be
         used with scipy.signal.iirfilter to make a filter. Otherwise, if
         iir_params['gpass'] and iir_params['gstop'] exist, these will be
         used with scipy.signal.iirdesign to design a filter.
         iir_params['padlen'] defines the number of samples to pad (and
-        an estimate will be calculated if it is not given). See Notes for
+        an estimate will be calculated if it is not given).
+        iir_params['output'] can be 'ba' (default) to design the filter as
+        numerator and denominator polynomials, or 'sos' to design it as
+        second-order sections, which are numerically more stable for
+        high-order filters (requires SciPy >= 0.16). See Notes for
         more details.
     f_pass : float or list of float
         Frequency for the pass-band. Low-pass and high-pass filters should
@@ -461,7 +501,8 @@ def construct_iir_filter(iir_params=dict(b=[1, 0], a=[1, 0], padlen=0),
     -------
     iir_params : dict
         Updated iir_params dict, with the entries (set only if they didn't
-        exist before) for 'b', 'a', and 'padlen' for IIR filtering.
+        exist before) for 'b' and 'a' (or 'sos' if iir_params['output'] is
+        'sos'), and 'padlen' for IIR filtering.
 
     Notes
     -----
@@ -502,6 +543,14 @@ def construct_iir_filter(iir_params=dict(b=[1, 0], a=[1, 0], padlen=0),
     >>> print((iir_params['b'], iir_params['a'], iir_params['padlen']))
     (array([ 1.,  1.,  1.,  1.,  1.,  1.,  1.,  1.,  1.,  1.]), [1, 0], 0)
 
+    For high-order filters, second-order sections should be preferred. To
+    get the 4th-order Butterworth filter from above as two sections:
+
+    >>> iir_params = dict(order=4, ftype='butter', output='sos')
+    >>> iir_params = construct_iir_filter(iir_params, 40, None, 1000, 'low')
+    >>> print((iir_params['sos'].shape, iir_params['padlen']))
+    ((2, 6), 82)
+
     """  # noqa
     from scipy.signal import iirfilter, iirdesign
     known_filters = ('bessel', 'butter', 'butterworth', 'cauer', 'cheby1',
@@ -509,9 +558,18 @@ def construct_iir_filter(iir_params=dict(b=[1, 0], a=[1, 0], padlen=0),
                      'chebyshevii', 'ellip', 'elliptic')
     a = None
     b = None
+    sos = None
+    output = iir_params.get('output', 'ba')
+    if output not in ('ba', 'sos'):
+        raise ValueError('iir_params["output"] must be "ba" or "sos", not '
+                         '%s' % (output,))
     # if the filter has been designed, we're good to go
-    if 'a' in iir_params and 'b' in iir_params:
+    if 'sos' in iir_params:
+        sos = np.atleast_2d(iir_params['sos'])
+        output = 'sos'
+    elif 'a' in iir_params and 'b' in iir_params:
         [b, a] = [iir_params['b'], iir_params['a']]
+        output = 'ba'
     else:
         # ensure we have a valid ftype
         if 'ftype' not in iir_params:
@@ -525,31 +583,47 @@ def construct_iir_filter(iir_params=dict(b=[1, 0], a=[1, 0], padlen=0),
 
         # use order-based design
         Wp = np.asanyarray(f_pass) / (float(sfreq) / 2)
+        kwargs = dict(output=output) if output == 'sos' else dict()
         if 'order' in iir_params:
-            [b, a] = iirfilter(iir_params['order'], Wp, btype=btype,
-                               ftype=ftype)
+            system = iirfilter(iir_params['order'], Wp, btype=btype,
+                               ftype=ftype, **kwargs)
         else:
             # use gpass / gstop design
             Ws = np.asanyarray(f_stop) / (float(sfreq) / 2)
             if 'gpass' not in iir_params or 'gstop' not in iir_params:
                 raise ValueError('iir_params must have at least ''gstop'' and'
                                  ' ''gpass'' (or ''N'') entries')
-            [b, a] = iirdesign(Wp, Ws, iir_params['gpass'],
-                               iir_params['gstop'], ftype=ftype)
-
-    if a is None or b is None:
-        raise RuntimeError('coefficients could not be created from iir_params')
+            system = iirdesign(Wp, Ws, iir_params['gpass'],
+                               iir_params['gstop'], ftype=ftype, **kwargs)
+        if output == 'sos':
+            sos = system
+        else:
+            [b, a] = system
+
+    if output == 'sos':
+        if sos is None:
+            raise RuntimeError('coefficients could not be created from '
+                               'iir_params')
+        system = sos
+        coefs = dict(sos=sos)
+    else:
+        if a is None or b is None:
+            raise RuntimeError('coefficients could not be created from '
+                               'iir_params')
+        system = (b, a)
+        coefs = dict(b=b, a=a)
 
     # now deal with padding
     if 'padlen' not in iir_params:
-        padlen = _estimate_ringing_samples(b, a)
+        padlen = _estimate_ringing_samples(system)
     else:
         padlen = iir_params['padlen']
 
     if return_copy:
         iir_params = deepcopy(iir_params)
 
-    iir_params.update(dict(b=b, a=a, padlen=padlen))
+    iir_params.update(coefs)
+    iir_params.update(padlen=padlen)
     return iir_params
 
 
@@ -674,9 +748,7 @@ def band_pass_filter(x, Fs, Fp1, Fp2, filter_length='10s',
     else:
         iir_params = construct_iir_filter(iir_params, [Fp1, Fp2],
                                           [Fs1, Fs2], Fs, 'bandpass')
-        padlen = min(iir_params['padlen'], len(x))
-        xf = _filtfilt(x, iir_params['b'], iir_params['a'], padlen,
-                       picks, n_jobs, copy)
+        xf = _filtfilt(x, iir_params, picks, n_jobs, copy)
 
     return xf
 
@@ -790,9 +862,7 @@ def band_stop_filter(x, Fs, Fp1, Fp2, filter_length='10s',
         for fp_1, fp_2, fs_1, fs_2 in zip(Fp1, Fp2, Fs1, Fs2):
             iir_params_new = construct_iir_filter(iir_params, [fp_1, fp_2],
                                                   [fs_1, fs_2], Fs, 'bandstop')
-            padlen = min(iir_params_new['padlen'], len(x))
-            xf = _filtfilt(x, iir_params_new['b'], iir_params_new['a'], padlen,
-                           picks, n_jobs, copy)
+            xf = _filtfilt(x, iir_params_new, picks, n_jobs, copy)
 
     return xf
 
@@ -881,9 +951,7 @@ def low_pass_filter(x, Fs, Fp, filter_length='10s', trans_bandwidth=0.5,
         xf = _filter(x, Fs, freq, gain, filter_length, picks, n_jobs, copy)
     else:
         iir_params = construct_iir_filter(iir_params, Fp, Fstop, Fs, 'low')
-        padlen = min(iir_params['padlen'], len(x))
-        xf = _filtfilt(x, iir_params['b'], iir_params['a'], padlen,
-                       picks, n_jobs, copy)
+        xf = _filtfilt(x, iir_params, picks, n_jobs, copy)
 
     return xf
 
@@ -974,9 +1042,7 @@ def high_pass_filter(x, Fs, Fp, filter_length='10s', trans_bandwidth=0.5,
         xf = _filter(x, Fs, freq, gain, filter_length, picks, n_jobs, copy)
     else:
         iir_params = construct_iir_filter(iir_params, Fp, Fstop, Fs, 'high')
-        padlen = min(iir_params['padlen'], len(x))
-        xf = _filtfilt(x, iir_params['b'], iir_params['a'], padlen,
-                       picks, n_jobs, copy)
+        xf = _filtfilt(x, iir_params, picks, n_jobs, copy)
 
     return xf
 
@@ -1008,7 +1074,9 @@ def notch_filter(x, Fs, freqs, filter_length='10s', notch_widths=None,
         used (faster for long signals). If str, a human-readable time in
         units of "s" or "ms" (e.g., "10s" or "5500ms") will be converted
         to the shortest power-of-two length at least that duration.
-        Not used for 'iir' filters.
+        Not used for 'iir' filters. For 'spectrum_fit', this is the length
+        of the windows (overlapping by 50%) in which sinusoids are fit;
+        None fits them to the whole signal, as done before 0.12.
     notch_widths : float | array of float | None
         Width of the stop band (centred at each freq in freqs) in Hz.
         If None, freqs / 200 is used.
@@ -1107,21 +1175,26 @@ def notch_filter(x, Fs, freqs, filter_length='10s', notch_widths=None,
                               method, iir_params, picks, n_jobs, copy)
     elif method == 'spectrum_fit':
         xf = _mt_spectrum_proc(x, Fs, freqs, notch_widths, mt_bandwidth,
-                               p_value, picks, n_jobs, copy)
+                               p_value, picks, n_jobs, copy, filter_length)
 
     return xf
 
 
+# upper bound on the memory used by the tapered spectra of a block of windows
+_MT_BLOCK_BYTES = 2 ** 28
+
+
 def _mt_spectrum_proc(x, sfreq, line_freqs, notch_widths, mt_bandwidth,
-                      p_value, picks, n_jobs, copy):
+                      p_value, picks, n_jobs, copy, filter_length=None):
     """Helper to more easily call _mt_spectrum_remove"""
     from scipy import stats
     # set up array for filtering, reshape to 2D, operate on last axis
     n_jobs = check_n_jobs(n_jobs)
     x, orig_shape, picks = _prep_for_filtering(x, copy, picks)
-
-    # XXX need to implement the moving window version for raw files
     n_times = x.shape[1]
+    n_win = _get_filter_length(filter_length, sfreq, len_x=n_times)
+    if n_win is None or n_win > n_times:
+        n_win = n_times
 
     # max taper size chosen because it has an max error < 1e-3:
     # >>> np.max(np.diff(dpss_windows(953, 4, 100)[0]))
@@ -1131,40 +1204,73 @@ def _mt_spectrum_proc(x, sfreq, line_freqs, notch_widths, mt_bandwidth,
 
     # figure out what tapers to use
     if mt_bandwidth is not None:
-        half_nbw = float(mt_bandwidth) * n_times / (2 * sfreq)
+        half_nbw = float(mt_bandwidth) * n_win / (2 * sfreq)
     else:
         half_nbw = 4
 
-    # compute dpss windows
+    # compute dpss windows, once for all windows as they share their length
     n_tapers_max = int(2 * half_nbw)
-    window_fun, eigvals = dpss_windows(n_times, half_nbw, n_tapers_max,
+    window_fun, eigvals = dpss_windows(n_win, half_nbw, n_tapers_max,
                                        low_bias=False,
-                                       interp_from=min(n_times,
+                                       interp_from=min(n_win,
                                                        dpss_n_times_max))
     # F-stat of 1-p point
-    threshold = stats.f.ppf(1 - p_value / n_times, 2, 2 * len(window_fun) - 2)
+    threshold = stats.f.ppf(1 - p_value / n_win, 2, 2 * len(window_fun) - 2)
+    freqs = fftfreq(n_win, 1. / sfreq)
+    freqs = freqs[freqs >= 0]
+    if line_freqs is None:
+        line_idx = None
+    else:
+        line_idx = _get_line_indices(freqs, line_freqs, notch_widths)
 
-    if n_jobs == 1:
-        freq_list = list()
-        for ii, x_ in enumerate(x):
-            if ii in picks:
-                x[ii], f = _mt_spectrum_remove(x_, sfreq, line_freqs,
-                                               notch_widths, window_fun,
-                                               threshold)
-                freq_list.append(f)
+    # windows overlap by 50 %, the last one is aligned to the end of the data
+    if n_win == n_times:
+        starts = np.array([0])
     else:
-        parallel, p_fun, _ = parallel_func(_mt_spectrum_remove, n_jobs)
-        data_new = parallel(p_fun(x_, sfreq, line_freqs, notch_widths,
-                                  window_fun, threshold)
-                            for xi, x_ in enumerate(x)
-                            if xi in picks)
-        freq_list = [d[1] for d in data_new]
-        data_new = np.array([d[0] for d in data_new])
-        x[picks, :] = data_new
+        starts = np.r_[np.arange(0, n_times - n_win, n_win // 2),
+                       n_times - n_win]
+    w_sum = np.zeros(n_times)
+    for start in starts:
+        w_sum[start:start + n_win] += _mt_window_weights(start, n_win,
+                                                         n_times)
+
+    # split the windows into blocks whose tapered spectra fit in memory, and
+    # the channels into chunks when there are fewer windows than jobs
+    n_bytes = 16 * len(window_fun) * len(freqs) * len(picks)
+    n_blocks = int(np.ceil(len(starts) * n_bytes / float(_MT_BLOCK_BYTES)))
+    n_blocks = min(max(n_blocks, n_jobs), len(starts))
+    n_chunks = min(max(n_jobs // len(starts), 1), len(picks))
+    blocks = np.array_split(starts, n_blocks)
+    chunks = np.array_split(picks, n_chunks)
+
+    parallel, p_fun, _ = parallel_func(_mt_spectrum_remove_win, n_jobs)
+    n_batch = max(n_jobs // n_chunks, 1)
+    rm_mask = np.zeros((len(picks), len(freqs)), bool)
+    pend, pend_start = np.zeros((len(picks), 0)), 0
+    for bi in range(0, len(blocks), n_batch):
+        batch = blocks[bi:bi + n_batch]
+        out = parallel(p_fun(x[chunk, block[0]:block[-1] + n_win], block,
+                             n_win, n_times, sfreq, line_idx, window_fun,
+                             threshold)
+                       for block in batch for chunk in chunks)
+        for ii, block in enumerate(batch):
+            this_out = out[ii * n_chunks:(ii + 1) * n_chunks]
+            x_block = np.concatenate([o[0] for o in this_out])
+            rm_mask |= np.concatenate([o[1] for o in this_out])
+            # windows are processed in order, so everything preceding the
+            # start of this block is final and can be written back
+            start = block[0]
+            n_done = start - pend_start
+            x[picks, pend_start:start] = (pend[:, :n_done] /
+                                          w_sum[pend_start:start])
+            x_block[:, :pend.shape[1] - n_done] += pend[:, n_done:]
+            pend, pend_start = x_block, start
+    x[picks, pend_start:] = pend / w_sum[pend_start:]
 
     # report found frequencies
-    for rm_freqs in freq_list:
-        if line_freqs is None:
+    if line_freqs is None:
+        for this_mask in rm_mask:
+            rm_freqs = freqs[this_mask]
             if len(rm_freqs) > 0:
                 logger.info('Detected notch frequencies:\n%s'
                             % ', '.join([str(rm_f) for rm_f in rm_freqs]))
@@ -1175,12 +1281,55 @@ def _mt_spectrum_proc(x, sfreq, line_freqs, notch_widths, mt_bandwidth,
     return x
 
 
-def _mt_spectrum_remove(x, sfreq, line_freqs, notch_widths,
-                        window_fun, threshold):
+def _get_line_indices(freqs, line_freqs, notch_widths):
+    """Helper to get the spectral indices to remove for given line freqs"""
+    indices_1 = np.unique([np.argmin(np.abs(freqs - lf))
+                           for lf in line_freqs])
+    indices_2 = [np.logical_and(freqs > lf - nw / 2., freqs < lf + nw / 2.)
+                 for lf, nw in zip(line_freqs, notch_widths)]
+    indices_2 = np.where(np.any(np.array(indices_2), axis=0))[0]
+    return np.unique(np.r_[indices_1, indices_2]).astype(int)
+
+
+def _mt_window_weights(start, n_win, n_times):
+    """Helper to get the cross-fading weights of an overlapping window"""
+    weights = np.hanning(n_win + 1)[:-1]
+    if start == 0:
+        weights[:n_win // 2] = 1.
+    if start + n_win == n_times:
+        weights[n_win // 2:] = 1.
+    return weights
+
+
+def _mt_spectrum_remove_win(x, starts, n_win, n_times, sfreq, line_idx,
+                            window_fun, threshold):
+    """Remove line frequencies from a block of overlapping windows
+
+    ``x`` holds the data from ``starts[0]`` to ``starts[-1] + n_win``. The
+    windows of all signals are stacked and processed at once, and the
+    weighted (not yet normalized) overlap-add of the cleaned windows is
+    returned along with the mask of removed frequencies for each signal.
+    """
+    n_signals = x.shape[0]
+    offsets = starts - starts[0]
+    segs = x[:, offsets[:, np.newaxis] + np.arange(n_win)]
+    x_clean, rm_mask = _mt_spectrum_remove(segs.reshape(-1, n_win), sfreq,
+                                           line_idx, window_fun, threshold)
+    x_clean.shape = segs.shape
+    x_out = np.zeros_like(x)
+    for ii, (start, offset) in enumerate(zip(starts, offsets)):
+        x_out[:, offset:offset + n_win] += (
+            x_clean[:, ii] * _mt_window_weights(start, n_win, n_times))
+    rm_mask = rm_mask.reshape(n_signals, len(starts), -1).any(axis=1)
+    return x_out, rm_mask
+
+
+def _mt_spectrum_remove(x, sfreq, line_idx, window_fun, threshold):
     """Use MT-spectrum to remove line frequencies
 
-    Based on Chronux. If line_freqs is specified, all freqs within notch_width
-    of each line_freq is set to zero.
+    Based on Chronux. All signals in ``x`` (n_signals, n_times) are processed
+    together. If line_idx is specified, all frequencies with these indices
+    are removed, otherwise the ones with a significant F statistic are.
     """
     # drop the even tapers
     n_tapers = len(window_fun)
@@ -1195,23 +1344,27 @@ def _mt_spectrum_remove(x, sfreq, line_freqs, notch_widths,
     H0_sq = sum_squared(H0)
 
     # make "time" vector
-    rads = 2 * np.pi * (np.arange(x.size) / float(sfreq))
+    rads = 2 * np.pi * (np.arange(x.shape[1]) / float(sfreq))
 
-    # compute mt_spectrum (returning n_ch, n_tapers, n_freq)
-    x_p, freqs = _mt_spectra(x[np.newaxis, :], window_fun, sfreq)
+    # compute the tapered spectra of all signals with one real FFT, keeping
+    # the frequencies _mt_spectra would return (n_ch, n_tapers, n_freq)
+    freqs = fftfreq(x.shape[1], 1. / sfreq)
+    freqs = freqs[freqs >= 0]
+    x_p = rfft((x - np.mean(x, axis=-1)[:, np.newaxis])[:, np.newaxis, :] *
+               window_fun, axis=-1)[:, :, :len(freqs)]
 
-    # sum of the product of x_p and H0 across tapers (1, n_freqs)
+    # sum of the product of x_p and H0 across tapers (n_ch, n_freqs)
     x_p_H0 = np.sum(x_p[:, tapers_odd, :] *
                     H0[np.newaxis, :, np.newaxis], axis=1)
 
     # resulting calculated amplitudes for all freqs
     A = x_p_H0 / H0_sq
 
-    if line_freqs is None:
+    if line_idx is None:
         # figure out which freqs to remove using F stat
 
         # estimated coefficient
-        x_hat = A * H0[:, np.newaxis]
+        x_hat = A[:, np.newaxis, :] * H0[np.newaxis, :, np.newaxis]
 
         # numerator for F-statistic
         num = (n_tapers - 1) * (A * A.conj()).real * H0_sq
@@ -1222,32 +1375,17 @@ def _mt_spectrum_remove(x, sfreq, line_freqs, notch_widths,
         f_stat = num / den
 
         # find frequencies to remove
-        indices = np.where(f_stat > threshold)[1]
-        rm_freqs = freqs[indices]
+        rm_mask = f_stat > threshold
+        indices = np.where(rm_mask.any(axis=0))[0]
     else:
-        # specify frequencies
-        indices_1 = np.unique([np.argmin(np.abs(freqs - lf))
-                               for lf in line_freqs])
-        notch_widths /= 2.0
-        indices_2 = [np.logical_and(freqs > lf - nw, freqs < lf + nw)
-                     for lf, nw in zip(line_freqs, notch_widths)]
-        indices_2 = np.where(np.any(np.array(indices_2), axis=0))[0]
-        indices = np.unique(np.r_[indices_1, indices_2])
-        rm_freqs = freqs[indices]
-
-    fits = list()
-    for ind in indices:
-        c = 2 * A[0, ind]
-        fit = np.abs(c) * np.cos(freqs[ind] * rads + np.angle(c))
-        fits.append(fit)
-
-    if len(fits) == 0:
-        datafit = 0.0
-    else:
-        # fitted sinusoids are summed, and subtracted from data
-        datafit = np.sum(np.atleast_2d(fits), axis=0)
+        rm_mask = np.zeros(A.shape, bool)
+        rm_mask[:, line_idx] = True
+        indices = line_idx
 
-    return x - datafit, rm_freqs
+    # fitted sinusoids are summed with one product, and subtracted from data
+    c = 2 * A[:, indices] * rm_mask[:, indices]
+    datafit = np.dot(c, np.exp(1j * freqs[indices, np.newaxis] * rads)).real
+    return x - datafit, rm_mask
 
 
 @verbose
@@ -1445,7 +1583,8 @@ def detrend(x, order=1, axis=-1):
     x : n-d array
         Signal to detrend.
     order : int
-        Fit order. Currently must be '0' or '1'.
+        Fit order, 0 for a constant (DC) detrend, 1 for a linear detrend,
+        2 for a quadratic one, etc.
     axis : integer
         Axis of the array to operate on.
 
@@ -1464,18 +1603,78 @@ def detrend(x, order=1, axis=-1):
         >>> (detrend(x) - noise).max() < 0.01
         True
     """
-    from scipy.signal import detrend
     if axis > len(x.shape):
         raise ValueError('x does not have %d axes' % axis)
-    if order == 0:
-        fit = 'constant'
-    elif order == 1:
-        fit = 'linear'
-    else:
-        raise ValueError('order must be 0 or 1')
-
-    y = detrend(x, axis=axis, type=fit)
-
+    try:
+        order_int = int(order)
+    except (TypeError, ValueError):
+        order_int = -1
+    if order_int != order or order_int < 0:
+        raise ValueError('order must be a non-negative integer, got %s'
+                         % (order,))
+    order = order_int
+    x = np.swapaxes(np.asarray(x, dtype=np.result_type(x, np.float64)),
+                    axis, -1)
+    coefs, vander = _polyfit(x, order)
+    y = np.dot(coefs, vander.T)
+    np.subtract(x, y, out=y)
+    return np.swapaxes(y, axis, -1)
+
+
+def _polyfit(x, order, fit_slice=slice(None)):
+    """Helper to fit polynomials to all signals at once
+
+    The polynomials are fit along the last axis of x, using the samples in
+    fit_slice. The pseudo-inverse of the Vandermonde matrix is computed once
+    and applied to all signals with a single matrix product. Returns the
+    coefficients, of shape x.shape[:-1] + (order + 1,), and the Vandermonde
+    matrix for all samples, so that the fitted trend is
+    np.dot(coefs, vander.T). For order 0 the coefficients are the means.
+    As with np.mean, the coefficients are NaN if fit_slice is empty.
+    """
+    from scipy import linalg
+    n_times = x.shape[-1]
+    # times scaled to [-1, 1] for the conditioning of the Vandermonde matrix
+    t = np.linspace(-1., 1., n_times) if n_times > 1 else np.zeros(n_times)
+    vander = np.vander(t, order + 1)[:, ::-1]
+    x_fit = x[..., fit_slice]
+    if x_fit.shape[-1] == 0:
+        warn('No samples to fit the polynomials to, the fit is NaN')
+        coefs = np.empty(x.shape[:-1] + (order + 1,))
+        coefs.fill(np.nan)
+        return coefs, vander
+    coefs = np.dot(x_fit.reshape(-1, x_fit.shape[-1]),
+                   linalg.pinv(vander[fit_slice]).T)
+    return coefs.reshape(x.shape[:-1] + (order + 1,)), vander
+
+
+def _savgol_filter(x, window_length, polyorder):
+    """Helper for batched Savitzky-Golay filtering along the last axis
+
+    Equivalent to scipy.signal.savgol_filter with mode='interp': the
+    interior uses the smoothing kernel (a row of the pseudo-inverse of the
+    Vandermonde matrix), and the edges use the polynomial fit to the first
+    and last windows, computed for all signals at once.
+    """
+    from scipy.ndimage import correlate1d
+    from scipy import linalg
+    n_times = x.shape[-1]
+    if window_length % 2 != 1 or window_length > n_times:
+        raise ValueError('window_length (%s) must be odd and at most the '
+                         'number of time points (%s)'
+                         % (window_length, n_times))
+    if polyorder >= window_length:
+        raise ValueError('polyorder must be less than window_length')
+    half = window_length // 2
+    t = np.arange(-half, half + 1, dtype=np.float64) / max(half, 1)
+    kernel = linalg.pinv(np.vander(t, polyorder + 1)[:, ::-1])[0]
+    y = correlate1d(x, kernel, axis=-1, mode='constant')
+    for sl, eval_sl in ((slice(None, window_length), slice(None, half)),
+                        (slice(-window_length, None), slice(-half, None))):
+        if half == 0:
+            break
+        coefs, vander = _polyfit(x[..., sl], polyorder)
+        y[..., eval_sl] = np.dot(coefs, vander[eval_sl].T)
     return y
 
 
@@ -1576,23 +1775,17 @@ class FilterMixin(object):
         inst = self.copy() if copy else self
         if isinstance(inst, Evoked):
             data = inst.data
-            axis = 1
         elif isinstance(inst, _BaseEpochs):
             if not inst.preload:
                 raise RuntimeError('data must be preloaded to filter')
             data = inst._data
-            axis = 2
 
         h_freq = float(h_freq)
         if h_freq >= inst.info['sfreq'] / 2.:
             raise ValueError('h_freq must be less than half the sample rate')
 
-        # savitzky-golay filtering
-        if not check_version('scipy', '0.14'):
-            raise RuntimeError('scipy >= 0.14 must be installed for savgol')
-        from scipy.signal import savgol_filter
+        # savitzky-golay filtering, done on all epochs and channels at once
         window_length = (int(np.round(inst.info['sfreq'] /
                                       h_freq)) // 2) * 2 + 1
-        data[...] = savgol_filter(data, axis=axis, polyorder=5,
-                                  window_length=window_length)
+        data[...] = _savgol_filter(data, window_length, polyorder=5)
         return inst
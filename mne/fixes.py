@@ -591,6 +591,93 @@ def get_filtfilt():
     return _filtfilt
 
 
+def _sosfiltfilt(sos, x, padlen=None):
+    """Forward-backward filtering with second-order sections
+
+    Copied from SciPy's sosfiltfilt (added in 0.18) with odd padding along
+    the last axis only.
+    """
+    from scipy.signal import sosfilt, sosfilt_zi
+    sos = np.atleast_2d(sos)
+    x = np.asarray(x)
+    n_sections = sos.shape[0]
+    ntaps = 2 * n_sections + 1
+    ntaps -= min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    if padlen is None:
+        padlen = 3 * ntaps
+    if x.shape[-1] <= padlen:
+        raise ValueError('The length of the input vector x must be at least '
+                         'padlen, which is %d.' % padlen)
+    if padlen > 0:
+        ext = np.concatenate((2 * x[..., :1] - x[..., padlen:0:-1], x,
+                              2 * x[..., -1:] - x[..., -2:-padlen - 2:-1]),
+                             axis=-1)
+    else:
+        ext = x
+    zi = sosfilt_zi(sos)
+    zi.shape = (n_sections,) + (1,) * (x.ndim - 1) + (2,)
+    y = sosfilt(sos, ext, zi=zi * ext[..., :1])[0][..., ::-1]
+    y = sosfilt(sos, y, zi=zi * y[..., :1])[0][..., ::-1]
+    if padlen > 0:
+        y = y[..., padlen:-padlen]
+    return y
+
+
+def get_sosfiltfilt():
+    """Helper to get sosfiltfilt from scipy"""
+    try:
+        from scipy.signal import sosfiltfilt
+    except ImportError:
+        sosfiltfilt = _sosfiltfilt
+    return sosfiltfilt
+
+
+def _next_fast_len(target):
+    """Find the next 5-smooth number, i.e. a fast length for fftpack
+
+    Copied from SciPy's next_fast_len (added in 0.18).
+    """
+    if target <= 6:
+        return target
+    # quickly check if it's already a power of 2
+    if not (target & (target - 1)):
+        return target
+    match = float('inf')  # anything found will be smaller
+    p5 = 1
+    while p5 < target:
+        p35 = p5
+        while p35 < target:
+            # ceiling integer division, avoiding conversion to float
+            quotient = -(-target // p35)
+            # quickly find next power of 2 >= quotient
+            p2 = 2 ** int(quotient - 1).bit_length()
+            N = p2 * p35
+            if N == target:
+                return N
+            elif N < match:
+                match = N
+            p35 *= 3
+            if p35 == target:
+                return p35
+        if p35 < match:
+            match = p35
+        p5 *= 5
+        if p5 == target:
+            return p5
+    if p5 < match:
+        match = p5
+    return match
+
+
+def get_next_fast_len():
+    """Helper to get next_fast_len from scipy"""
+    try:
+        from scipy.fftpack import next_fast_len
+    except ImportError:
+        next_fast_len = _next_fast_len
+    return next_fast_len
+
+
 def _get_argrelmax():
     try:
         from scipy.signal import argrelmax
@@ -32,7 +32,8 @@ from .write import (start_file, end_file, start_block, end_block,
 from ..filter import (low_pass_filter, high_pass_filter, band_pass_filter,
                       notch_filter, band_stop_filter, resample,
                       _resample_stim_channels)
-from ..fixes import in1d
+from ..fft import ifft, rfft
+from ..fixes import in1d, get_next_fast_len
 from ..parallel import parallel_func
 from ..utils import (_check_fname, _check_pandas_installed,
                      _check_pandas_index_arguments, _check_copy_dep,
@@ -713,7 +714,7 @@ class _BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
 
     @verbose
     def apply_hilbert(self, picks, envelope=False, n_jobs=1, n_fft=None,
-                      verbose=None):
+                      chunk_duration=None, pad_duration=1., verbose=None):
         """ Compute analytic signal or envelope for a subset of channels.
 
         If envelope=False, the analytic signal for the channels defined in
@@ -746,14 +747,29 @@ class _BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             Compute the envelope signal of each channel.
         n_jobs: int
             Number of jobs to run in parallel.
-        n_fft : int > self.n_times | None
+        n_fft : int > self.n_times | 'auto' | None
             Points to use in the FFT for Hilbert transformation. The signal
             will be padded with zeros before computing Hilbert, then cut back
-            to original length. If None, n == self.n_times.
+            to original length. If None, n == self.n_times. If 'auto', the
+            next length greater than or equal to self.n_times for which the
+            FFT is fast is used. Not used if ``chunk_duration`` is not None.
+        chunk_duration : float | None
+            If not None, the signal is processed in chunks of this duration
+            (in seconds), each one extended by ``pad_duration`` on both sides
+            and transformed with a fast FFT length (overlap-save). This
+            bounds the memory needed, at the cost of small errors around
+            the chunk boundaries for broadband signals.
+        pad_duration : float
+            Duration (in seconds) of the data added on each side of the
+            chunks. Only used if ``chunk_duration`` is not None.
         verbose : bool, str, int, or None
             If not None, override default verbose level (see mne.verbose).
             Defaults to self.verbose.
 
+        See Also
+        --------
+        mne.io.Raw.get_envelope
+
         Notes
         -----
         The analytic signal "x_a(t)" of "x(t)" is::
@@ -773,15 +789,89 @@ class _BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
         is cut off, but it may result in a slightly different result
         (particularly around the edges). Use at your own risk.
         """
+        dtype = None if envelope is True else np.complex64
+        if chunk_duration is not None:
+            _check_preload(self, 'raw.apply_hilbert')
+            data_in = self._data
+            if dtype is not None and dtype != self._data.dtype:
+                self._data = self._data.astype(dtype)
+            # the input of the next chunks overlaps the output of the
+            # previous ones, so outputs are only written once they are
+            # outside of the data that remains to be read
+            pending = list()
+            for start, stop, read_start, out in _hilbert_chunks(
+                    lambda start, stop: data_in[picks, start:stop],
+                    self.n_times, int(round(chunk_duration *
+                                            self.info['sfreq'])),
+                    int(round(pad_duration * self.info['sfreq'])),
+                    envelope, n_jobs):
+                pending.append((start, stop, out))
+                while len(pending) > 0 and pending[0][1] <= read_start:
+                    start, stop, out = pending.pop(0)
+                    self._data[picks, start:stop] = out
+            for start, stop, out in pending:
+                self._data[picks, start:stop] = out
+            return
+        if isinstance(n_fft, string_types) and n_fft == 'auto':
+            n_fft = get_next_fast_len()(self.n_times)
         n_fft = self.n_times if n_fft is None else n_fft
         if n_fft < self.n_times:
             raise ValueError("n_fft must be greater than n_times")
-        if envelope is True:
-            self.apply_function(_my_hilbert, picks, None, n_jobs, n_fft,
-                                envelope=envelope)
-        else:
-            self.apply_function(_my_hilbert, picks, np.complex64, n_jobs,
-                                n_fft, envelope=envelope)
+        self.apply_function(_my_hilbert, picks, dtype, n_jobs, n_fft,
+                            envelope=envelope)
+
+    @verbose
+    def get_envelope(self, picks=None, chunk_duration=10., pad_duration=1.,
+                     dtype=np.float32, n_jobs=1, verbose=None):
+        """Compute the envelope of a subset of channels in chunks.
+
+        The envelope (absolute value of the analytic signal) is computed
+        chunk by chunk, so the complex analytic signal is never stored for
+        the whole recording and the data do not need to be preloaded.
+
+        Parameters
+        ----------
+        picks : array-like of int | None
+            Indices of the channels to use. If None, all M-EEG channels are
+            used.
+        chunk_duration : float | None
+            Duration (in seconds) of the chunks. Each chunk is extended by
+            ``pad_duration`` on both sides and transformed with a fast FFT
+            length (overlap-save). If None, the whole signal is transformed
+            at once.
+        pad_duration : float
+            Duration (in seconds) of the data added on each side of the
+            chunks.
+        dtype : numpy.dtype
+            Data type of the returned envelope.
+        n_jobs : int
+            Number of jobs to run in parallel (over channels).
+        verbose : bool, str, int, or None
+            If not None, override default verbose level (see mne.verbose).
+            Defaults to self.verbose.
+
+        Returns
+        -------
+        envelope : array, shape (n_picks, n_times)
+            The envelope of the picked channels.
+
+        See Also
+        --------
+        mne.io.Raw.apply_hilbert
+        """
+        if picks is None:
+            picks = _pick_data_channels(self.info, exclude=[],
+                                        with_ref_meg=False)
+        sfreq = self.info['sfreq']
+        n_chunk = (self.n_times if chunk_duration is None else
+                   int(round(chunk_duration * sfreq)))
+        envelope = np.empty((len(picks), self.n_times), dtype)
+        for start, stop, _, out in _hilbert_chunks(
+                lambda start, stop: self[picks, start:stop][0],
+                self.n_times, n_chunk, int(round(pad_duration * sfreq)),
+                True, n_jobs):
+            envelope[:, start:stop] = out
+        return envelope
 
     @verbose
     def filter(self, l_freq, h_freq, picks=None, filter_length='10s',
@@ -969,7 +1059,10 @@ class _BaseRaw(ProjMixin, ContainsMixin, UpdateChannelsMixin,
             used (faster for long signals). If str, a human-readable time in
             units of "s" or "ms" (e.g., "10s" or "5500ms") will be converted
             to the shortest power-of-two length at least that duration.
-            Not used for 'iir' filters.
+            Not used for 'iir' filters. For 'spectrum_fit', this is the
+            length of the windows (overlapping by 50%) in which sinusoids
+            are fit; None fits them to the whole signal, as done before
+            0.12.
         notch_widths : float | array of float | None
             Width of each stop band (centred at each freq in freqs) in Hz.
             If None, freqs / 200 is used.
@@ -2225,15 +2318,50 @@ def _my_hilbert(x, n_fft=None, envelope=False):
     out : array, shape (n_times)
         The hilbert transform of the signal, or the envelope.
     """
-    from scipy.signal import hilbert
     n_fft = x.shape[-1] if n_fft is None else n_fft
     n_x = x.shape[-1]
-    out = hilbert(x, N=n_fft)[:n_x]
+    # only the positive frequencies are kept (and doubled), the inverse FFT
+    # zero-pads the real FFT up to n_fft
+    h = np.zeros(n_fft // 2 + 1)
+    h[0] = 1.
+    h[1:(n_fft + 1) // 2] = 2.
+    if n_fft % 2 == 0:
+        h[-1] = 1.
+    out = ifft(rfft(x, n_fft) * h, n_fft)[..., :n_x]
     if envelope is True:
         out = np.abs(out)
     return out
 
 
+def _hilbert_chunks(get_data, n_times, n_chunk, n_pad, envelope, n_jobs=1):
+    """Compute the analytic signal or envelope in overlapping chunks
+
+    Each chunk of n_chunk samples is extended by n_pad samples on both sides
+    and transformed with a fast FFT length, then only the central part is
+    kept (overlap-save). Yields the chunk bounds, the first sample that was
+    read for it and the output.
+    """
+    next_fast_len = get_next_fast_len()
+    n_chunk = max(n_chunk, 1)
+    parallel, p_fun, n_jobs = parallel_func(_my_hilbert, n_jobs)
+    for start in range(0, n_times, n_chunk):
+        stop = min(start + n_chunk, n_times)
+        read_start, read_stop = max(start - n_pad, 0), min(stop + n_pad,
+                                                           n_times)
+        x = get_data(read_start, read_stop)
+        n_fft = next_fast_len(read_stop - read_start)
+        if n_jobs == 1:
+            out = _my_hilbert(x, n_fft)
+        else:
+            out = np.concatenate(parallel(
+                p_fun(x_, n_fft) for x_ in np.array_split(x, n_jobs)
+                if len(x_) > 0))
+        out = out[:, start - read_start:stop - read_start]
+        if envelope is True:
+            out = np.abs(out)
+        yield start, stop, read_start, out
+
+
 def _check_raw_compatibility(raw):
     """Check to make sure all instances of Raw
     in the input list raw have compatible parameters"""
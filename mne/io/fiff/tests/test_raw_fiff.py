@@ -999,6 +999,32 @@ def test_hilbert():
     env = np.abs(raw._data[picks, :])
     assert_allclose(env, raw2._data[picks, :], rtol=1e-2, atol=1e-13)
 
+    # Test fast FFT length and chunked (overlap-save) computation
+    raw_filt_2 = raw3.copy().filter(10, 20)
+    raw_filt_3 = raw_filt_2.copy()
+    raw_filt_2.apply_hilbert(picks)
+    raw_filt_3.apply_hilbert(picks, n_fft='auto')
+    assert_allclose(raw_filt_2._data[:, 50:-50], raw_filt_3._data[:, 50:-50],
+                    atol=1e-13, rtol=1e-2)
+    raw_filt_3 = raw3.copy().filter(10, 20)
+    raw_filt_3.apply_hilbert(picks, chunk_duration=5., pad_duration=1.,
+                             n_jobs=2)
+    assert_equal(raw_filt_3._data.dtype, np.complex64)
+    assert_allclose(raw_filt_2._data[:, 50:-50], raw_filt_3._data[:, 50:-50],
+                    atol=1e-13, rtol=1e-2)
+    env = raw3.copy().filter(10, 20).get_envelope(picks, chunk_duration=5.)
+    assert_equal(env.dtype, np.float32)
+    assert_allclose(np.abs(raw_filt_2._data[picks, 50:-50]), env[:, 50:-50],
+                    atol=1e-13, rtol=1e-2)
+    # non-preloaded data
+    raw_nopre = Raw(fif_fname, preload=False)
+    env = raw_nopre.get_envelope(picks, chunk_duration=5.)
+    env_2 = raw_nopre.get_envelope(picks, chunk_duration=None,
+                                   dtype=np.float64)
+    assert_equal(env.shape, (len(picks), raw_nopre.n_times))
+    assert_allclose(env_2[:, 1000:-1000], env[:, 1000:-1000],
+                    atol=1e-13, rtol=1e-2)
+
 
 @testing.requires_testing_data
 def test_raw_copy():
@@ -202,9 +202,10 @@ def _single_epoch_tfr(data, is_free_ori, K, Ws, use_fft, decim, shape,
     # phase lock
     plv_e = np.zeros(shape, dtype=np.complex) if with_plv else None
     n_sources, _, n_times = shape
-    for f, w in enumerate(Ws):
-        tfr_ = cwt(data, [w], use_fft=use_fft, decim=decim)
-        tfr_ = np.asfortranarray(tfr_.reshape(len(data), -1))
+    # all frequencies at once, the signals are only transformed once
+    tfr = cwt(data, Ws, use_fft=use_fft, decim=decim)
+    for f in range(len(Ws)):
+        tfr_ = np.asfortranarray(tfr[:, f])
 
         # phase lock and power at freq f
         if with_plv:
@@ -8,6 +8,11 @@
 from .externals.six import string_types
 import logging
 import os
+import os.path as op
+import shutil
+import tempfile
+
+import numpy as np
 
 from . import get_config
 from .utils import logger, verbose, warn
@@ -145,3 +150,101 @@ def check_n_jobs(n_jobs, allow_cuda=False):
                 n_jobs = 1
 
     return n_jobs
+
+
+class _ArrayHandle(object):
+    """Handle of an array in a file, to memmap it in a worker"""
+
+    def __init__(self, fname, dtype, shape, offset, mode):
+        self.fname = fname
+        self.dtype = dtype
+        self.shape = shape
+        self.offset = offset
+        self.mode = mode
+
+    def get(self):
+        """Memmap the array"""
+        return np.memmap(self.fname, self.dtype, self.mode, self.offset,
+                         self.shape)
+
+
+def _get_shared(x):
+    """Get an array shared with _SharedArrays, or x if it is not a handle"""
+    return x.get() if isinstance(x, _ArrayHandle) else x
+
+
+class _SharedArrays(object):
+    """Arrays shared with the workers of parallel jobs
+
+    The arrays are written once to files in MNE_CACHE_DIR (or /dev/shm, or
+    the temporary directory), and the workers are given small handles that
+    they memmap with _get_shared, so that the data are not pickled for each
+    job. With a single job, the arrays themselves are used. The files are
+    removed by cleanup, or on exit when used as a context manager.
+
+    Parameters
+    ----------
+    n_jobs : int
+        The number of jobs.
+    """
+
+    def __init__(self, n_jobs):
+        self.n_jobs = n_jobs
+        self._dir = None
+        self._handles = dict()
+
+    def share(self, x, mode='r'):
+        """Get the handle of an array
+
+        Parameters
+        ----------
+        x : ndarray | None
+            The array. Arrays memmapped from a file are shared without
+            being copied.
+        mode : 'r' | 'r+'
+            Whether the workers can write to the array.
+
+        Returns
+        -------
+        handle : instance of _ArrayHandle | ndarray | None
+            The handle, or x with a single job. Sharing the same array
+            again gives the same handle.
+        """
+        if self.n_jobs == 1 or x is None or x.size == 0:
+            return x
+        if (id(x), mode) in self._handles:
+            return self._handles[(id(x), mode)][1]
+        handle = self._share(x, mode)
+        self._handles[(id(x), mode)] = (x, handle)  # keep x alive for its id
+        return handle
+
+    def _share(self, x, mode):
+        """Write x to a file if needed and get its handle"""
+        if isinstance(x, np.memmap) and x.filename is not None and \
+                x.flags.c_contiguous and mode == 'r':
+            return _ArrayHandle(x.filename, x.dtype, x.shape, x.offset, mode)
+        from numpy.lib.format import open_memmap
+        if self._dir is None:
+            cache_dir = get_config('MNE_CACHE_DIR', None)
+            if cache_dir is None and op.isdir('/dev/shm'):
+                cache_dir = '/dev/shm'
+            self._dir = tempfile.mkdtemp(prefix='mne-shared-', dir=cache_dir)
+        fname = op.join(self._dir, 'array-%d.npy' % len(os.listdir(self._dir)))
+        out = open_memmap(fname, 'w+', x.dtype, x.shape)
+        out[:] = x
+        handle = _ArrayHandle(fname, out.dtype, out.shape, out.offset, mode)
+        del out
+        return handle
+
+    def cleanup(self):
+        """Remove the files of the arrays"""
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+        self._handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
@@ -10,4 +10,5 @@ from .cluster_level import (permutation_cluster_test,
                             ttest_1samp_no_p,
                             summarize_clusters_stc)
 from .multi_comp import fdr_correction, bonferroni_correction
-from .regression import linear_regression, linear_regression_raw
+from .regression import (linear_regression, linear_regression_raw,
+                         LinearModel)
@@ -10,193 +10,261 @@
 # License: Simplified BSD
 
 import logging
+import os
+import os.path as op
+import sys
 
 import numpy as np
 from scipy import sparse
 
 from .parametric import f_oneway
-from ..parallel import parallel_func, check_n_jobs
-from ..utils import split_list, logger, verbose, ProgressBar, warn
-from ..fixes import in1d, unravel_index
+from ..parallel import (parallel_func, check_n_jobs, _SharedArrays,
+                        _get_shared)
+from ..utils import (split_list, logger, verbose, ProgressBar, warn,
+                     object_hash)
+from ..fixes import in1d, unravel_index, partial
 from ..source_estimate import SourceEstimate
 
 
-def _get_clusters_spatial(s, neighbors):
-    """Helper function to form spatial clusters using neighbor lists
+def _union_find(n_nodes, edges_a, edges_b):
+    """Helper to label the connected components of a graph
 
-    This is equivalent to _get_components with n_times = 1, with a properly
-    reconfigured connectivity matrix (formed as "neighbors" list)
+    This is a vectorized union-find: the roots of the two ends of the edges
+    are hooked onto the smaller one, and the paths are compressed until each
+    node points to its root, until no edge joins two components. The label
+    of each component is the smallest node it contains.
+    """
+    labels = np.arange(n_nodes)
+    while len(edges_a) > 0:
+        la, lb = labels[edges_a], labels[edges_b]
+        keep = la != lb
+        edges_a, edges_b, la, lb = edges_a[keep], edges_b[keep], la[keep], \
+            lb[keep]
+        if len(edges_a) == 0:
+            break
+        # hook each root onto the smallest root it is joined to
+        lo, hi = np.minimum(la, lb), np.maximum(la, lb)
+        order = np.lexsort((lo, hi))
+        lo, hi = lo[order], hi[order]
+        first = np.concatenate(([True], hi[1:] != hi[:-1]))
+        labels[hi[first]] = np.minimum(labels[hi[first]], lo[first])
+        # compress the paths
+        while True:
+            new_labels = labels[labels]
+            if np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+    return labels
+
+
+def _get_st_edges(x_in, neighbors, max_step=1):
+    """Helper to get the edges of the spatio-temporal lattice in x_in
+
+    The nodes of the lattice (data organized as time x space) that are in
+    x_in are connected to their spatial neighbors at the same time point,
+    and to themselves at time points up to max_step apart. The edges are
+    given as indices in the nodes, np.where(x_in)[0].
     """
-    # s is a vector of spatial indices that are significant, like:
-    #     s = np.where(x_in)[0]
-    # for x_in representing a single time-instant
-    r = np.ones(s.shape, dtype=bool)
-    clusters = list()
-    next_ind = 0 if s.size > 0 else None
-    while next_ind is not None:
-        # put first point in a cluster, adjust remaining
-        t_inds = [next_ind]
-        r[next_ind] = False
-        icount = 1  # count of nodes in the current cluster
-        while icount <= len(t_inds):
-            ind = t_inds[icount - 1]
-            # look across other vertices
-            buddies = np.where(r)[0]
-            buddies = buddies[in1d(s[buddies], neighbors[s[ind]],
-                                   assume_unique=True)]
-            t_inds += buddies.tolist()
-            r[buddies] = False
-            icount += 1
-        # this is equivalent to np.where(r)[0] for these purposes, but it's
-        # a little bit faster. Unfortunately there's no way to tell numpy
-        # just to find the first instance (to save checking every one):
-        next_ind = np.argmax(r)
-        if next_ind == 0:
-            next_ind = None
-        clusters.append(s[t_inds])
-    return clusters
-
-
-def _reassign(check, clusters, base, num):
-    """Helper function to reassign cluster numbers"""
-    # reconfigure check matrix
-    check[check == num] = base
-    # concatenate new values into clusters array
-    clusters[base - 1] = np.concatenate((clusters[base - 1],
-                                         clusters[num - 1]))
-    clusters[num - 1] = np.array([], dtype=int)
-
-
-def _get_clusters_st_1step(keepers, neighbors):
-    """Directly calculate connectivity based on knowledge that time points are
-    only connected to adjacent neighbors for data organized as time x space.
-
-    This algorithm time increases linearly with the number of time points,
-    compared to with the square for the standard (graph) algorithm.
-
-    This algorithm creates clusters for each time point using a method more
-    efficient than the standard graph method (but otherwise equivalent), then
-    combines these clusters across time points in a reasonable way."""
     n_src = len(neighbors)
-    n_times = len(keepers)
-    # start cluster numbering at 1 for diffing convenience
-    enum_offset = 1
-    check = np.zeros((n_times, n_src), dtype=int)
-    clusters = list()
-    for ii, k in enumerate(keepers):
-        c = _get_clusters_spatial(k, neighbors)
-        for ci, cl in enumerate(c):
-            check[ii, cl] = ci + enum_offset
-        enum_offset += len(c)
-        # give them the correct offsets
-        c = [cl + ii * n_src for cl in c]
-        clusters += c
-
-    # now that each cluster has been assigned a unique number, combine them
-    # by going through each time point
-    for check1, check2, k in zip(check[:-1], check[1:], keepers[:-1]):
-        # go through each one that needs reassignment
-        inds = k[check2[k] - check1[k] > 0]
-        check1_d = check1[inds]
-        n = check2[inds]
-        nexts = np.unique(n)
-        for num in nexts:
-            prevs = check1_d[n == num]
-            base = np.min(prevs)
-            for pr in np.unique(prevs[prevs != base]):
-                _reassign(check1, clusters, base, pr)
-            # reassign values
-            _reassign(check2, clusters, base, num)
-    # clean up clusters
-    clusters = [cl for cl in clusters if len(cl) > 0]
-    return clusters
-
+    n_times = x_in.size // n_src
+    v = np.where(x_in)[0]
+    t, s = divmod(v, n_src)
+    pos = np.empty(x_in.size, dtype=np.intp)
+    pos[v] = np.arange(len(v))
+
+    # spatial edges, at the same time point
+    n_neighbors = np.array([len(n) for n in neighbors], dtype=np.intp)
+    indptr = np.concatenate(([0], np.cumsum(n_neighbors)))
+    indices = np.concatenate([np.asarray(n, dtype=np.intp)
+                              for n in neighbors])
+    counts = n_neighbors[s]
+    edges_a = np.repeat(np.arange(len(v)), counts)
+    offsets = np.arange(len(edges_a)) - np.repeat(np.cumsum(counts) - counts,
+                                                  counts)
+    edges_b = t[edges_a] * n_src + indices[indptr[s][edges_a] + offsets]
+    keep = x_in[edges_b]
+    edges_a, edges_b = [edges_a[keep]], [pos[edges_b[keep]]]
+
+    # temporal edges, to the same vertex
+    for step in range(1, min(max_step, n_times - 1) + 1):
+        idx = np.where(t < n_times - step)[0]
+        idx = idx[x_in[v[idx] + step * n_src]]
+        edges_a.append(idx)
+        edges_b.append(pos[v[idx] + step * n_src])
+    return np.concatenate(edges_a), np.concatenate(edges_b)
 
-def _get_clusters_st_multistep(keepers, neighbors, max_step=1):
-    """Directly calculate connectivity based on knowledge that time points are
-    only connected to adjacent neighbors for data organized as time x space.
 
-    This algorithm time increases linearly with the number of time points,
-    compared to with the square for the standard (graph) algorithm."""
-    n_src = len(neighbors)
-    n_times = len(keepers)
-    t_border = list()
-    t_border.append(0)
-    for ki, k in enumerate(keepers):
-        keepers[ki] = k + ki * n_src
-        t_border.append(t_border[ki] + len(k))
-    t_border = np.array(t_border)
-    keepers = np.concatenate(keepers)
-    v = keepers
-    t, s = divmod(v, n_src)
+def _get_clusters_st(x_in, neighbors, max_step=1):
+    """Helper function to form spatio-temporal clusters
 
-    r = np.ones(t.shape, dtype=bool)
-    clusters = list()
-    next_ind = 0
-    inds = np.arange(t_border[0], t_border[n_times])
-    if s.size > 0:
-        while next_ind is not None:
-            # put first point in a cluster, adjust remaining
-            t_inds = [next_ind]
-            r[next_ind] = False
-            icount = 1  # count of nodes in the current cluster
-            # look for significant values at the next time point,
-            # same sensor, not placed yet, and add those
-            while icount <= len(t_inds):
-                ind = t_inds[icount - 1]
-                selves = inds[t_border[max(t[ind] - max_step, 0)]:
-                              t_border[min(t[ind] + max_step + 1, n_times)]]
-                selves = selves[r[selves]]
-                selves = selves[s[ind] == s[selves]]
-
-                # look at current time point across other vertices
-                buddies = inds[t_border[t[ind]]:t_border[t[ind] + 1]]
-                buddies = buddies[r[buddies]]
-                buddies = buddies[in1d(s[buddies], neighbors[s[ind]],
-                                       assume_unique=True)]
-                buddies = np.concatenate((selves, buddies))
-                t_inds += buddies.tolist()
-                r[buddies] = False
-                icount += 1
-            # this is equivalent to np.where(r)[0] for these purposes, but it's
-            # a little bit faster. Unfortunately there's no way to tell numpy
-            # just to find the first instance (to save checking every one):
-            next_ind = np.argmax(r)
-            if next_ind == 0:
-                next_ind = None
-            clusters.append(v[t_inds])
+    The clusters are the connected components of the spatio-temporal
+    lattice in x_in (see _get_st_edges), in the order of their first node,
+    each one sorted.
+    """
+    v = np.where(x_in)[0]
+    if len(v) == 0:
+        return []
+    labels = _union_find(len(v), *_get_st_edges(x_in, neighbors, max_step))
+    order = np.argsort(labels, kind='mergesort')
+    splits = np.where(np.diff(labels[order]) > 0)[0] + 1
+    return np.split(v[order], splits)
 
-    return clusters
 
+def _get_edges(x_in, connectivity, max_step, partitions):
+    """Helper to get the edges between the points in x_in
 
-def _get_clusters_st(x_in, neighbors, max_step=1):
-    """Helper function to choose the most efficient version"""
-    n_src = len(neighbors)
-    n_times = x_in.size // n_src
-    cl_goods = np.where(x_in)[0]
-    if len(cl_goods) > 0:
-        keepers = [np.array([], dtype=int)] * n_times
-        row, col = unravel_index(cl_goods, (n_times, n_src))
-        if isinstance(row, int):
-            row = [row]
-            col = [col]
-            lims = [0]
-        else:
-            order = np.argsort(row)
-            row = row[order]
-            col = col[order]
-            lims = [0] + (np.where(np.diff(row) > 0)[0] +
-                          1).tolist() + [len(row)]
-
-        for start, end in zip(lims[:-1], lims[1:]):
-            keepers[row[start]] = np.sort(col[start:end])
-        if max_step == 1:
-            return _get_clusters_st_1step(keepers, neighbors)
-        else:
-            return _get_clusters_st_multistep(keepers, neighbors,
-                                              max_step)
+    The edges are given as indices in the points, np.where(x_in.ravel())[0].
+    With connectivity None, the points are on a lattice of shape x_in.shape
+    and connected to their neighbors along each axis, like ndimage.label.
+    """
+    x_in = x_in.ravel() if connectivity is not None else x_in
+    idx = np.where(x_in.ravel())[0]
+    if connectivity is None:
+        grid = np.arange(x_in.size).reshape(x_in.shape)
+        pos = np.empty(x_in.size, dtype=np.intp)
+        pos[idx] = np.arange(len(idx))
+        edges_a, edges_b = list(), list()
+        for axis in range(x_in.ndim):
+            lo = [slice(None)] * x_in.ndim
+            hi = [slice(None)] * x_in.ndim
+            lo[axis], hi[axis] = slice(None, -1), slice(1, None)
+            lo, hi = tuple(lo), tuple(hi)
+            keep = np.logical_and(x_in[lo], x_in[hi])
+            edges_a.append(pos[grid[lo][keep]])
+            edges_b.append(pos[grid[hi][keep]])
+        edges_a, edges_b = np.concatenate(edges_a), np.concatenate(edges_b)
+    elif isinstance(connectivity, sparse.spmatrix):
+        connectivity = connectivity.tocoo()
+        pos = np.empty(x_in.size, dtype=np.intp)
+        pos[idx] = np.arange(len(idx))
+        keep = np.logical_and(x_in[connectivity.row], x_in[connectivity.col])
+        edges_a = pos[connectivity.row[keep]]
+        edges_b = pos[connectivity.col[keep]]
+    elif isinstance(connectivity, list):
+        edges_a, edges_b = _get_st_edges(x_in, connectivity, max_step)
     else:
-        return []
+        raise ValueError('Connectivity must be a sparse matrix or list')
+    if partitions is not None:
+        keep = partitions[idx[edges_a]] == partitions[idx[edges_b]]
+        edges_a, edges_b = edges_a[keep], edges_b[keep]
+    return idx, edges_a, edges_b
+
+
+def _find_roots(labels, nodes):
+    """Helper to find the roots of nodes in a union-find, compressing paths"""
+    roots = labels[nodes]
+    while True:
+        up = labels[roots]
+        if np.array_equal(up, roots):
+            break
+        roots = up
+    labels[nodes] = roots
+    return roots
+
+
+def _tfce_sweep(levels, edges_a, edges_b, h, e_power):
+    """Compute TFCE scores with one sweep over the thresholds
+
+    Node i is above the thresholds 0 to levels[i], and the TFCE score of a
+    node is the sum over these thresholds of h[threshold] times the size of
+    its cluster at that threshold to the power e_power.
+
+    The thresholds are swept from the highest, adding the nodes and edges
+    that appear at each one to a union-find of the clusters. Each cluster
+    that changes (grows or merges) becomes a node of a merge tree, whose
+    contribution (size ** e_power times the sum of h over the thresholds it
+    lasts) is computed once. The score of a node is then the sum of the
+    contributions of the tree nodes from its first cluster to the top.
+    """
+    n_nodes = len(levels)
+    n_levels = len(h)
+    edge_levels = np.minimum(levels[edges_a], levels[edges_b])
+    node_order = np.argsort(levels, kind='mergesort')
+    node_bounds = np.searchsorted(levels[node_order], np.arange(n_levels + 1))
+    edge_order = np.argsort(edge_levels, kind='mergesort')
+    edge_bounds = np.searchsorted(edge_levels[edge_order],
+                                  np.arange(n_levels + 1))
+
+    labels = np.arange(n_nodes)
+    size = np.zeros(n_nodes)
+    comp = np.empty(n_nodes, dtype=np.intp)  # tree node of each root
+    leaf = np.empty(n_nodes, dtype=np.intp)  # first tree node of each node
+    n_tree = n_nodes + len(edges_a)  # upper bound
+    tree_size = np.empty(n_tree)
+    tree_start = np.empty(n_tree, dtype=np.intp)
+    tree_end = np.empty(n_tree, dtype=np.intp)
+    tree_parent = np.empty(n_tree, dtype=np.intp)
+    tree_bounds = [0]
+    for level in range(n_levels - 1, -1, -1):
+        new = node_order[node_bounds[level]:node_bounds[level + 1]]
+        edges = edge_order[edge_bounds[level]:edge_bounds[level + 1]]
+        size[new] = 1.
+        comp[new] = -1
+        roots_a = _find_roots(labels, edges_a[edges])
+        roots_b = _find_roots(labels, edges_b[edges])
+        roots = np.unique(np.concatenate((new, roots_a, roots_b)))
+        if len(roots) == 0:
+            tree_bounds.append(tree_bounds[-1])
+            continue
+        merged = roots[_union_find(len(roots),
+                                   np.searchsorted(roots, roots_a),
+                                   np.searchsorted(roots, roots_b))]
+        new_roots, inv = np.unique(merged, return_inverse=True)
+        tree_ids = tree_bounds[-1] + np.arange(len(new_roots))
+        tree_bounds.append(tree_bounds[-1] + len(new_roots))
+        # the clusters that changed end here, in the new ones
+        old = comp[roots]
+        had = old >= 0
+        tree_parent[old[had]] = tree_ids[inv[had]]
+        tree_end[old[had]] = level
+        sizes = np.bincount(inv, weights=size[roots])
+        size[new_roots] = sizes
+        tree_size[tree_ids] = sizes
+        tree_start[tree_ids] = level
+        tree_end[tree_ids] = -1
+        tree_parent[tree_ids] = n_tree  # no parent
+        comp[new_roots] = tree_ids
+        labels[roots] = merged
+        leaf[new] = tree_ids[inv[np.searchsorted(roots, new)]]
+
+    # contributions, with h summed over the thresholds of each tree node
+    n_used = tree_bounds[-1]
+    h_sums = np.concatenate(([0.], np.cumsum(h)))
+    contrib = (tree_size[:n_used] ** e_power) * (
+        h_sums[tree_start[:n_used] + 1] - h_sums[tree_end[:n_used] + 1])
+    # sum from the top of the tree, parents are created after their children
+    total = np.zeros(n_tree + 1)
+    for start, stop in zip(tree_bounds[-2::-1], tree_bounds[:0:-1]):
+        ids = np.arange(start, stop)
+        total[ids] = contrib[ids] + total[tree_parent[ids]]
+    return total[leaf]
+
+
+def _tfce_scores(x, thresholds, tail, connectivity, max_step, include,
+                 partitions, h_power, e_power):
+    """Compute the TFCE scores of x, see _find_clusters"""
+    thresholds = np.asarray(thresholds, float)
+    scores = np.zeros(x.size)
+    if len(thresholds) == 0:
+        return scores
+    h = np.abs(np.diff(np.concatenate(([0.], thresholds)))) ** h_power
+    if tail == 0:
+        signs = [1, -1]
+    elif tail == -1:
+        signs, thresholds = [-1], -thresholds
+    else:  # tail == 1
+        signs = [1]
+    # thresholds are increasing for sign * x
+    for sign in signs:
+        y = sign * x
+        x_in = np.logical_and(y > thresholds[0], include)
+        if not np.any(x_in):
+            continue
+        idx, edges_a, edges_b = _get_edges(x_in, connectivity, max_step,
+                                           partitions)
+        levels = np.searchsorted(thresholds, y.ravel()[idx]) - 1
+        scores[idx] += _tfce_sweep(levels, edges_a, edges_b, h, e_power)
+    return scores
 
 
 def _get_components(x_in, connectivity, return_list=True):
@@ -333,7 +401,6 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
                             'computation (h_power=%0.2f, e_power=%0.2f)'
                             % (len(thresholds), thresholds[0], thresholds[-1],
                                h_power, e_power))
-        scores = np.zeros(x.size)
     else:
         thresholds = [threshold]
         tfce = False
@@ -349,6 +416,11 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
     # set these here just in case thresholds == []
     clusters = list()
     sums = np.empty(0)
+    if tfce is True:
+        # all the thresholds are done in one sweep
+        scores = _tfce_scores(x, thresholds, tail, connectivity, max_step,
+                              include, partitions, h_power, e_power)
+        thresholds = list()
     for ti, thresh in enumerate(thresholds):
         # these need to be reset on each run
         clusters = list()
@@ -368,25 +440,6 @@ def _find_clusters(x, threshold, tail=0, connectivity=None, max_step=1,
                                                 ndimage)
                 clusters += out[0]
                 sums = np.concatenate((sums, out[1]))
-        if tfce is True:
-            # the score of each point is the sum of the h^H * e^E for each
-            # supporting section "rectangle" h x e.
-            if ti == 0:
-                h = abs(thresh)
-            else:
-                h = abs(thresh - thresholds[ti - 1])
-            h = h ** h_power
-            for c in clusters:
-                # triage based on cluster storage type
-                if isinstance(c, slice):
-                    len_c = c.stop - c.start
-                elif isinstance(c, tuple):
-                    len_c = len(c)
-                elif c.dtype == bool:
-                    len_c = np.sum(c)
-                else:
-                    len_c = len(c)
-                scores[c] += h * (len_c ** e_power)
     if tfce is True:
         # each point gets treated independently
         clusters = np.arange(x.size)
@@ -526,32 +579,130 @@ def _setup_connectivity(connectivity, n_vertices, n_times):
     return connectivity
 
 
-def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
-                     max_step, include, partitions, t_power, seeds,
-                     sample_shape, buffer_size, progress_bar):
+# bytes of surrogate statistics computed at once for blocks of permutations
+_PERM_BLOCK_BYTES = 2 ** 26
+
+
+def _get_stat_fun_kwargs(stat_fun, func):
+    """Helper to get the keyword arguments if stat_fun is func, else None"""
+    if stat_fun is func:
+        return dict()
+    if isinstance(stat_fun, partial) and stat_fun.func is func and \
+            len(stat_fun.args) == 0:
+        return dict(stat_fun.keywords or {})
+    return None
+
+
+def _get_perm_block_size(n_vars):
+    """Helper to get the number of permutations to compute at once"""
+    return max(_PERM_BLOCK_BYTES // (8 * n_vars), 1)
 
+
+def _get_shuffle(seed, n_samp):
+    """Helper to get the sample indices shuffled for a seed"""
+    rng = np.random.RandomState(seed)
+    idx_shuffled = np.arange(n_samp)
+    rng.shuffle(idx_shuffled)
+    return idx_shuffled
+
+
+def _get_signs(seed, n_samp):
+    """Helper to get the sign flips for a seed"""
+    if isinstance(seed, np.ndarray):
+        # new surrogate data with specified sign flip
+        if not seed.size == n_samp:
+            raise ValueError('rng string must be n_samples long')
+        signs = 2 * seed.astype(int) - 1
+        if not np.all(np.equal(np.abs(signs), 1)):
+            raise ValueError('signs from rng must be +/- 1')
+    else:
+        rng = np.random.RandomState(seed)
+        # new surrogate data with random sign flip
+        signs = np.sign(0.5 - rng.rand(n_samp))
+    return signs
+
+
+def _f_oneway_shuffles(X_full, slices, idx_shuffled, ss_alldata):
+    """Compute the F-values of blocks of shuffles at once
+
+    This is f_oneway for each shuffle, where the sums of each group are
+    computed for all shuffles with one product by a matrix of group
+    membership. The sum of squares and the total sum do not change.
+    """
+    n_perm, n_samp = idx_shuffled.shape
+    n_samples_per_class = [s.stop - s.start for s in slices]
+    member = np.zeros((n_perm, n_samp), X_full.dtype)
+    rows = np.arange(n_perm)[:, np.newaxis]
+    ssbn = 0.
+    for sl, n_samples in zip(slices, n_samples_per_class):
+        member.fill(0.)
+        member[rows, idx_shuffled[:, sl]] = 1.
+        ssbn += np.dot(member, X_full) ** 2 / n_samples
+    square_of_sums_alldata = np.sum(X_full, axis=0) ** 2 / float(n_samp)
+    ssbn -= square_of_sums_alldata
+    sswn = ss_alldata - square_of_sums_alldata - ssbn
+    dfbn = len(slices) - 1
+    dfwn = n_samp - len(slices)
+    return (ssbn / float(dfbn)) / (sswn / float(dfwn))
+
+
+def _ttest_1samp_flips(X, signs, ss, sigma=0, method='relative'):
+    """Compute the t-values of blocks of sign flips at once
+
+    This is ttest_1samp_no_p for each row of signs, where the means are
+    computed for all sign flips with one product. The sum of squares does
+    not change.
+    """
+    if method not in ['absolute', 'relative']:
+        raise ValueError('method must be "absolute" or "relative", not %s'
+                         % method)
+    n_samp = X.shape[0]
+    mean = np.dot(signs, X) / n_samp
+    var = (ss - n_samp * mean ** 2) / (n_samp - 1)
+    if sigma > 0:
+        if method == 'relative':
+            limit = sigma * np.max(var, axis=1)[:, np.newaxis]
+        else:
+            limit = sigma
+        var += limit
+    return mean / np.sqrt(var / n_samp)
+
+
+def _iter_shuffle_stats(X_full, slices, stat_fun, seeds, buffer_size):
+    """Iterate over the statistics of the shuffled data of each seed
+
+    If stat_fun is None, X_full holds precomputed statistics and seeds are
+    the rows to use.
+    """
+    if stat_fun is None:
+        for row in seeds:
+            yield np.array(X_full[row], np.float64)
+        return
     n_samp, n_vars = X_full.shape
+    kwargs = _get_stat_fun_kwargs(stat_fun, f_oneway)
+    if kwargs is not None and len(kwargs) == 0:
+        # compute blocks of permutations at once
+        ss_alldata = np.sum(X_full ** 2, axis=0)
+        n_block = _get_perm_block_size(n_vars)
+        for start in range(0, len(seeds), n_block):
+            idx_shuffled = np.array([_get_shuffle(seed, n_samp) for seed
+                                     in seeds[start:start + n_block]])
+            for T_obs_surr in _f_oneway_shuffles(X_full, slices, idx_shuffled,
+                                                 ss_alldata):
+                yield T_obs_surr
+        return
 
     if buffer_size is not None and n_vars <= buffer_size:
         buffer_size = None  # don't use buffer for few variables
 
-    # allocate space for output
-    max_cluster_sums = np.empty(len(seeds), dtype=np.double)
-
     if buffer_size is not None:
         # allocate buffer, so we don't need to allocate memory during loop
         X_buffer = [np.empty((len(X_full[s]), buffer_size), dtype=X_full.dtype)
                     for s in slices]
 
-    for seed_idx, seed in enumerate(seeds):
-        if progress_bar is not None:
-            if (not (seed_idx + 1) % 32) or (seed_idx == 0):
-                progress_bar.update(seed_idx + 1)
-
+    for seed in seeds:
         # shuffle sample indices
-        rng = np.random.RandomState(seed)
-        idx_shuffled = np.arange(n_samp)
-        rng.shuffle(idx_shuffled)
+        idx_shuffled = _get_shuffle(seed, n_samp)
         idx_shuffle_list = [idx_shuffled[s] for s in slices]
 
         if buffer_size is None:
@@ -574,59 +725,41 @@ def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
                 # apply stat_fun and store result
                 tmp = stat_fun(*X_buffer)
                 T_obs_surr[pos: pos + n_var_loop] = tmp[:n_var_loop]
+        yield T_obs_surr
 
-        # The stat should have the same shape as the samples for no conn.
-        if connectivity is None:
-            T_obs_surr.shape = sample_shape
-
-        # Find cluster on randomized stats
-        out = _find_clusters(T_obs_surr, threshold=threshold, tail=tail,
-                             max_step=max_step, connectivity=connectivity,
-                             partitions=partitions, include=include,
-                             t_power=t_power)
-        perm_clusters_sums = out[1]
-
-        if len(perm_clusters_sums) > 0:
-            max_cluster_sums[seed_idx] = np.max(perm_clusters_sums)
-        else:
-            max_cluster_sums[seed_idx] = 0
-
-    return max_cluster_sums
 
+def _iter_1samp_stats(X, stat_fun, seeds, buffer_size):
+    """Iterate over the statistics of the sign-flipped data of each seed
 
-def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
-                           max_step, include, partitions, t_power, seeds,
-                           sample_shape, buffer_size, progress_bar):
+    If stat_fun is None, X holds precomputed statistics and seeds are the
+    rows to use.
+    """
+    if stat_fun is None:
+        for row in seeds:
+            yield np.array(X[row], np.float64)
+        return
     n_samp, n_vars = X.shape
-    assert slices is None  # should be None for the 1 sample case
+    kwargs = _get_stat_fun_kwargs(stat_fun, ttest_1samp_no_p)
+    if kwargs is not None:
+        # compute blocks of sign flips at once
+        ss = np.sum(X ** 2, axis=0)
+        n_block = _get_perm_block_size(n_vars)
+        for start in range(0, len(seeds), n_block):
+            signs = np.array([_get_signs(seed, n_samp) for seed
+                              in seeds[start:start + n_block]], X.dtype)
+            for T_obs_surr in _ttest_1samp_flips(X, signs, ss, **kwargs):
+                yield T_obs_surr
+        return
 
     if buffer_size is not None and n_vars <= buffer_size:
         buffer_size = None  # don't use buffer for few variables
 
-    # allocate space for output
-    max_cluster_sums = np.empty(len(seeds), dtype=np.double)
-
     if buffer_size is not None:
         # allocate a buffer so we don't need to allocate memory in loop
         X_flip_buffer = np.empty((n_samp, buffer_size), dtype=X.dtype)
 
-    for seed_idx, seed in enumerate(seeds):
-        if progress_bar is not None:
-            if not (seed_idx + 1) % 32 or seed_idx == 0:
-                progress_bar.update(seed_idx + 1)
-
-        if isinstance(seed, np.ndarray):
-            # new surrogate data with specified sign flip
-            if not seed.size == n_samp:
-                raise ValueError('rng string must be n_samples long')
-            signs = 2 * seed[:, None].astype(int) - 1
-            if not np.all(np.equal(np.abs(signs), 1)):
-                raise ValueError('signs from rng must be +/- 1')
-        else:
-            rng = np.random.RandomState(seed)
-            # new surrogate data with random sign flip
-            signs = np.sign(0.5 - rng.rand(n_samp))
-            signs = signs[:, np.newaxis]
+    for seed in seeds:
+        signs = _get_signs(seed, n_samp)[:, np.newaxis]
 
         if buffer_size is None:
             # be careful about non-writable memmap (GH#1507)
@@ -652,6 +785,104 @@ def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
                 # apply stat_fun and store result
                 tmp = stat_fun(X_flip_buffer)
                 T_obs_surr[pos: pos + n_var_loop] = tmp[:n_var_loop]
+        yield T_obs_surr
+
+
+def _share_connectivity(connectivity, shared):
+    """Helper to share a connectivity with the workers of parallel jobs"""
+    if connectivity is None or shared.n_jobs == 1:
+        return connectivity
+    if sparse.isspmatrix(connectivity):
+        return ('sparse', shared.share(connectivity.row),
+                shared.share(connectivity.col),
+                shared.share(connectivity.data), connectivity.shape)
+    indptr = np.cumsum([0] + [len(c) for c in connectivity])
+    indices = np.concatenate([np.asarray(c, int) for c in connectivity])
+    return ('list', shared.share(indptr), shared.share(indices))
+
+
+def _get_shared_connectivity(connectivity):
+    """Helper to get a connectivity shared with _share_connectivity"""
+    if not isinstance(connectivity, tuple):
+        return connectivity
+    if connectivity[0] == 'sparse':
+        row, col, data = [_get_shared(c) for c in connectivity[1:4]]
+        return sparse.coo_matrix((data, (row, col)), shape=connectivity[4])
+    indptr, indices = [_get_shared(c) for c in connectivity[1:]]
+    return [np.array(indices[start:stop])
+            for start, stop in zip(indptr[:-1], indptr[1:])]
+
+
+class _PermutationProgress(object):
+    """Progress bar of the permutations done by all jobs
+
+    Each job writes how many permutations it did in a shared array, and
+    shows the progress of all jobs.
+    """
+
+    def __init__(self, counts, job, n_total):
+        self.counts = counts
+        self.job = job
+        self.n_total = n_total
+        self._bar = None
+
+    def update(self, n_done):
+        counts = _get_shared(self.counts)
+        counts[self.job] = n_done
+        if self._bar is None:
+            self._bar = ProgressBar(self.n_total, spinner=True)
+        self._bar.update(min(int(counts.sum()), self.n_total))
+
+
+def _do_permutations(X_full, slices, threshold, tail, connectivity, stat_fun,
+                     max_step, include, partitions, t_power, seeds,
+                     sample_shape, buffer_size, progress_bar):
+    X_full, partitions = _get_shared(X_full), _get_shared(partitions)
+    connectivity = _get_shared_connectivity(connectivity)
+
+    # allocate space for output
+    max_cluster_sums = np.empty(len(seeds), dtype=np.double)
+
+    for seed_idx, T_obs_surr in enumerate(
+            _iter_shuffle_stats(X_full, slices, stat_fun, seeds, buffer_size)):
+        if progress_bar is not None:
+            if (not (seed_idx + 1) % 32) or (seed_idx == 0):
+                progress_bar.update(seed_idx + 1)
+
+        # The stat should have the same shape as the samples for no conn.
+        if connectivity is None:
+            T_obs_surr.shape = sample_shape
+
+        # Find cluster on randomized stats
+        out = _find_clusters(T_obs_surr, threshold=threshold, tail=tail,
+                             max_step=max_step, connectivity=connectivity,
+                             partitions=partitions, include=include,
+                             t_power=t_power)
+        perm_clusters_sums = out[1]
+
+        if len(perm_clusters_sums) > 0:
+            max_cluster_sums[seed_idx] = np.max(perm_clusters_sums)
+        else:
+            max_cluster_sums[seed_idx] = 0
+
+    return max_cluster_sums
+
+
+def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
+                           max_step, include, partitions, t_power, seeds,
+                           sample_shape, buffer_size, progress_bar):
+    assert slices is None  # should be None for the 1 sample case
+    X, partitions = _get_shared(X), _get_shared(partitions)
+    connectivity = _get_shared_connectivity(connectivity)
+
+    # allocate space for output
+    max_cluster_sums = np.empty(len(seeds), dtype=np.double)
+
+    for seed_idx, T_obs_surr in enumerate(
+            _iter_1samp_stats(X, stat_fun, seeds, buffer_size)):
+        if progress_bar is not None:
+            if not (seed_idx + 1) % 32 or seed_idx == 0:
+                progress_bar.update(seed_idx + 1)
 
         # The stat should have the same shape as the samples for no conn.
         if connectivity is None:
@@ -673,11 +904,127 @@ def _do_1samp_permutations(X, slices, threshold, tail, connectivity, stat_fun,
     return max_cluster_sums
 
 
+def _get_stat_fun_name(stat_fun):
+    """Helper to identify a stat_fun in the cache of statistics
+
+    Only functions defined at the top level of a module, and partials of
+    them with arguments that can be hashed, are identified by their name.
+    None is returned for other callables (e.g., lambdas and closures), as
+    two of them can have the same name but compute different statistics.
+    """
+    if isinstance(stat_fun, partial):
+        name = _get_stat_fun_name(stat_fun.func)
+        if name is None:
+            return None
+        name = [name, list(stat_fun.args), dict(stat_fun.keywords or {})]
+        try:
+            object_hash(name)
+        except RuntimeError:
+            return None
+        return name
+    module = getattr(stat_fun, '__module__', None)
+    name = getattr(stat_fun, '__name__', None)
+    if module is None or name is None or \
+            getattr(sys.modules.get(module), name, None) is not stat_fun:
+        return None
+    return '%s.%s' % (module, name)
+
+
+def _compute_stats(X_full, slices, stat_fun, seeds, buffer_size):
+    """Aux function"""
+    X_full = _get_shared(X_full)
+    if slices is None:
+        stats = _iter_1samp_stats(X_full, stat_fun, seeds, buffer_size)
+    else:
+        stats = _iter_shuffle_stats(X_full, slices, stat_fun, seeds,
+                                    buffer_size)
+    return np.array(list(stats))
+
+
+def _get_cached_stats(cache_dir, dtype, X_full, slices, stat_fun, seeds,
+                      buffer_size, shared):
+    """Helper to get the statistics of permutations cached in cache_dir
+
+    The statistics of each seed are stored in a .npy file, named from a hash
+    of the data, the kind of permutations and stat_fun, along with a file of
+    the seeds. Statistics of seeds that are not cached yet are computed and
+    added to the file.
+
+    Returns
+    -------
+    stats : memmap, shape (n_cached, n_tests)
+        The cached statistics.
+    rows : array of int
+        The row of stats of each seed.
+    """
+    from numpy.lib.format import open_memmap
+    exact = isinstance(seeds[0], np.ndarray)
+    if exact:
+        seed_keys = [int(''.join(str(b) for b in seed), 2) for seed in seeds]
+    else:
+        seed_keys = [int(seed) for seed in seeds]
+    seed_keys = np.array(seed_keys, np.int64)
+    dtype = np.dtype(np.float64 if dtype is None else dtype)
+    key = object_hash(['1samp' if slices is None else 'shuffle', exact,
+                       X_full, [] if slices is None else
+                       [[int(sl.start), int(sl.stop)] for sl in slices],
+                       _get_stat_fun_name(stat_fun), str(dtype)])
+    fname = op.join(cache_dir, 'mne-perm-stats-%032x.npy' % key)
+    fname_seeds = fname[:-4] + '-seeds.npy'
+    if op.isfile(fname) and op.isfile(fname_seeds):
+        # the stats file is replaced before the seeds file, so after an
+        # interruption it can have more rows than there are seeds
+        cached_keys = np.load(fname_seeds)
+        if len(np.load(fname, mmap_mode='r')) < len(cached_keys):
+            cached_keys = np.empty(0, np.int64)
+    else:
+        cached_keys = np.empty(0, np.int64)
+
+    missing = np.where(np.logical_not(in1d(seed_keys, cached_keys)))[0]
+    missing = missing[np.unique(seed_keys[missing], return_index=True)[1]]
+    if len(missing) > 0:
+        logger.info('Computing the statistics of %d permutations for the '
+                    'cache' % len(missing))
+        n_cached, n_tests = len(cached_keys), X_full.shape[1]
+        fname_tmp = fname[:-4] + '-tmp.npy'
+        stats = open_memmap(fname_tmp, 'w+', dtype,
+                            (n_cached + len(missing), n_tests))
+        if n_cached > 0:
+            stats[:n_cached] = np.load(fname, mmap_mode='r')[:n_cached]
+        n_jobs = shared.n_jobs
+        parallel, p_fun, _ = parallel_func(_compute_stats, n_jobs)
+        X_shared = shared.share(X_full)
+        n_block = _get_perm_block_size(n_tests) * n_jobs
+        for start in range(0, len(missing), n_block):
+            block = [seeds[ii] for ii in missing[start:start + n_block]]
+            block_stats = parallel(p_fun(X_shared, slices, stat_fun, b,
+                                         buffer_size)
+                                   for b in split_list(block, n_jobs)
+                                   if len(b) > 0)
+            stats[n_cached + start:n_cached + start + len(block)] = \
+                np.concatenate(block_stats)
+        del stats
+        cached_keys = np.concatenate((cached_keys, seed_keys[missing]))
+        fname_seeds_tmp = fname[:-4] + '-seeds-tmp.npy'
+        np.save(fname_seeds_tmp, cached_keys)
+        for this_tmp, this_fname in ((fname_tmp, fname),
+                                     (fname_seeds_tmp, fname_seeds)):
+            if op.isfile(this_fname):
+                os.remove(this_fname)
+            os.rename(this_tmp, this_fname)
+    else:
+        logger.info('Using the cached statistics of the permutations')
+    order = np.argsort(cached_keys)
+    rows = order[np.searchsorted(cached_keys[order], seed_keys)]
+    return np.load(fname, mmap_mode='r'), rows
+
+
 @verbose
 def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
                               connectivity, verbose, n_jobs, seed, max_step,
                               exclude, step_down_p, t_power, out_type,
-                              check_disjoint, buffer_size):
+                              check_disjoint, buffer_size, stat_cache_dir=None,
+                              stat_cache_dtype=None):
     n_jobs = check_n_jobs(n_jobs)
     """ Aux Function
 
@@ -775,15 +1122,18 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
         splits_idx = np.append([0], np.cumsum(n_samples_per_condition))
         slices = [slice(splits_idx[k], splits_idx[k + 1])
                   for k in range(len(X))]
-    parallel, my_do_perm_func, _ = parallel_func(do_perm_func, n_jobs)
+    parallel, my_do_perm_func, n_jobs = parallel_func(do_perm_func, n_jobs)
 
     # Step 2: If we have some clusters, repeat process on permuted data
     # -------------------------------------------------------------------
 
-    def get_progress_bar(seeds):
-        # make sure the progress bar adds to up 100% across n jobs
-        return (ProgressBar(len(seeds), spinner=True) if
-                logger.level <= logging.INFO else None)
+    def get_progress_bars(seeds, counts):
+        # the progress bar of each job shows the permutations of all jobs
+        if logger.level > logging.INFO:
+            return [None] * len(seeds)
+        n_total = sum(len(s) for s in seeds)
+        return [_PermutationProgress(counts, job, n_total)
+                for job in range(len(seeds))]
 
     if len(clusters) > 0:
         # check to see if we can do an exact test
@@ -803,47 +1153,80 @@ def _permutation_cluster_test(X, threshold, n_permutations, tail, stat_fun,
             else:
                 seeds = list(seed + np.arange(n_permutations))
 
-        # Step 3: repeat permutations for step-down-in-jumps procedure
-        n_removed = 1  # number of new clusters added
-        total_removed = 0
-        step_down_include = None  # start out including all points
-        n_step_downs = 0
-
-        while n_removed > 0:
-            # actually do the clustering for each partition
-            if include is not None:
-                if step_down_include is not None:
-                    this_include = np.logical_and(include, step_down_include)
+        with _SharedArrays(n_jobs) as shared:
+            # compute the statistics once, to reuse them in later calls
+            stats = None
+            if stat_cache_dir is not None:
+                if seeds[0] is None:
+                    warn('The statistics of the permutations are not cached '
+                         'when seed is None.')
+                elif _get_stat_fun_name(stat_fun) is None:
+                    warn('The statistics of the permutations are not cached '
+                         'for stat_fun %r, only for functions defined at the '
+                         'top level of a module and partials of them.'
+                         % (stat_fun,))
                 else:
-                    this_include = include
-            else:
-                this_include = step_down_include
-            logger.info('Permuting ...')
-            H0 = parallel(my_do_perm_func(X_full, slices, threshold, tail,
-                          connectivity, stat_fun, max_step, this_include,
-                          partitions, t_power, s, sample_shape, buffer_size,
-                          get_progress_bar(s))
-                          for s in split_list(seeds, n_jobs))
-            H0 = np.concatenate(H0)
-            logger.info('Computing cluster p-values')
-            cluster_pv = _pval_from_histogram(cluster_stats, H0, tail)
-
-            # figure out how many new ones will be removed for step-down
-            to_remove = np.where(cluster_pv < step_down_p)[0]
-            n_removed = to_remove.size - total_removed
-            total_removed = to_remove.size
-            step_down_include = np.ones(n_tests, dtype=bool)
-            for ti in to_remove:
-                step_down_include[clusters[ti]] = False
-            if connectivity is None:
-                step_down_include.shape = sample_shape
-            n_step_downs += 1
-            if step_down_p > 0:
-                a_text = 'additional ' if n_step_downs > 1 else ''
-                pl = '' if n_removed == 1 else 's'
-                logger.info('Step-down-in-jumps iteration #%i found %i %s'
-                            'cluster%s to exclude from subsequent iterations'
-                            % (n_step_downs, n_removed, a_text, pl))
+                    stats, rows = _get_cached_stats(
+                        stat_cache_dir, stat_cache_dtype, X_full, slices,
+                        stat_fun, seeds, buffer_size, shared)
+
+            # the data are written once for all jobs and step-down iterations
+            X_shared = shared.share(X_full if stats is None else stats)
+            partitions_shared = shared.share(partitions)
+            connectivity_shared = _share_connectivity(connectivity, shared)
+            counts = shared.share(np.zeros(n_jobs, np.int64), mode='r+')
+
+            # Step 3: repeat permutations for step-down-in-jumps procedure
+            n_removed = 1  # number of new clusters added
+            total_removed = 0
+            step_down_include = None  # start out including all points
+            n_step_downs = 0
+
+            while n_removed > 0:
+                # actually do the clustering for each partition
+                if include is not None:
+                    if step_down_include is not None:
+                        this_include = np.logical_and(include,
+                                                      step_down_include)
+                    else:
+                        this_include = include
+                else:
+                    this_include = step_down_include
+                logger.info('Permuting ...')
+                if stats is None:
+                    this_seeds = split_list(seeds, n_jobs)
+                    this_stat_fun = stat_fun
+                else:
+                    this_seeds, this_stat_fun = split_list(rows, n_jobs), None
+                this_seeds = list(this_seeds)
+                _get_shared(counts)[:] = 0
+                progress_bars = get_progress_bars(this_seeds, counts)
+                H0 = parallel(my_do_perm_func(
+                    X_shared, slices, threshold, tail, connectivity_shared,
+                    this_stat_fun, max_step, this_include, partitions_shared,
+                    t_power, s, sample_shape, buffer_size, p)
+                    for s, p in zip(this_seeds, progress_bars))
+                H0 = np.concatenate(H0)
+                logger.info('Computing cluster p-values')
+                cluster_pv = _pval_from_histogram(cluster_stats, H0, tail)
+
+                # figure out how many new ones will be removed for step-down
+                to_remove = np.where(cluster_pv < step_down_p)[0]
+                n_removed = to_remove.size - total_removed
+                total_removed = to_remove.size
+                step_down_include = np.ones(n_tests, dtype=bool)
+                for ti in to_remove:
+                    step_down_include[clusters[ti]] = False
+                if connectivity is None:
+                    step_down_include.shape = sample_shape
+                n_step_downs += 1
+                if step_down_p > 0:
+                    a_text = 'additional ' if n_step_downs > 1 else ''
+                    pl = '' if n_removed == 1 else 's'
+                    logger.info('Step-down-in-jumps iteration #%i found %i '
+                                '%scluster%s to exclude from subsequent '
+                                'iterations'
+                                % (n_step_downs, n_removed, a_text, pl))
         logger.info('Done.')
         # The clusters should have the same shape as the samples
         clusters = _reshape_clusters(clusters, sample_shape)
@@ -902,7 +1285,8 @@ def permutation_cluster_test(X, threshold=None, n_permutations=1024,
                              connectivity=None, verbose=None, n_jobs=1,
                              seed=None, max_step=1, exclude=None,
                              step_down_p=0, t_power=1, out_type='mask',
-                             check_disjoint=False, buffer_size=1000):
+                             check_disjoint=False, buffer_size=1000,
+                             stat_cache_dir=None, stat_cache_dtype=None):
     """Cluster-level statistical permutation test
 
     For a list of nd-arrays of data, e.g. 2d for time series or 3d for
@@ -936,7 +1320,8 @@ def permutation_cluster_test(X, threshold=None, n_permutations=1024,
         the distribution.
     stat_fun : callable
         function called to calculate statistics, must accept 1d-arrays as
-        arguments (default: scipy.stats.f_oneway).
+        arguments (default: scipy.stats.f_oneway). With the default, the
+        statistics of blocks of permutations are computed at once.
     connectivity : sparse matrix.
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -985,6 +1370,22 @@ def permutation_cluster_test(X, threshold=None, n_permutations=1024,
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+    stat_cache_dir : str | None
+        Directory in which to cache the statistics of the permutations, for
+        reuse by later calls with the same data, stat_fun and seed (e.g.,
+        with another threshold, tail or number of permutations). The
+        clusters are then formed from the cached statistics. If None
+        (default), the statistics are not cached. Requires seed to be set,
+        and stat_fun to be a function defined at the top level of a module
+        or a partial of one (e.g., not a lambda).
+
+        .. versionadded:: 0.12.0
+    stat_cache_dtype : dtype | None
+        The dtype used to cache the statistics, e.g. ``np.float32`` or
+        ``np.float16`` to save space at the cost of precision. If None
+        (default), float64 is used.
+
+        .. versionadded:: 0.12.0
 
     Returns
     -------
@@ -1025,7 +1426,9 @@ def permutation_cluster_test(X, threshold=None, n_permutations=1024,
                                      exclude=exclude, step_down_p=step_down_p,
                                      t_power=t_power, out_type=out_type,
                                      check_disjoint=check_disjoint,
-                                     buffer_size=buffer_size)
+                                     buffer_size=buffer_size,
+                                     stat_cache_dir=stat_cache_dir,
+                                     stat_cache_dtype=stat_cache_dtype)
 
 
 permutation_cluster_test.__test__ = False
@@ -1037,7 +1440,8 @@ def permutation_cluster_1samp_test(X, threshold=None, n_permutations=1024,
                                    connectivity=None, verbose=None, n_jobs=1,
                                    seed=None, max_step=1, exclude=None,
                                    step_down_p=0, t_power=1, out_type='mask',
-                                   check_disjoint=False, buffer_size=1000):
+                                   check_disjoint=False, buffer_size=1000,
+                                   stat_cache_dir=None, stat_cache_dtype=None):
     """Non-parametric cluster-level 1 sample T-test
 
     From a array of observations, e.g. signal amplitudes or power spectrum
@@ -1065,7 +1469,9 @@ def permutation_cluster_1samp_test(X, threshold=None, n_permutations=1024,
         If tail is 0, the statistic is thresholded on both sides of
         the distribution.
     stat_fun : function
-        Function used to compute the statistical map.
+        Function used to compute the statistical map. With the default
+        ttest_1samp_no_p, or a partial of it, the statistics of blocks of
+        sign flips are computed at once.
     connectivity : sparse matrix or None
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -1120,6 +1526,22 @@ def permutation_cluster_1samp_test(X, threshold=None, n_permutations=1024,
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+    stat_cache_dir : str | None
+        Directory in which to cache the statistics of the permutations, for
+        reuse by later calls with the same data, stat_fun and seed (e.g.,
+        with another threshold, tail or number of permutations). The
+        clusters are then formed from the cached statistics. If None
+        (default), the statistics are not cached. Requires seed to be set,
+        and stat_fun to be a function defined at the top level of a module
+        or a partial of one (e.g., not a lambda).
+
+        .. versionadded:: 0.12.0
+    stat_cache_dtype : dtype | None
+        The dtype used to cache the statistics, e.g. ``np.float32`` or
+        ``np.float16`` to save space at the cost of precision. If None
+        (default), float64 is used.
+
+        .. versionadded:: 0.12.0
 
     Returns
     -------
@@ -1162,7 +1584,9 @@ def permutation_cluster_1samp_test(X, threshold=None, n_permutations=1024,
                                      exclude=exclude, step_down_p=step_down_p,
                                      t_power=t_power, out_type=out_type,
                                      check_disjoint=check_disjoint,
-                                     buffer_size=buffer_size)
+                                     buffer_size=buffer_size,
+                                     stat_cache_dir=stat_cache_dir,
+                                     stat_cache_dtype=stat_cache_dtype)
 
 
 permutation_cluster_1samp_test.__test__ = False
@@ -1176,7 +1600,9 @@ def spatio_temporal_cluster_1samp_test(X, threshold=None,
                                        n_jobs=1, seed=None, max_step=1,
                                        spatial_exclude=None, step_down_p=0,
                                        t_power=1, out_type='indices',
-                                       check_disjoint=False, buffer_size=1000):
+                                       check_disjoint=False, buffer_size=1000,
+                                       stat_cache_dir=None,
+                                       stat_cache_dtype=None):
     """Non-parametric cluster-level 1 sample T-test for spatio-temporal data
 
     This function provides a convenient wrapper for data organized in the form
@@ -1199,7 +1625,9 @@ def spatio_temporal_cluster_1samp_test(X, threshold=None,
         If tail is 0, the statistic is thresholded on both sides of
         the distribution.
     stat_fun : function
-        Function used to compute the statistical map.
+        Function used to compute the statistical map. With the default
+        ttest_1samp_no_p, or a partial of it, the statistics of blocks of
+        sign flips are computed at once.
     connectivity : sparse matrix or None
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -1252,6 +1680,22 @@ def spatio_temporal_cluster_1samp_test(X, threshold=None,
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+    stat_cache_dir : str | None
+        Directory in which to cache the statistics of the permutations, for
+        reuse by later calls with the same data, stat_fun and seed (e.g.,
+        with another threshold, tail or number of permutations). The
+        clusters are then formed from the cached statistics. If None
+        (default), the statistics are not cached. Requires seed to be set,
+        and stat_fun to be a function defined at the top level of a module
+        or a partial of one (e.g., not a lambda).
+
+        .. versionadded:: 0.12.0
+    stat_cache_dtype : dtype | None
+        The dtype used to cache the statistics, e.g. ``np.float32`` or
+        ``np.float16`` to save space at the cost of precision. If None
+        (default), float64 is used.
+
+        .. versionadded:: 0.12.0
 
     Returns
     -------
@@ -1297,7 +1741,9 @@ def spatio_temporal_cluster_1samp_test(X, threshold=None,
                                          step_down_p=step_down_p,
                                          t_power=t_power, out_type=out_type,
                                          check_disjoint=check_disjoint,
-                                         buffer_size=buffer_size)
+                                         buffer_size=buffer_size,
+                                         stat_cache_dir=stat_cache_dir,
+                                         stat_cache_dtype=stat_cache_dtype)
     return out
 
 
@@ -1310,7 +1756,8 @@ def spatio_temporal_cluster_test(X, threshold=1.67, n_permutations=1024,
                                  connectivity=None, verbose=None, n_jobs=1,
                                  seed=None, max_step=1, spatial_exclude=None,
                                  step_down_p=0, t_power=1, out_type='indices',
-                                 check_disjoint=False, buffer_size=1000):
+                                 check_disjoint=False, buffer_size=1000,
+                                 stat_cache_dir=None, stat_cache_dtype=None):
     """Non-parametric cluster-level test for spatio-temporal data
 
     This function provides a convenient wrapper for data organized in the form
@@ -1328,7 +1775,8 @@ def spatio_temporal_cluster_test(X, threshold=1.67, n_permutations=1024,
         See permutation_cluster_test.
     stat_fun : function
         function called to calculate statistics, must accept 1d-arrays as
-        arguments (default: scipy.stats.f_oneway)
+        arguments (default: scipy.stats.f_oneway). With the default, the
+        statistics of blocks of permutations are computed at once.
     connectivity : sparse matrix or None
         Defines connectivity between features. The matrix is assumed to
         be symmetric and only the upper triangular half is used.
@@ -1375,6 +1823,22 @@ def spatio_temporal_cluster_test(X, threshold=1.67, n_permutations=1024,
         processes is enabled (see set_cache_dir()), as X will be shared
         between processes and each process only needs to allocate space
         for a small block of variables.
+    stat_cache_dir : str | None
+        Directory in which to cache the statistics of the permutations, for
+        reuse by later calls with the same data, stat_fun and seed (e.g.,
+        with another threshold, tail or number of permutations). The
+        clusters are then formed from the cached statistics. If None
+        (default), the statistics are not cached. Requires seed to be set,
+        and stat_fun to be a function defined at the top level of a module
+        or a partial of one (e.g., not a lambda).
+
+        .. versionadded:: 0.12.0
+    stat_cache_dtype : dtype | None
+        The dtype used to cache the statistics, e.g. ``np.float32`` or
+        ``np.float16`` to save space at the cost of precision. If None
+        (default), float64 is used.
+
+        .. versionadded:: 0.12.0
 
     Returns
     -------
@@ -1414,7 +1878,9 @@ def spatio_temporal_cluster_test(X, threshold=1.67, n_permutations=1024,
                                    exclude=exclude, step_down_p=step_down_p,
                                    t_power=t_power, out_type=out_type,
                                    check_disjoint=check_disjoint,
-                                   buffer_size=buffer_size)
+                                   buffer_size=buffer_size,
+                                   stat_cache_dir=stat_cache_dir,
+                                   stat_cache_dtype=stat_cache_dtype)
     return out
 
 
@@ -10,6 +10,8 @@ from string import ascii_uppercase
 
 from ..externals.six import string_types
 from ..fixes import matrix_rank
+from ..parallel import parallel_func
+from ..utils import _LRUCache
 
 # The following function is a rewriting of scipy.stats.f_oneway
 # Contrary to the scipy.stats.f_oneway implementation it does not
@@ -185,6 +187,43 @@ def _iter_contrasts(n_subjects, factor_levels, effect_picks):
         yield c_, df1, df2
 
 
+# contrasts of the effects, which are reused by f_mway_rm e.g. in the
+# permutations of cluster tests
+_contrast_cache = _LRUCache(2 ** 24)
+
+# bytes of the contrasted data of the blocks of observations of f_mway_rm
+_MWAY_BLOCK_BYTES = 2 ** 26
+
+
+def _get_contrasts(n_subjects, factor_levels, effect_picks):
+    """Helper to get the cached contrasts and degrees of freedom"""
+    key = (n_subjects, tuple(int(f) for f in factor_levels),
+           tuple(int(e) for e in effect_picks))
+    return _contrast_cache(key, lambda: list(_iter_contrasts(
+        n_subjects, factor_levels, effect_picks)))
+
+
+def _f_mway_rm_block(data, contrasts, correction):
+    """Aux function to get the f values and sphericity of observations"""
+    n_subjects = data.shape[0]
+    fvals, eps = list(), list()
+    for c_, df1, df2 in contrasts:
+        # contrasted data, shape (n_contrasts, n_subjects, n_obs)
+        y = np.tensordot(c_.T.astype(data.dtype), data, axes=(1, 1))
+        b = np.mean(y, axis=1)
+        ss = n_subjects * np.sum(b * b, axis=0)
+        mse = (np.sum(np.sum(y * y, axis=1), axis=0) - ss) / (df2 / df1)
+        fvals.append(ss / mse)
+        if correction:
+            # sample covariances, leave off "/ (y.shape[1] - 1)" norm because
+            # it falls out.
+            v = np.einsum('isk,jsk->ijk', y, y)
+            trace = np.einsum('iik->k', v)
+            eps.append(trace ** 2 / (df1 * np.sum(np.sum(v * v, axis=0),
+                                                  axis=0)))
+    return np.array(fvals), np.array(eps)
+
+
 def f_threshold_mway_rm(n_subjects, factor_levels, effects='A*B',
                         pvalue=0.05):
     """ Compute f-value thesholds for a two-way ANOVA
@@ -225,15 +264,15 @@ def f_threshold_mway_rm(n_subjects, factor_levels, effects='A*B',
     effect_picks, _ = _map_effects(len(factor_levels), effects)
 
     f_threshold = []
-    for _, df1, df2 in _iter_contrasts(n_subjects, factor_levels,
-                                       effect_picks):
+    for _, df1, df2 in _get_contrasts(n_subjects, factor_levels,
+                                      effect_picks):
         f_threshold.append(f(df1, df2).isf(pvalue))
 
     return f_threshold if len(f_threshold) > 1 else f_threshold[0]
 
 
 def f_mway_rm(data, factor_levels, effects='all', alpha=0.05,
-              correction=False, return_pvals=True):
+              correction=False, return_pvals=True, n_jobs=1):
     """M-way repeated measures ANOVA for fully balanced designs
 
     Parameters
@@ -249,7 +288,8 @@ def f_mway_rm(data, factor_levels, effects='all', alpha=0.05,
             subject k   2.45 7.90 3.09 4.76
 
         The last dimensions is thought to carry the observations
-        for mass univariate analysis.
+        for mass univariate analysis. If data is float32, the f values are
+        computed in single precision.
     factor_levels : list-like
         The number of levels per factor.
     effects : str | list
@@ -272,6 +312,10 @@ def f_mway_rm(data, factor_levels, effects='all', alpha=0.05,
         method will be applied.
     return_pvals : bool
         If True, return p values corresponding to f values.
+    n_jobs : int
+        Number of jobs to run in parallel over blocks of observations.
+
+        .. versionadded:: 0.12.0
 
     Returns
     -------
@@ -290,6 +334,12 @@ def f_mway_rm(data, factor_levels, effects='all', alpha=0.05,
     Notes
     -----
     .. versionadded:: 0.10
+
+    The observations are processed in blocks, so that the memory used does
+    not grow with the product of the number of observations and of
+    conditions. The contrasts of the effects are cached, so that calling
+    f_mway_rm as the ``stat_fun`` of a cluster test does not compute them
+    again for each permutation.
     """
     from scipy.stats import f
     if data.ndim == 2:  # general purpose support, e.g. behavioural data
@@ -299,37 +349,33 @@ def f_mway_rm(data, factor_levels, effects='all', alpha=0.05,
             data.shape[0], data.shape[1], np.prod(data.shape[2:]))
 
     effect_picks, _ = _map_effects(len(factor_levels), effects)
-    n_obs = data.shape[2]
-    n_replications = data.shape[0]
-
-    # put last axis in front to 'iterate' over mass univariate instances.
-    data = np.rollaxis(data, 2)
-    fvalues, pvalues = [], []
-    for c_, df1, df2 in _iter_contrasts(n_replications, factor_levels,
-                                        effect_picks):
-        y = np.dot(data, c_)
-        b = np.mean(y, axis=1)[:, np.newaxis, :]
-        ss = np.sum(np.sum(y * b, axis=2), axis=1)
-        mse = (np.sum(np.sum(y * y, axis=2), axis=1) - ss) / (df2 / df1)
-        fvals = ss / mse
-        fvalues.append(fvals)
-        if correction:
-            # sample covariances, leave off "/ (y.shape[1] - 1)" norm because
-            # it falls out.
-            v = np.array([np.dot(y_.T, y_) for y_ in y])
-            v = (np.array([np.trace(vv) for vv in v]) ** 2 /
-                 (df1 * np.sum(np.sum(v * v, axis=2), axis=1)))
-            eps = v
-
+    n_replications, n_conditions, n_obs = data.shape
+    if data.dtype != np.float32:
+        data = data.astype(np.float64, copy=False)
+    contrasts = _get_contrasts(n_replications, factor_levels, effect_picks)
+
+    parallel, p_fun, n_jobs = parallel_func(_f_mway_rm_block, n_jobs)
+    n_block = max(_MWAY_BLOCK_BYTES // (data.itemsize * n_replications *
+                                        n_conditions), 1)
+    n_block = min(n_block, -(-n_obs // n_jobs))
+    out = parallel(p_fun(data[:, :, start:start + n_block], contrasts,
+                         correction)
+                   for start in range(0, n_obs, n_block))
+    fvalues = np.concatenate([o[0] for o in out], axis=-1)
+    if correction:
+        eps = np.concatenate([o[1] for o in out], axis=-1)
+
+    pvalues = []
+    for ii, (_, df1, df2) in enumerate(contrasts):
         df1, df2 = np.zeros(n_obs) + df1, np.zeros(n_obs) + df2
         if correction:
             # numerical imprecision can cause eps=0.99999999999999989
             # even with a single category, so never let our degrees of
             # freedom drop below 1.
-            df1, df2 = [np.maximum(d[None, :] * eps, 1.) for d in (df1, df2)]
+            df1, df2 = [np.maximum(d * eps[ii], 1.) for d in (df1, df2)]
 
         if return_pvals:
-            pvals = f(df1, df2).sf(fvals)
+            pvals = f(df1, df2).sf(fvalues[ii])
         else:
             pvals = np.empty(0)
         pvalues.append(pvals)
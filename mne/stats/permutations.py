@@ -48,12 +48,41 @@ def bin_perm_rep(ndim, a=0, b=1):
     return perms
 
 
+# bytes of the t-values of the blocks of permutations and variables
+_PERM_BLOCK_BYTES = 2 ** 26
+_VAR_BLOCK_SIZE = 2 ** 12
+
+
+def _get_signs(perms, n_samples, dtype):
+    """Helper to get the sign flips of permutations
+
+    perms is either an array of signs, or of the indices of the exact
+    permutations, whose bits give the signs as in bin_perm_rep(a=1, b=-1).
+    """
+    if perms.ndim == 2:
+        return perms.astype(dtype)
+    bits = (perms[:, np.newaxis] >> np.arange(n_samples - 1, -1, -1)) & 1
+    return (1 - 2 * bits).astype(dtype)
+
+
 def _max_stat(X, X2, perms, dof_scaling):
     """Aux function for permutation_t_test (for parallel comp)"""
-    n_samples = len(X)
-    mus = np.dot(perms, X) / float(n_samples)
-    stds = np.sqrt(X2[None, :] - mus ** 2) * dof_scaling  # std with splitting
-    max_abs = np.max(np.abs(mus) / (stds / sqrt(n_samples)), axis=1)  # t-max
+    n_samples, n_tests = X.shape
+    n_vars = min(n_tests, _VAR_BLOCK_SIZE)
+    n_block = max(_PERM_BLOCK_BYTES // (X.itemsize * n_vars), 1)
+    max_abs = np.zeros(len(perms), X.dtype)
+    for start in range(0, len(perms), n_block):
+        signs = _get_signs(perms[start:start + n_block], n_samples, X.dtype)
+        signs /= n_samples
+        this_max = max_abs[start:start + n_block]
+        for pos in range(0, n_tests, n_vars):
+            mus = np.dot(signs, X[:, pos:pos + n_vars])
+            # std with splitting
+            stds = np.sqrt(np.maximum(X2[pos:pos + n_vars] - mus ** 2, 0))
+            stds *= dof_scaling / sqrt(n_samples)
+            np.abs(mus, out=mus)
+            mus /= stds
+            np.maximum(this_max, mus.max(axis=1), out=this_max)  # t-max
     return max_abs
 
 
@@ -75,7 +104,8 @@ def permutation_t_test(X, n_permutations=10000, tail=0, n_jobs=1,
     ----------
     X : array of shape [n_samples x n_tests]
         Data of size number of samples (aka number of observations) times
-        number of tests (aka number of variables).
+        number of tests (aka number of variables). If X is float32, the
+        test is computed in single precision.
     n_permutations : int or 'all'
         Number of permutations. If n_permutations is 'all' all possible
         permutations are tested (2**n_samples). It's the exact test, that
@@ -113,6 +143,10 @@ def permutation_t_test(X, n_permutations=10000, tail=0, n_jobs=1,
     Overview of standard nonparametric randomization and permutation
     testing applied to neuroimaging data (e.g. fMRI)
     DOI: http://dx.doi.org/10.1002/hbm.1058
+
+    The t-values are computed for blocks of permutations and variables at
+    once, so that the memory used does not grow with the product of
+    n_permutations and n_tests.
     """
     n_samples, n_tests = X.shape
 
@@ -121,6 +155,9 @@ def permutation_t_test(X, n_permutations=10000, tail=0, n_jobs=1,
         do_exact = True
         n_permutations = 2 ** n_samples - 1
 
+    # single precision data are tested in single precision
+    dtype = np.float32 if X.dtype == np.float32 else np.float64
+    X = np.asarray(X, dtype)
     X2 = np.mean(X ** 2, axis=0)  # precompute moments
     mu0 = np.mean(X, axis=0)
     dof_scaling = sqrt(n_samples / (n_samples - 1.0))
@@ -128,7 +165,8 @@ def permutation_t_test(X, n_permutations=10000, tail=0, n_jobs=1,
     T_obs = np.mean(X, axis=0) / (std0 / sqrt(n_samples))
 
     if do_exact:
-        perms = bin_perm_rep(n_samples, a=1, b=-1)[1:, :]
+        # the signs are computed in blocks, from the index of each permutation
+        perms = np.arange(1, 2 ** n_samples, dtype=np.int64)
     else:
         perms = np.sign(0.5 - np.random.rand(n_permutations, n_samples))
 
@@ -57,6 +57,10 @@ def linear_regression(inst, design_matrix, names=None):
         the original data was (n_observations, n_channels, n_timepoints),
         then the shape of each of the arrays will be
         (n_channels, n_timepoints).
+
+    See Also
+    --------
+    LinearModel : to test contrasts, or fit many data sets with one design.
     """
     if names is None:
         names = ['x%i' % i for i in range(design_matrix.shape[1])]
@@ -103,53 +107,220 @@ def linear_regression(inst, design_matrix, names=None):
     return lm_fits
 
 
-def _fit_lm(data, design_matrix, names):
-    """Aux function"""
+# bytes of the data of the targets fitted at once
+_LM_BLOCK_BYTES = 2 ** 26
+
+
+class LinearModel(object):
+    """Ordinary Least Squares regression (OLS) of many targets on a design
+
+    The pseudo-inverse of the design matrix and the unscaled covariance of
+    the regression coefficients are computed once, so that the same
+    instance can be used to fit the data of many subjects that share a
+    design. The targets (e.g., channels x times or vertices x times) are
+    fitted with matrix products over chunks of targets.
+
+    Parameters
+    ----------
+    design_matrix : ndarray, shape (n_observations, n_regressors)
+        The regressors to be used. The first column of this matrix will
+        typically consist of ones (intercept column).
+    names : list-like | None
+        Optional parameter to name the regressors. If provided, the length
+        must correspond to the number of columns present in regressors
+        (including the intercept, if present). Otherwise the default names
+        are x0, x1, x2...xn for n regressors.
+
+    Attributes
+    ----------
+    df : int
+        The degrees of freedom of the residuals.
+    beta_ : ndarray, shape (n_regressors, ...)
+        The regression coefficients of the last data fitted.
+    noise_var_ : ndarray
+        The variance of the residuals of the last data fitted, with the
+        shape of the data minus the first dimension.
+
+    Notes
+    -----
+    .. versionadded:: 0.12.0
+    """
+
+    def __init__(self, design_matrix, names=None):
+        design_matrix = np.asarray(design_matrix, np.float64)
+        if design_matrix.ndim != 2:
+            raise ValueError('Design matrix must be a 2d array')
+        n_rows, n_predictors = design_matrix.shape
+        if names is None:
+            names = ['x%i' % i for i in range(n_predictors)]
+        if n_predictors != len(names):
+            raise ValueError('Number of regressor names must be equal to '
+                             'number of column in design matrix')
+        self.design_matrix = design_matrix
+        self.names = list(names)
+        self.df = n_rows - n_predictors
+        # minimum norm solution of rank deficient designs, as with lstsq
+        u, s, vh = linalg.svd(design_matrix, full_matrices=False)
+        s_inv = np.zeros_like(s)
+        mask = s > s[0] * max(design_matrix.shape) * np.finfo(s.dtype).eps
+        s_inv[mask] = 1. / s[mask]
+        self._pinv = np.dot(vh.T * s_inv, u.T)
+        self._invcov = np.dot(vh.T * s_inv ** 2, vh)
+
+    def fit(self, data):
+        """Fit the design to data
+
+        Parameters
+        ----------
+        data : ndarray, shape (n_observations, ...)
+            The data, e.g. of shape (n_observations, n_channels, n_times).
+
+        Returns
+        -------
+        self : instance of LinearModel
+            The fitted model.
+        """
+        n_samples = len(data)
+        if n_samples != len(self.design_matrix):
+            raise ValueError('Number of rows in design matrix must be equal '
+                             'to number of observations')
+        y = np.reshape(data, (n_samples, -1))
+        n_features = y.shape[1]
+        beta = np.empty((len(self._pinv), n_features))
+        noise_var = np.empty(n_features)
+        n_block = max(_LM_BLOCK_BYTES // (8 * n_samples), 1)
+        for start in range(0, n_features, n_block):
+            sl = slice(start, start + n_block)
+            this_y = np.asarray(y[:, sl], np.float64)
+            beta[:, sl] = np.dot(self._pinv, this_y)
+            resid = this_y - np.dot(self.design_matrix, beta[:, sl])
+            noise_var[sl] = np.sum(resid * resid, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            noise_var /= self.df
+        self.beta_ = beta.reshape((len(beta),) + data.shape[1:])
+        self.noise_var_ = noise_var.reshape(data.shape[1:])
+        return self
+
+    def _get_contrast(self, contrast):
+        """Helper to get the weights of the regressors of contrasts"""
+        if isinstance(contrast, string_types):
+            contrast = [contrast]
+        if len(contrast) > 0 and all(isinstance(c, string_types)
+                                     for c in contrast):
+            for c in contrast:
+                if c not in self.names:
+                    raise ValueError('Regressor "%s" not in names %s'
+                                     % (c, self.names))
+            contrast = np.eye(len(self.names))[
+                [self.names.index(c) for c in contrast]]
+        contrast = np.atleast_2d(np.asarray(contrast, np.float64))
+        if contrast.ndim != 2 or contrast.shape[1] != len(self.names):
+            raise ValueError('contrast must have %d columns, got shape %s'
+                             % (len(self.names), contrast.shape))
+        if not hasattr(self, 'beta_'):
+            raise RuntimeError('The model must be fitted first')
+        return contrast
+
+    def t_test(self, contrast):
+        """Compute a t-test of a contrast of the regressors
+
+        Parameters
+        ----------
+        contrast : str | array, shape (n_regressors,)
+            The name of a regressor, or the weights of the regressors,
+            e.g. ``[0, 1, -1]`` to compare the second and third regressors.
+
+        Returns
+        -------
+        effect : ndarray
+            The contrast of the regression coefficients.
+        stderr : ndarray
+            The standard error of the effect.
+        t_val : ndarray
+            The t statistics (effect / stderr).
+        p_val : ndarray
+            The two-sided p-values of the t statistics under the t
+            distribution.
+        mlog10_p_val : ndarray
+            The -log10 transformed p-values.
+
+        The arrays have the shape of the data minus the first dimension.
+        """
+        contrast = self._get_contrast(contrast)
+        if len(contrast) != 1:
+            raise ValueError('A t-test needs a single contrast, use f_test '
+                             'for several contrasts')
+        contrast = contrast[0]
+        beta = self.beta_.reshape(len(self.beta_), -1)
+        effect = np.dot(contrast, beta).reshape(self.noise_var_.shape)
+        unscaled_stderr = np.sqrt(np.dot(contrast,
+                                         np.dot(self._invcov, contrast)))
+        stderr = np.sqrt(self.noise_var_) * unscaled_stderr
+        return (effect, stderr) + _t_stats(effect, stderr, self.df)
+
+    def f_test(self, contrast):
+        """Compute an F-test of contrasts of the regressors
+
+        Parameters
+        ----------
+        contrast : list of str | array, shape (n_contrasts, n_regressors)
+            The names of regressors, or the weights of the regressors of
+            each contrast. The null hypothesis is that all the contrasts
+            are zero.
+
+        Returns
+        -------
+        f_val : ndarray
+            The F statistics.
+        p_val : ndarray
+            The p-values of the F statistics under the F distribution.
+
+        The arrays have the shape of the data minus the first dimension.
+        """
+        from scipy import stats
+        contrast = self._get_contrast(contrast)
+        n_contrasts = len(contrast)
+        beta = self.beta_.reshape(len(self.beta_), -1)
+        effect = np.dot(contrast, beta)
+        cov = np.dot(contrast, np.dot(self._invcov, contrast.T))
+        ssq = np.sum(effect * np.dot(linalg.pinv(cov), effect), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            f_val = ssq.reshape(self.noise_var_.shape) / (n_contrasts *
+                                                          self.noise_var_)
+        p_val = stats.f.sf(f_val, n_contrasts, self.df)
+        return f_val, p_val
+
+
+def _t_stats(effect, stderr, df):
+    """Helper to get the t statistics and p-values of effects"""
     from scipy import stats
-    n_samples = len(data)
-    n_features = np.product(data.shape[1:])
-    if design_matrix.ndim != 2:
-        raise ValueError('Design matrix must be a 2d array')
-    n_rows, n_predictors = design_matrix.shape
-
-    if n_samples != n_rows:
-        raise ValueError('Number of rows in design matrix must be equal '
-                         'to number of observations')
-    if n_predictors != len(names):
-        raise ValueError('Number of regressor names must be equal to '
-                         'number of column in design matrix')
-
-    y = np.reshape(data, (n_samples, n_features))
-    betas, resid_sum_squares, _, _ = linalg.lstsq(a=design_matrix, b=y)
-
-    df = n_rows - n_predictors
-    sqrt_noise_var = np.sqrt(resid_sum_squares / df).reshape(data.shape[1:])
-    design_invcov = linalg.inv(np.dot(design_matrix.T, design_matrix))
-    unscaled_stderrs = np.sqrt(np.diag(design_invcov))
     tiny = np.finfo(np.float64).tiny
-    beta, stderr, t_val, p_val, mlog10_p_val = (dict() for _ in range(5))
-    for x, unscaled_stderr, predictor in zip(betas, unscaled_stderrs, names):
-        beta[predictor] = x.reshape(data.shape[1:])
-        stderr[predictor] = sqrt_noise_var * unscaled_stderr
-        p_val[predictor] = np.empty_like(stderr[predictor])
-        t_val[predictor] = np.empty_like(stderr[predictor])
-
-        stderr_pos = (stderr[predictor] > 0)
-        beta_pos = (beta[predictor] > 0)
-        t_val[predictor][stderr_pos] = (beta[predictor][stderr_pos] /
-                                        stderr[predictor][stderr_pos])
-        cdf = stats.t.cdf(np.abs(t_val[predictor][stderr_pos]), df)
-        p_val[predictor][stderr_pos] = np.clip((1. - cdf) * 2., tiny, 1.)
-        # degenerate cases
-        mask = (~stderr_pos & beta_pos)
-        t_val[predictor][mask] = np.inf * np.sign(beta[predictor][mask])
-        p_val[predictor][mask] = tiny
-        # could do NaN here, but hopefully this is safe enough
-        mask = (~stderr_pos & ~beta_pos)
-        t_val[predictor][mask] = 0
-        p_val[predictor][mask] = 1.
-        mlog10_p_val[predictor] = -np.log10(p_val[predictor])
+    p_val = np.empty_like(stderr)
+    t_val = np.empty_like(stderr)
+
+    stderr_pos = (stderr > 0)
+    effect_pos = (effect > 0)
+    t_val[stderr_pos] = effect[stderr_pos] / stderr[stderr_pos]
+    cdf = stats.t.cdf(np.abs(t_val[stderr_pos]), df)
+    p_val[stderr_pos] = np.clip((1. - cdf) * 2., tiny, 1.)
+    # degenerate cases
+    mask = (~stderr_pos & effect_pos)
+    t_val[mask] = np.inf * np.sign(effect[mask])
+    p_val[mask] = tiny
+    # could do NaN here, but hopefully this is safe enough
+    mask = (~stderr_pos & ~effect_pos)
+    t_val[mask] = 0
+    p_val[mask] = 1.
+    return t_val, p_val, -np.log10(p_val)
+
 
+def _fit_lm(data, design_matrix, names):
+    """Aux function"""
+    lm = LinearModel(design_matrix, names).fit(data)
+    beta, stderr, t_val, p_val, mlog10_p_val = (dict() for _ in range(5))
+    for predictor in names:
+        (beta[predictor], stderr[predictor], t_val[predictor],
+         p_val[predictor], mlog10_p_val[predictor]) = lm.t_test(predictor)
     return beta, stderr, t_val, p_val, mlog10_p_val
 
 
@@ -228,8 +399,21 @@ def linear_regression_raw(raw, events, event_id=None, tmin=-.1, tmax=1,
     solver : str | function
         Either a function which takes as its inputs the sparse predictor
         matrix X and the observation matrix Y, and returns the coefficient
-        matrix b; or a string. If str, must be ``'cholesky'``, in which case
-        the solver used is ``linalg.solve(dot(X.T, X), dot(X.T, y))``.
+        matrix b; or a string. If str, must be one of:
+
+            - ``'cholesky'``: the solver used is
+              ``linalg.solve(dot(X.T, X), dot(X.T, y))``, with ``dot(X.T, X)``
+              made dense.
+            - ``'sparse'``: ``dot(X.T, X)`` is kept sparse and factorized
+              once with :func:`scipy.sparse.linalg.splu`, to solve for all
+              channels at once. Use it when there are many predictors
+              (e.g., long time windows or many event types).
+            - ``'lsqr'``: the least squares problem of each channel is solved
+              iteratively with :func:`scipy.sparse.linalg.lsqr`, without
+              forming ``dot(X.T, X)``.
+
+        .. versionadded:: 0.12.0
+           The ``'sparse'`` and ``'lsqr'`` solvers.
 
     Returns
     -------
@@ -246,14 +430,9 @@ def linear_regression_raw(raw, events, event_id=None, tmin=-.1, tmax=1,
     """
 
     if isinstance(solver, string_types):
-        if solver == 'cholesky':
-            def solver(X, y):
-                a = (X.T * X).toarray()  # dot product of sparse matrices
-                return linalg.solve(a, X.T * y.T, sym_pos=True,
-                                    overwrite_a=True, overwrite_b=True).T
-
-        else:
+        if solver not in _rerp_solvers:
             raise ValueError("No such solver: {0}".format(solver))
+        solver = _rerp_solvers[solver]
 
     # build data
     data, info, events = _prepare_rerp_data(raw, events, picks=picks,
@@ -276,6 +455,35 @@ def linear_regression_raw(raw, events, event_id=None, tmin=-.1, tmax=1,
     return evokeds
 
 
+def _solve_cholesky(X, y):
+    """Solve the normal equations with a dense Cholesky decomposition"""
+    a = (X.T * X).toarray()  # dot product of sparse matrices
+    return linalg.solve(a, X.T * y.T, sym_pos=True, overwrite_a=True,
+                        overwrite_b=True).T
+
+
+def _solve_sparse(X, y):
+    """Solve the normal equations with a sparse LU decomposition"""
+    from scipy.sparse.linalg import splu
+    a = (X.T * X).tocsc()
+    return splu(a).solve(np.asarray(X.T * y.T)).T
+
+
+def _solve_lsqr(X, y):
+    """Solve the least squares problem of each channel with LSQR"""
+    from scipy.sparse.linalg import lsqr
+    X = X.tocsr()
+    return np.array([lsqr(X, this_y, atol=1e-10, btol=1e-10)[0]
+                     for this_y in y])
+
+
+_rerp_solvers = dict(cholesky=_solve_cholesky, sparse=_solve_sparse,
+                     lsqr=_solve_lsqr)
+
+# bytes of raw data read at once for linear_regression_raw
+_RERP_BLOCK_BYTES = 2 ** 26
+
+
 def _prepare_rerp_data(raw, events, picks=None, decim=1):
     """Prepare events and data, primarily for `linear_regression_raw`. See
     there for an explanation of parameters and output."""
@@ -284,8 +492,14 @@ def _prepare_rerp_data(raw, events, picks=None, decim=1):
     info = pick_info(raw.info, picks)
     decim = int(decim)
     info["sfreq"] /= decim
-    data, times = raw[:]
-    data = data[picks, ::decim]
+    # only the picked and decimated data are kept, reading chunks of raw
+    n_times = len(raw.times)
+    data = np.empty((len(picks), (n_times + decim - 1) // decim))
+    n_chunk = max(_RERP_BLOCK_BYTES // (8 * len(picks) * decim), 1) * decim
+    for start in range(0, n_times, n_chunk):
+        stop = min(start + n_chunk, n_times)
+        data[:, start // decim:(stop + decim - 1) // decim] = \
+            raw[picks, start:stop][0][:, ::decim]
     if len(set(events[:, 0])) < len(events[:, 0]):
         raise ValueError("`events` contains duplicate time points. Make "
                          "sure all entries in the first column of `events` "
@@ -6,13 +6,17 @@ from nose.tools import assert_true, assert_raises
 from scipy import sparse, linalg, stats
 from mne.fixes import partial
 import warnings
-from mne.parallel import _force_serial
+from mne.parallel import _force_serial, _SharedArrays, _get_shared
 from mne.stats.cluster_level import (permutation_cluster_test,
                                      permutation_cluster_1samp_test,
                                      spatio_temporal_cluster_test,
                                      spatio_temporal_cluster_1samp_test,
-                                     ttest_1samp_no_p, summarize_clusters_stc)
-from mne.utils import run_tests_if_main, slow_test, _TempDir, catch_logging
+                                     ttest_1samp_no_p, summarize_clusters_stc,
+                                     _get_clusters_st, _setup_connectivity,
+                                     _find_clusters, _share_connectivity,
+                                     _get_shared_connectivity)
+from mne.utils import (run_tests_if_main, slow_test, _TempDir, catch_logging,
+                       requires_version)
 
 warnings.simplefilter('always')  # enable b/c these tests throw warnings
 
@@ -43,6 +47,71 @@ def _get_conditions():
     return condition1_1d, condition2_1d, condition1_2d, condition2_2d
 
 
+def test_get_clusters_st():
+    """Test spatio-temporal cluster labeling
+    """
+    from scipy.sparse.csgraph import connected_components
+    rng = np.random.RandomState(0)
+    n_times, n_src = 30, 40
+    spatial = sparse.random(n_src, n_src, density=0.05, random_state=rng)
+    spatial = (spatial + spatial.T).tocsr()
+    connectivity = _setup_connectivity(spatial, n_times * n_src, n_times)
+    for max_step in (1, 2):
+        temporal = sum(sparse.eye(n_times, n_times, step)
+                       for step in range(-max_step, max_step + 1))
+        graph = sparse.kron(temporal, sparse.eye(n_src)) + \
+            sparse.kron(sparse.eye(n_times), spatial)
+        for p in (0.2, 0.5, 0.8):
+            x_in = rng.rand(n_times * n_src) < p
+            idx = np.where(x_in)[0]
+            _, labels = connected_components(graph.tocsr()[idx][:, idx])
+            clusters_ref = sorted([idx[labels == label]
+                                   for label in np.unique(labels)],
+                                  key=lambda c: c[0])
+            clusters = _get_clusters_st(x_in, connectivity, max_step)
+            # clusters are sorted and ordered by their first point
+            assert_equal(len(clusters), len(clusters_ref))
+            for c, c_ref in zip(clusters, clusters_ref):
+                assert_array_equal(c, c_ref)
+    assert_equal(_get_clusters_st(np.zeros(n_times * n_src, bool),
+                                  connectivity), [])
+
+
+def test_tfce():
+    """Test TFCE scores against clustering at each threshold
+    """
+    rng = np.random.RandomState(0)
+    n_times, n_src = 10, 30
+    spatial = sparse.random(n_src, n_src, density=0.1, random_state=rng)
+    connectivity = _setup_connectivity(spatial + spatial.T, n_times * n_src,
+                                       n_times)
+    x = rng.randn(n_times, n_src) * 2
+    include = rng.rand(n_times, n_src) > 0.1
+    for tail in (0, 1):
+        threshold = dict(start=0.2, step=0.3, h_power=1.5, e_power=0.8)
+        thresholds = np.arange(0.2, np.abs(x).max(), 0.3)
+        for conn, max_step in ((None, 1), (connectivity, 1),
+                               (connectivity, 2)):
+            x_use = x if conn is None else x.ravel()
+            include_use = include if conn is None else include.ravel()
+            scores = _find_clusters(x_use, threshold, tail, conn, max_step,
+                                    include_use)[1]
+            scores_ref = np.zeros(x.size)
+            for ti, thresh in enumerate(thresholds):
+                h = thresh if ti == 0 else thresh - thresholds[ti - 1]
+                clusters = _find_clusters(x_use, thresh, tail, conn, max_step,
+                                          include_use)[0]
+                for c in clusters:
+                    c = np.where(c.ravel())[0] if c.dtype == bool else c
+                    scores_ref[c] += h ** 1.5 * len(c) ** 0.8
+            assert_array_almost_equal(scores, scores_ref)
+    # 1D data are a chain
+    scores = _find_clusters(x[0], threshold, 1)[1]
+    assert_array_almost_equal(scores,
+                              _find_clusters(x[:1], threshold, 1)[1])
+    assert_true(np.max(scores) > 0)
+
+
 def test_cache_dir():
     """Test use of cache dir
     """
@@ -137,6 +206,210 @@ def test_cluster_permutation_test():
         assert_array_equal(cluster_p_values, cluster_p_values_buff)
 
 
+def test_cluster_permutation_batched():
+    """Test surrogate statistics of built-in stat_fun computed in blocks
+    """
+    from mne.stats import cluster_level
+    from mne.stats.parametric import f_oneway
+    condition1, condition2 = _get_conditions()[:2]
+    block_bytes = cluster_level._PERM_BLOCK_BYTES
+    # a few permutations per block
+    cluster_level._PERM_BLOCK_BYTES = 7 * 8 * n_space
+    try:
+        for stat_fun in (ttest_1samp_no_p,
+                         partial(ttest_1samp_no_p, sigma=1e-1)):
+            H0 = permutation_cluster_1samp_test(
+                condition1, n_permutations=50, seed=1, stat_fun=stat_fun)[3]
+            H0_ref = permutation_cluster_1samp_test(
+                condition1, n_permutations=50, seed=1,
+                stat_fun=lambda X: stat_fun(X))[3]
+            assert_array_almost_equal(H0, H0_ref, 10)
+        # exact test
+        H0 = permutation_cluster_1samp_test(condition1[:8], seed=1)[3]
+        H0_ref = permutation_cluster_1samp_test(
+            condition1[:8], seed=1, stat_fun=lambda X: ttest_1samp_no_p(X))[3]
+        assert_equal(len(H0), 2 ** 7 - 1)
+        assert_array_almost_equal(H0, H0_ref, 10)
+        X = [condition1, condition2, condition1[:5] * 2]
+        H0 = permutation_cluster_test(X, n_permutations=50, seed=1)[3]
+        H0_ref = permutation_cluster_test(
+            X, n_permutations=50, seed=1,
+            stat_fun=lambda *args: f_oneway(*args))[3]
+        assert_array_almost_equal(H0, H0_ref, 10)
+    finally:
+        cluster_level._PERM_BLOCK_BYTES = block_bytes
+
+
+def test_cluster_permutation_cache():
+    """Test caching the statistics of the permutations
+    """
+    tempdir = _TempDir()
+    condition1, condition2 = _get_conditions()[:2]
+    for X, func in ((condition1, permutation_cluster_1samp_test),
+                    ([condition1, condition2], permutation_cluster_test)):
+        H0 = func(X, n_permutations=20, seed=1, step_down_p=0.05)[3]
+        with catch_logging() as log_file:
+            H0_cache = func(X, n_permutations=20, seed=1, step_down_p=0.05,
+                            stat_cache_dir=tempdir, verbose=True)[3]
+        assert_true('statistics of 20 permutations' in log_file.getvalue())
+        assert_array_almost_equal(H0_cache, H0, 10)
+        # other threshold and tail, fewer permutations
+        H0 = func(X, threshold=4., tail=1, n_permutations=10, seed=1)[3]
+        with catch_logging() as log_file:
+            H0_cache = func(X, threshold=4., tail=1, n_permutations=10,
+                            seed=1, stat_cache_dir=tempdir, verbose=True)[3]
+        assert_true('Using the cached' in log_file.getvalue())
+        assert_array_almost_equal(H0_cache, H0, 10)
+        # more permutations
+        H0 = func(X, n_permutations=30, seed=1)[3]
+        with catch_logging() as log_file:
+            H0_cache = func(X, n_permutations=30, seed=1,
+                            stat_cache_dir=tempdir, verbose=True)[3]
+        assert_true('statistics of 10 permutations' in log_file.getvalue())
+        assert_array_almost_equal(H0_cache, H0, 10)
+        # other data
+        with catch_logging() as log_file:
+            func([x[:, ::-1] for x in X] if isinstance(X, list) else 2 * X,
+                 n_permutations=10, seed=1, stat_cache_dir=tempdir,
+                 verbose=True)
+        assert_true('statistics of 10 permutations' in log_file.getvalue())
+        H0_cache = func(X, n_permutations=30, seed=1, stat_cache_dir=tempdir,
+                        stat_cache_dtype=np.float16)[3]
+        assert_true(np.allclose(H0_cache, H0, rtol=1e-2))
+    # exact test
+    H0 = permutation_cluster_1samp_test(condition1[:6])[3]
+    H0_cache = permutation_cluster_1samp_test(condition1[:6],
+                                              stat_cache_dir=tempdir)[3]
+    assert_array_almost_equal(H0_cache, H0, 10)
+    with warnings.catch_warnings(record=True) as w:
+        permutation_cluster_1samp_test(condition1, n_permutations=5,
+                                       stat_cache_dir=tempdir)
+    assert_true(any('not cached' in str(ww.message) for ww in w))
+    # lambdas with the same name must not share cached statistics
+    stat_funs = (lambda X: ttest_1samp_no_p(X),
+                 lambda X: ttest_1samp_no_p(X, sigma=0.5))
+    for stat_fun in stat_funs:
+        H0 = permutation_cluster_1samp_test(condition1, n_permutations=10,
+                                            seed=1, stat_fun=stat_fun)[3]
+        with warnings.catch_warnings(record=True) as w:
+            H0_cache = permutation_cluster_1samp_test(
+                condition1, n_permutations=10, seed=1, stat_fun=stat_fun,
+                stat_cache_dir=tempdir)[3]
+        assert_true(any('not cached' in str(ww.message) for ww in w))
+        assert_array_almost_equal(H0_cache, H0, 10)
+    H0_cache = permutation_cluster_1samp_test(
+        condition1, n_permutations=10, seed=1, stat_cache_dir=tempdir,
+        stat_fun=partial(ttest_1samp_no_p, sigma=0.5))[3]
+    assert_array_almost_equal(H0_cache, H0, 10)
+
+    # interrupted between the updates of the statistics and of the seeds
+    tempdir = _TempDir()
+    permutation_cluster_1samp_test(condition1, n_permutations=20, seed=1,
+                                   stat_cache_dir=tempdir)
+    fname_seeds = [os.path.join(tempdir, f) for f in os.listdir(tempdir)
+                   if f.endswith('-seeds.npy')]
+    assert_equal(len(fname_seeds), 1)
+    np.save(fname_seeds[0], np.load(fname_seeds[0])[:10])
+    H0 = permutation_cluster_1samp_test(condition1, n_permutations=30,
+                                        seed=1)[3]
+    H0_cache = permutation_cluster_1samp_test(
+        condition1, n_permutations=30, seed=1, stat_cache_dir=tempdir)[3]
+    assert_array_almost_equal(H0_cache, H0, 10)
+    assert_equal(sorted(os.listdir(tempdir)),
+                 sorted(os.path.basename(fname_seeds[0][:-10] + ext)
+                        for ext in ('.npy', '-seeds.npy')))
+
+
+def test_shared_arrays():
+    """Test sharing arrays and connectivity with parallel jobs
+    """
+    tempdir = _TempDir()
+    rng = np.random.RandomState(0)
+    x = rng.randn(5, 4)
+    fname = os.path.join(tempdir, 'x.npy')
+    np.save(fname, x)
+    x_mmap = np.load(fname, mmap_mode='r')
+    conn = sparse.random(10, 10, density=0.3, random_state=0).tocoo()
+    conn_list = _setup_connectivity(conn.tocsr(), 20, 2)
+    with _SharedArrays(1) as shared:
+        assert_true(shared.share(x) is x)
+        assert_true(_share_connectivity(conn, shared) is conn)
+    with _SharedArrays(2) as shared:
+        handle = shared.share(x)
+        assert_true(shared.share(x) is handle)
+        assert_array_equal(_get_shared(handle), x)
+        assert_equal(shared.share(x_mmap).fname, fname)
+        assert_true(shared.share(None) is None)
+        counts = _get_shared(shared.share(np.zeros(2), mode='r+'))
+        counts[1] = 3
+        assert_equal(counts.sum(), 3)
+        conn_shared = _get_shared_connectivity(_share_connectivity(conn,
+                                                                   shared))
+        assert_array_equal(conn_shared.toarray(), conn.toarray())
+        conn_shared = _get_shared_connectivity(
+            _share_connectivity(conn_list, shared))
+        assert_equal(len(conn_shared), len(conn_list))
+        for c1, c2 in zip(conn_shared, conn_list):
+            assert_array_equal(c1, c2)
+        shared_dir = shared._dir
+        assert_true(os.path.isdir(shared_dir))
+    assert_true(not os.path.isdir(shared_dir))
+    assert_array_equal(_get_shared(x), x)
+    # the files are removed after an error
+    try:
+        with _SharedArrays(2) as shared:
+            shared.share(x)
+            shared_dir = shared._dir
+            assert_true(os.path.isdir(shared_dir))
+            raise RuntimeError('error in the jobs')
+    except RuntimeError:
+        pass
+    assert_true(not os.path.isdir(shared_dir))
+
+
+@requires_version('joblib', '0.8')
+def test_shared_arrays_parallel():
+    """Test permutations with arrays shared with parallel jobs
+    """
+    tempdir = _TempDir()
+
+    # the files are removed after an error in the permutations
+    def stat_fun(X):
+        calls.append(None)
+        if len(calls) > 1:
+            raise RuntimeError('permutation error')
+        return ttest_1samp_no_p(X)
+
+    calls = list()
+    cache_dir = os.environ.get('MNE_CACHE_DIR')
+    os.environ['MNE_CACHE_DIR'] = tempdir
+    try:
+        assert_raises(RuntimeError, permutation_cluster_1samp_test,
+                      _get_conditions()[0], n_permutations=10,
+                      stat_fun=stat_fun, n_jobs=2, buffer_size=None)
+    finally:
+        if cache_dir is None:
+            del os.environ['MNE_CACHE_DIR']
+        else:
+            os.environ['MNE_CACHE_DIR'] = cache_dir
+    assert_true(not any(f.startswith('mne-shared-')
+                        for f in os.listdir(tempdir)))
+    assert_equal(len(calls), 1)  # the permutations ran in other processes
+
+    # same results with parallel jobs
+    condition1, condition2 = [c.reshape(len(c), 10, 5)
+                              for c in _get_conditions()[:2]]
+    conn = sparse.eye(5, k=1) + sparse.eye(5, k=-1)
+    for func, X in ((spatio_temporal_cluster_1samp_test, condition1),
+                    (spatio_temporal_cluster_test, [condition1, condition2])):
+        out = func(X, n_permutations=20, seed=0, connectivity=conn,
+                   step_down_p=0.05)
+        out_par = func(X, n_permutations=20, seed=0, connectivity=conn,
+                       step_down_p=0.05, n_jobs=2)
+        assert_array_equal(out_par[2], out[2])
+        assert_array_equal(out_par[3], out[3])
+
+
 @slow_test
 def test_cluster_permutation_t_test():
     """Test cluster level permutations T-test
@@ -1,8 +1,9 @@
 from itertools import product
+from mne.stats import parametric
 from mne.stats.parametric import (f_mway_rm, f_threshold_mway_rm,
                                   _map_effects)
-from nose.tools import assert_raises, assert_true
-from numpy.testing import assert_array_almost_equal
+from nose.tools import assert_raises, assert_true, assert_equal
+from numpy.testing import assert_array_almost_equal, assert_allclose
 
 import numpy as np
 
@@ -110,3 +111,33 @@ def test_f_twoway_rm():
 
     fvals, _ = f_mway_rm(test_data, [8], 'A')
     assert_array_almost_equal(fvals, test_external['r_fvals_1way'], 5)
+
+
+def test_f_mway_rm_blocks():
+    """Test mass univariate repeated measures ANOVA in blocks of observations
+    """
+    rng = np.random.RandomState(0)
+    data = rng.randn(10, 6, 50)
+    parametric._contrast_cache.clear()
+    fvals, pvals = f_mway_rm(data, [3, 2], correction=True)
+    assert_equal(len(parametric._contrast_cache), 1)
+    assert_equal(fvals.shape, (3, 50))
+    for ii in range(50):
+        fvals_obs, pvals_obs = f_mway_rm(data[:, :, ii], [3, 2],
+                                         correction=True)
+        assert_allclose(fvals[:, ii], fvals_obs, rtol=1e-10)
+        assert_allclose(pvals[:, ii], pvals_obs, rtol=1e-10)
+    assert_equal(len(parametric._contrast_cache), 1)
+    block_bytes = parametric._MWAY_BLOCK_BYTES
+    try:
+        parametric._MWAY_BLOCK_BYTES = 1000
+        fvals_block, pvals_block = f_mway_rm(data, [3, 2], correction=True,
+                                             n_jobs=2)
+    finally:
+        parametric._MWAY_BLOCK_BYTES = block_bytes
+    assert_allclose(fvals_block, fvals, rtol=1e-10)
+    assert_allclose(pvals_block, pvals, rtol=1e-10)
+    fvals_32 = f_mway_rm(data.astype(np.float32), [3, 2],
+                         return_pvals=False)[0]
+    assert_equal(fvals_32.dtype, np.float32)
+    assert_allclose(fvals_32, fvals, rtol=1e-4)
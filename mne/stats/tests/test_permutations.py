@@ -1,8 +1,11 @@
 import numpy as np
-from numpy.testing import assert_array_equal, assert_almost_equal
+from numpy.testing import (assert_array_equal, assert_almost_equal,
+                           assert_allclose)
+from nose.tools import assert_equal
 from scipy import stats
 
-from mne.stats.permutations import permutation_t_test
+from mne.stats import permutations
+from mne.stats.permutations import permutation_t_test, bin_perm_rep
 
 
 def test_permutation_t_test():
@@ -31,3 +34,33 @@ def test_permutation_t_test():
     T_obs_scipy, p_values_scipy = stats.ttest_1samp(X[:, 0], 0)
     assert_almost_equal(T_obs[0], T_obs_scipy, 8)
     assert_almost_equal(p_values[0], p_values_scipy, 2)
+
+
+def test_permutation_t_test_blocks():
+    """Test T-test based on permutations computed in blocks
+    """
+    rng = np.random.RandomState(0)
+    X = rng.randn(10, 30)
+    signs = bin_perm_rep(10, a=1, b=-1)[1:]
+    mus = np.dot(signs, X) / 10.
+    stds = np.sqrt(np.mean(X ** 2, axis=0) - mus ** 2) * np.sqrt(10 / 9.)
+    H0_ref = np.sort(np.max(np.abs(mus) / (stds / np.sqrt(10)), axis=1))
+    H0 = permutation_t_test(X, n_permutations='all')[2]
+    assert_allclose(H0, H0_ref, rtol=1e-12)
+    block_bytes = permutations._PERM_BLOCK_BYTES
+    var_block_size = permutations._VAR_BLOCK_SIZE
+    try:
+        permutations._PERM_BLOCK_BYTES = 1000
+        permutations._VAR_BLOCK_SIZE = 7
+        T_obs, p_values, H0 = permutation_t_test(X, n_permutations='all',
+                                                 n_jobs=2)
+        assert_allclose(H0, H0_ref, rtol=1e-12)
+        T_obs_32, p_values_32, H0_32 = permutation_t_test(
+            X.astype(np.float32), n_permutations='all')
+    finally:
+        permutations._PERM_BLOCK_BYTES = block_bytes
+        permutations._VAR_BLOCK_SIZE = var_block_size
+    assert_equal(H0_32.dtype, np.float32)
+    assert_allclose(H0_32, H0, rtol=1e-4)
+    assert_allclose(T_obs_32, T_obs, rtol=1e-4)
+    assert_allclose(p_values_32, p_values, atol=0.01)
@@ -17,7 +17,9 @@ from nose.tools import assert_raises, assert_true, assert_equal
 import mne
 from mne import read_source_estimate
 from mne.datasets import testing
-from mne.stats.regression import linear_regression, linear_regression_raw
+from mne.stats import regression
+from mne.stats.regression import (linear_regression, linear_regression_raw,
+                                  LinearModel)
 from mne.io import RawArray
 
 warnings.simplefilter('always')
@@ -85,6 +87,53 @@ def test_regression():
             assert_array_equal(v1.data, v2.data)
 
 
+def test_linear_model():
+    """Test the OLS engine with contrasts and F-tests
+    """
+    rng = np.random.RandomState(0)
+    design_matrix = np.c_[np.ones(20), rng.randn(20, 2)]
+    data = rng.randn(20, 3, 4)
+    data[:, 0] += 2 * design_matrix[:, 1:2]
+    lm = LinearModel(design_matrix, ['intercept', 'a', 'b'])
+    assert_raises(RuntimeError, lm.t_test, 'a')
+    assert_raises(ValueError, lm.fit, data[:10])
+    assert_true(lm.fit(data) is lm)
+    assert_equal(lm.df, 17)
+    assert_equal(lm.beta_.shape, (3, 3, 4))
+    assert_equal(lm.noise_var_.shape, (3, 4))
+    beta = np.linalg.lstsq(design_matrix, data.reshape(20, -1))[0]
+    assert_allclose(lm.beta_.reshape(3, -1), beta, rtol=1e-10)
+    resid = data.reshape(20, -1) - np.dot(design_matrix, beta)
+    assert_allclose(lm.noise_var_.ravel(), np.sum(resid ** 2, axis=0) / 17.,
+                    rtol=1e-10)
+
+    # contrasts and F-tests
+    effect, stderr, t_val, p_val, mlog10_p_val = lm.t_test([0, 1, -1])
+    assert_allclose(effect, lm.beta_[1] - lm.beta_[2], rtol=1e-10)
+    assert_allclose(mlog10_p_val, -np.log10(p_val))
+    assert_true((p_val[0] < 0.001).all())
+    t_val_a, p_val_a = lm.t_test('a')[2:4]
+    f_val, f_p_val = lm.f_test('a')
+    assert_allclose(f_val, t_val_a ** 2, rtol=1e-10)
+    assert_allclose(f_p_val, p_val_a, rtol=1e-6)
+    f_val, f_p_val = lm.f_test(['a', 'b'])
+    assert_allclose(f_val, lm.f_test([[0, 1, 0], [0, 0, 1]])[0])
+    assert_true((f_p_val[0] < 0.001).all())
+    assert_raises(ValueError, lm.t_test, ['a', 'b'])
+    assert_raises(ValueError, lm.t_test, 'c')
+    assert_raises(ValueError, lm.f_test, [[1, 0]])
+
+    # one design for several data sets
+    data_2 = rng.randn(20, 3, 4)
+    lm.fit(data_2)
+    assert_allclose(
+        lm.beta_.reshape(3, -1),
+        np.linalg.lstsq(design_matrix, data_2.reshape(20, -1))[0],
+        rtol=1e-10)
+    assert_raises(ValueError, LinearModel, design_matrix, ['a'])
+    assert_raises(ValueError, LinearModel, design_matrix[0])
+
+
 @testing.requires_testing_data
 def test_continuous_regression_no_overlap():
     """Test regression without overlap correction, on real data"""
@@ -136,3 +185,41 @@ def test_continuous_regression_with_overlap():
     assert_allclose(effect,
                     linear_regression_raw(raw, events, {1: 1}, tmin=0)[1]
                     .data.flatten())
+
+
+def test_continuous_regression_solvers():
+    """Test the solvers of regression with overlap correction"""
+    rng = np.random.RandomState(0)
+    events = np.zeros((40, 3), int)
+    events[:, 0] = np.sort(rng.permutation(np.arange(10, 4900, 7))[:40])
+    events[:, 2] = rng.randint(1, 3, 40)
+    effects = [hann(31), -np.arange(31) / 30.]
+    data = rng.randn(3, 5000) * 0.1
+    for ev in events:
+        data[:, ev[0]:ev[0] + 31] += effects[ev[2] - 1]
+    raw = RawArray(data, mne.create_info(3, 100., 'eeg'))
+    event_id = dict(a=1, b=2)
+    evokeds = linear_regression_raw(raw, events, event_id, tmin=0, tmax=0.3)
+    for cond, effect in zip(['a', 'b'], effects):
+        assert_allclose(evokeds[cond].data, np.tile(effect, (3, 1)),
+                        atol=0.1)
+    for solver in ('sparse', 'lsqr'):
+        evokeds_solver = linear_regression_raw(raw, events, event_id, tmin=0,
+                                               tmax=0.3, solver=solver)
+        for cond in event_id:
+            assert_allclose(evokeds_solver[cond].data, evokeds[cond].data,
+                            rtol=1e-6, atol=1e-8)
+    assert_raises(ValueError, linear_regression_raw, raw, events, event_id,
+                  solver='foo')
+
+    # read the data of raw in chunks
+    block_bytes = regression._RERP_BLOCK_BYTES
+    evokeds = linear_regression_raw(raw, events, event_id, decim=3)
+    try:
+        regression._RERP_BLOCK_BYTES = 1000
+        evokeds_chunks = linear_regression_raw(raw, events, event_id,
+                                               decim=3)
+    finally:
+        regression._RERP_BLOCK_BYTES = block_bytes
+    for cond in event_id:
+        assert_array_equal(evokeds_chunks[cond].data, evokeds[cond].data)
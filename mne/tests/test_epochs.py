@@ -1175,6 +1175,10 @@ def test_detrend():
     # Due to roundoff these won't be exactly equal, but they should be close
     assert_true(np.allclose(evoked_1.data, evoked_2.data,
                             rtol=1e-8, atol=1e-20))
+    # NumPy integer orders
+    epochs_3 = Epochs(raw, events[:4], event_id, tmin, tmax, picks=picks,
+                      baseline=None, detrend=np.int64(1), preload=True)
+    assert_allclose(epochs_3.average().data, evoked_1.data, rtol=1e-12)
 
     # test zeroth-order case
     for preload in [True, False]:
@@ -1974,6 +1978,25 @@ def test_array_epochs():
     assert_array_equal(epochs.events[:, 2], np.ones(len(data_1), int))
 
 
+def test_array_epochs_blocks():
+    """Test baseline correction of EpochsArray in blocks of epochs
+    """
+    from mne import epochs as epochs_mod
+    data = np.random.RandomState(0).randn(7, 3, 50)
+    info = create_info(3, 100., ['eeg', 'eeg', 'misc'])
+    epochs = EpochsArray(data.copy(), info, baseline=(None, 0.1))
+    block_bytes = epochs_mod._DETREND_BLOCK_BYTES
+    try:
+        epochs_mod._DETREND_BLOCK_BYTES = 2 * data[0].nbytes - 1
+        epochs_blocks = EpochsArray(data.copy(), info, baseline=(None, 0.1))
+    finally:
+        epochs_mod._DETREND_BLOCK_BYTES = block_bytes
+    assert_array_equal(epochs_blocks.get_data(), epochs.get_data())
+    data_bl = data[:, :2] - data[:, :2, :11].mean(axis=-1, keepdims=True)
+    assert_allclose(epochs.get_data()[:, :2], data_bl, atol=1e-12)
+    assert_array_equal(epochs.get_data()[:, 2], data[:, 2])
+
+
 def test_concatenate_epochs():
     """Test concatenate epochs"""
     raw, events, picks = _get_data()
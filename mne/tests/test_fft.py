@@ -0,0 +1,72 @@
+import os.path as op
+
+import numpy as np
+from numpy.testing import assert_allclose
+from nose.tools import assert_equal, assert_raises
+
+from mne.fft import (fft, ifft, rfft, irfft, set_fft_backend,
+                     get_fft_backend, register_fft_backend)
+from mne.fft import _fft_backends
+from mne.utils import run_tests_if_main, requires_version, _TempDir
+
+rng = np.random.RandomState(0)
+
+
+def test_fft_backends():
+    """Test FFT backends"""
+    orig_backend = get_fft_backend()
+    x = rng.randn(3, 2, 15)
+    try:
+        for backend in ('numpy', 'scipy'):
+            set_fft_backend(backend)
+            assert_equal(get_fft_backend(), backend)
+            for axis in (-1, 0):
+                for n in (None, 12, 16, 17):
+                    assert_allclose(fft(x, n, axis),
+                                    np.fft.fft(x, n, axis), atol=1e-12)
+                    assert_allclose(rfft(x, n, axis),
+                                    np.fft.rfft(x, n, axis), atol=1e-12)
+                    x_fft = np.fft.fft(x, n, axis)
+                    assert_allclose(ifft(x_fft, n, axis),
+                                    np.fft.ifft(x_fft, n, axis), atol=1e-12)
+                    x_fft = np.fft.rfft(x, n, axis)
+                    assert_allclose(irfft(x_fft, n, axis),
+                                    np.fft.irfft(x_fft, n, axis),
+                                    atol=1e-12)
+        assert_raises(ValueError, set_fft_backend, 'foo')
+        assert_raises(TypeError, register_fft_backend, 'foo', None)
+        register_fft_backend('foo', lambda n_threads: dict(
+            fft=np.fft.fft, ifft=np.fft.ifft, rfft=np.fft.rfft,
+            irfft=np.fft.irfft))
+        set_fft_backend('foo')
+        assert_allclose(rfft(x), np.fft.rfft(x))
+    finally:
+        _fft_backends.pop('foo', None)
+        set_fft_backend(orig_backend)
+
+
+@requires_version('pyfftw', '0.10')
+def test_fft_pyfftw():
+    """Test pyFFTW FFT backend"""
+    from mne.fft import _save_wisdom
+    orig_backend = get_fft_backend()
+    x = rng.randn(2, 100)
+    try:
+        set_fft_backend('pyfftw', n_threads=2)
+        assert_equal(get_fft_backend(), 'pyfftw')
+        assert_allclose(rfft(x, 128), np.fft.rfft(x, 128))
+        assert_allclose(irfft(rfft(x)), x)
+    finally:
+        set_fft_backend(orig_backend)
+    tempdir = _TempDir()
+    import mne.fft
+    orig_fname = mne.fft._get_wisdom_fname
+    mne.fft._get_wisdom_fname = lambda: op.join(tempdir, 'wisdom.pkl')
+    try:
+        _save_wisdom()
+        assert_equal(op.isfile(op.join(tempdir, 'wisdom.pkl')), True)
+    finally:
+        mne.fft._get_wisdom_fname = orig_fname
+
+
+run_tests_if_main()
@@ -8,9 +8,10 @@ from scipy.signal import resample as sp_resample
 from mne.filter import (band_pass_filter, high_pass_filter, low_pass_filter,
                         band_stop_filter, resample, _resample_stim_channels,
                         construct_iir_filter, notch_filter, detrend,
-                        _overlap_add_filter, _smart_pad)
+                        _overlap_add_filter, _smart_pad, _savgol_filter)
 
-from mne.utils import sum_squared, run_tests_if_main, slow_test, catch_logging
+from mne.utils import (sum_squared, run_tests_if_main, slow_test,
+                       catch_logging, requires_version)
 
 warnings.simplefilter('always')  # enable b/c these tests throw warnings
 rng = np.random.RandomState(0)
@@ -93,6 +94,24 @@ def test_iir_stability():
     high_pass_filter(sig, 250, 0.5, method='iir',
                      iir_params=dict(ftype='butter', order=6))
 
+    # second-order sections are stable where polynomials are not
+    sig = rng.randn(3, 1000)
+    iir_params = dict(ftype='butter', order=8, output='sos')
+    sig_filt = high_pass_filter(sig, sfreq, 0.6, method='iir',
+                                iir_params=iir_params)
+    assert_true(np.isfinite(sig_filt).all())
+    # and the same as polynomials for a low-order filter, on blocks of signals
+    iir_params = dict(ftype='butter', order=2)
+    sig_filt = band_pass_filter(sig, sfreq, 1., 40., method='iir',
+                                iir_params=iir_params)
+    iir_params['output'] = 'sos'
+    assert_allclose(band_pass_filter(sig, sfreq, 1., 40., method='iir',
+                                     iir_params=iir_params, n_jobs=2),
+                    sig_filt, atol=1e-10)
+    assert_allclose(band_pass_filter(sig[0], sfreq, 1., 40., method='iir',
+                                     iir_params=iir_params), sig_filt[0],
+                    atol=1e-10)
+
 
 def test_notch_filters():
     """Test notch filters
@@ -130,6 +149,36 @@ def test_notch_filters():
         new_power = np.sqrt(sum_squared(b) / b.size)
         assert_almost_equal(new_power, orig_power, tol)
 
+    # sinusoid fitting in overlapping windows, all signals processed at once
+    a_2d = np.array([a, a[::-1]])
+    for fl in ('2s', 1001):
+        b = notch_filter(a_2d, sfreq, freqs, filter_length=fl,
+                         method='spectrum_fit')
+        assert_equal(b.shape, a_2d.shape)
+        for this_b in b:
+            new_power = np.sqrt(sum_squared(this_b) / this_b.size)
+            assert_almost_equal(new_power, orig_power, 1)
+    b = notch_filter(a_2d, sfreq, freqs, filter_length=None,
+                     method='spectrum_fit')
+    assert_allclose(b[0], notch_filter(a, sfreq, freqs, filter_length=None,
+                                       method='spectrum_fit'))
+
+    # filter_length=None fits the sinusoids to the whole signals, as before
+    # windows were used (reference values from the per-signal implementation)
+    t = np.arange(3000) / 100.
+    x = (np.random.RandomState(0).randn(2, 3000) +
+         np.sin(2 * np.pi * 20 * t) + 0.5 * np.sin(2 * np.pi * 30 * t))
+    b = notch_filter(x, 100., [20., 30.], filter_length=None,
+                     method='spectrum_fit')
+    assert_allclose(b[:, [0, 1000, 2999]],
+                    [[1.8087801543, 0.6623304188, -0.3277117599],
+                     [1.6021064371, 0.6599285027, 0.2605287352]],
+                    rtol=0, atol=1e-9)
+    assert_array_equal(notch_filter(x, 100., [20., 30.], filter_length=3000,
+                                    method='spectrum_fit'), b)
+    assert_true(np.abs(notch_filter(x, 100., [20., 30.],
+                                    method='spectrum_fit') - b).max() > 0.1)
+
 
 def test_resample():
     """Test resampling"""
@@ -270,6 +319,13 @@ def test_filters():
     iir_params = construct_iir_filter(iir_params, 40, None, 1000, 'low')
     assert_true(iir_params['a'].size - 1 == 4)
     assert_true(iir_params['b'].size - 1 == 4)
+    iir_params = dict(ftype='butter', order=4, output='sos')
+    iir_params = construct_iir_filter(iir_params, 40, None, 1000, 'low')
+    assert_equal(iir_params['sos'].shape, (2, 6))
+    assert_true('a' not in iir_params and 'b' not in iir_params)
+    assert_raises(ValueError, construct_iir_filter,
+                  dict(ftype='butter', order=4, output='zpk'), 40, None,
+                  1000, 'low')
 
     # check that picks work for 3d array with one channel and picks=[0]
     a = rng.randn(5 * sfreq, 5 * sfreq)
@@ -364,6 +420,45 @@ def test_detrend():
     assert_array_almost_equal(detrend(x, 1), np.zeros_like(x))
     x = np.ones(10)
     assert_array_almost_equal(detrend(x, 0), np.zeros_like(x))
+    x = np.arange(10.) ** 2 - 3 * np.arange(10.)
+    assert_array_almost_equal(detrend(x, 2), np.zeros_like(x))
+    assert_raises(ValueError, detrend, x, -1)
+    assert_raises(ValueError, detrend, x, 1.5)
+    assert_raises(ValueError, detrend, x, 'linear')
+    # NumPy integers are valid orders
+    assert_array_almost_equal(detrend(x, np.int64(2)), np.zeros_like(x))
+    # baseline correction with a window between two samples
+    from mne.baseline import rescale
+    x = np.random.RandomState(0).randn(3, 4, 10)
+    times = np.arange(10.)
+    assert_allclose(rescale(x, times, (2., 4.)),
+                    x - x[..., 2:5].mean(axis=-1)[..., np.newaxis])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        assert_true(np.isnan(rescale(x, times, (3.2, 3.5))).all())
+    assert_true(any(ww.category == RuntimeWarning for ww in w))
+    # all signals at once, along any axis
+    from scipy.signal import detrend as sp_detrend
+    x = np.random.RandomState(0).randn(3, 4, 50)
+    for axis in (0, 1, 2):
+        for order, kind in ((0, 'constant'), (1, 'linear')):
+            assert_allclose(detrend(x, order, axis=axis),
+                            sp_detrend(x, axis=axis, type=kind), atol=1e-12)
+
+
+@requires_version('scipy', '0.14')
+def test_savgol_filter():
+    """Test batched Savitzky-Golay filtering
+    """
+    from scipy.signal import savgol_filter
+    x = np.random.RandomState(0).randn(3, 4, 200)
+    for window_length, polyorder in ((1, 0), (5, 2), (31, 5)):
+        assert_allclose(_savgol_filter(x, window_length, polyorder),
+                        savgol_filter(x, window_length, polyorder),
+                        atol=1e-10)
+    assert_raises(ValueError, _savgol_filter, x, 4, 2)
+    assert_raises(ValueError, _savgol_filter, x, 201, 2)
+    assert_raises(ValueError, _savgol_filter, x, 5, 5)
 
 
 run_tests_if_main()
@@ -6,7 +6,7 @@
 import numpy as np
 
 from nose.tools import assert_equal, assert_raises, assert_true
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 from distutils.version import LooseVersion
 from scipy import signal, sparse
 
@@ -17,6 +17,7 @@ from mne.fixes import (_in1d, _tril_indices, _copysign, _unravel_index,
                        _isclose)
 from mne.fixes import _firwin2 as mne_firwin2
 from mne.fixes import _filtfilt as mne_filtfilt
+from mne.fixes import _sosfiltfilt as mne_sosfiltfilt
 
 rng = np.random.RandomState(0)
 
@@ -150,6 +151,27 @@ def test_filtfilt():
     assert_array_equal(x, y)
 
 
+def test_sosfiltfilt():
+    """Test second-order sections filtfilt replacement"""
+    x = np.r_[1, np.zeros(100)]
+    y = mne_sosfiltfilt([[1, 0, 0, 1, 0, 0]], x, padlen=0)
+    assert_array_equal(x, y)
+    # a cascade of sections is equivalent to the transfer function
+    b, a = signal.butter(4, 0.2)
+    sos = signal.butter(4, 0.2, output='sos')
+    x = rng.randn(2, 1000)
+    assert_allclose(mne_sosfiltfilt(sos, x, padlen=50),
+                    signal.filtfilt(b, a, x, padlen=50), atol=1e-10)
+
+
+def test_next_fast_len():
+    """Test next_fast_len"""
+    from mne.fixes import _next_fast_len
+    for n, n_fast in ((1, 1), (7, 8), (13, 15), (97, 100), (1021, 1024),
+                      (1025, 1080)):
+        assert_equal(_next_fast_len(n), n_fast)
+
+
 def test_sparse_block_diag():
     """Test sparse block diag replacement"""
     x = _sparse_block_diag([sparse.eye(2, 2), sparse.eye(2, 2)])
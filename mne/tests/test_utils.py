@@ -21,7 +21,7 @@ from mne.utils import (set_log_level, set_log_file, _TempDir,
                        set_memmap_min_size, _get_stim_channel, _check_fname,
                        create_slices, _time_mask, random_permutation,
                        _get_call_line, compute_corr, sys_info, verbose,
-                       check_fname, requires_ftp)
+                       check_fname, requires_ftp, _LRUCache)
 
 
 warnings.simplefilter('always')  # enable b/c these tests throw warnings
@@ -122,6 +122,29 @@ def test_run_tests_if_main():
     assert_true(x[0] and x[1])
 
 
+def test_lru_cache():
+    """Test the memory-bounded LRU cache
+    """
+    cache = _LRUCache(3 * 80)
+    calls = list()
+
+    def compute(ii):
+        calls.append(ii)
+        return [np.zeros(10) + ii]  # 80 bytes
+
+    for ii in (0, 1, 2, 0, 3):  # 0 was used more recently than 1
+        assert_equal(cache(ii, lambda: compute(ii))[0][0], ii)
+    assert_equal(calls, [0, 1, 2, 3])
+    assert_equal(len(cache), 3)
+    cache(1, lambda: compute(1))
+    cache(0, lambda: compute(0))
+    assert_equal(calls, [0, 1, 2, 3, 1])
+    cache(4, lambda: np.zeros(100))  # too large to be cached
+    assert_equal(len(cache), 3)
+    cache.clear()
+    assert_equal(len(cache), 0)
+
+
 def test_hash():
     """Test dictionary hashing and comparison functions"""
     # does hashing all of these types work:
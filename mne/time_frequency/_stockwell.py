@@ -6,14 +6,19 @@
 from copy import deepcopy
 import math
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy import fftpack
 # XXX explore cuda optimazation at some point.
 
+from ..fft import fft, ifft
 from ..io.pick import pick_types, pick_info
 from ..utils import verbose, warn
 from ..parallel import parallel_func, check_n_jobs
 from .tfr import AverageTFR, _get_data
 
+# bytes of Stockwell spectra computed at once for one channel
+_ST_BLOCK_BYTES = 2 ** 22
+
 
 def _check_input_st(x_in, n_fft):
     """Aux function"""
@@ -29,14 +34,14 @@ def _check_input_st(x_in, n_fft):
     elif n_fft < n_times:
         raise ValueError("n_fft cannot be smaller than signal size. "
                          "Got %s < %s." % (n_fft, n_times))
-    zero_pad = None
+    zero_pad = 0
     if n_times < n_fft:
         warn('The input signal is shorter ({0}) than "n_fft" ({1}). '
              'Applying zero padding.'.format(x_in.shape[-1], n_fft))
         zero_pad = n_fft - n_times
         pad_array = np.zeros(x_in.shape[:-1] + (zero_pad,), x_in.dtype)
         x_in = np.concatenate((x_in, pad_array), axis=-1)
-        return x_in, n_fft, zero_pad
+    return x_in, n_fft, zero_pad
 
 
 def _precompute_st_windows(n_samp, start_f, stop_f, sfreq, width):
@@ -45,17 +50,12 @@ def _precompute_st_windows(n_samp, start_f, stop_f, sfreq, width):
     tw = np.r_[tw[:1], tw[1:][::-1]]
 
     k = width  # 1 for classical stowckwell transform
-    f_range = np.arange(start_f, stop_f, 1)
-    windows = np.empty((len(f_range), len(tw)), dtype=np.complex)
-    for i_f, f in enumerate(f_range):
-        if f == 0.:
-            window = np.ones(len(tw))
-        else:
-            window = ((f / (np.sqrt(2. * np.pi) * k)) *
-                      np.exp(-0.5 * (1. / k ** 2.) * (f ** 2.) * tw ** 2.))
-        window /= window.sum()  # normalisation
-        windows[i_f] = fftpack.fft(window)
-    return windows
+    f_range = np.arange(start_f, stop_f, 1, dtype=float)[:, np.newaxis]
+    windows = ((f_range / (np.sqrt(2. * np.pi) * k)) *
+               np.exp(-0.5 * (1. / k ** 2.) * (f_range ** 2.) * tw ** 2.))
+    windows[f_range[:, 0] == 0.] = 1.
+    windows /= windows.sum(axis=-1)[:, np.newaxis]  # normalisation
+    return fft(windows)
 
 
 def _st(x, start_f, windows):
@@ -63,33 +63,56 @@ def _st(x, start_f, windows):
     n_samp = x.shape[-1]
     ST = np.empty(x.shape[:-1] + (len(windows), n_samp), dtype=np.complex)
     # do the work
-    Fx = fftpack.fft(x)
+    Fx = fft(x)
     XF = np.concatenate([Fx, Fx], axis=-1)
     for i_f, window in enumerate(windows):
         f = start_f + i_f
-        ST[..., i_f, :] = fftpack.ifft(XF[..., f:f + n_samp] * window)
+        ST[..., i_f, :] = ifft(XF[..., f:f + n_samp] * window)
     return ST
 
 
-def _st_power_itc(x, start_f, compute_itc, zero_pad, decim, W):
-    """Aux function"""
-    n_samp = x.shape[-1]
-    n_out = (n_samp - zero_pad)
-    n_out = n_out // decim + bool(n_out % decim)
-    psd = np.empty((len(W), n_out))
+def _st_power_itc(x, start_f, stop_f, sfreq, width, compute_itc, n_times,
+                  decim):
+    """Aux function
+
+    Computes the power and ITC over epochs of the Stockwell transform of
+    x (n_epochs, n_channels, n_fft), one block of frequencies at a time,
+    only at the decimated time points of the first ``n_times`` samples.
+    The windows of a block are computed once and used for all channels.
+    """
+    n_epochs, n_channels, n_samp = x.shape
+    n_out = len(range(0, n_times, decim))
+    # The decimated samples of the inverse FFT are the inverse FFT of the
+    # spectrum folded to n_samp // decim frequencies
+    fold = decim if n_samp % decim == 0 else 1
+    n_freq = stop_f - start_f
+    psd = np.empty((n_channels, n_freq, n_out))
     itc = np.empty_like(psd) if compute_itc else None
-    X = fftpack.fft(x)
+    X = fft(x)
     XX = np.concatenate([X, X], axis=-1)
-    for i_f, window in enumerate(W):
-        f = start_f + i_f
-        ST = fftpack.ifft(XX[:, f:f + n_samp] * window)
-        TFR = ST[:, :-zero_pad:decim]
-        TFR_abs = np.abs(TFR)
-        if compute_itc:
-            TFR /= TFR_abs
-            itc[i_f] = np.abs(np.mean(TFR, axis=0))
-        TFR_abs *= TFR_abs
-        psd[i_f] = np.mean(TFR_abs, axis=0)
+    n_block = max(_ST_BLOCK_BYTES // (16 * n_samp * n_epochs), 1)
+    for f_start in range(start_f, stop_f, n_block):
+        f_stop = min(f_start + n_block, stop_f)
+        W = _precompute_st_windows(n_samp, f_start, f_stop, sfreq, width)
+        block = slice(f_start - start_f, f_stop - start_f)
+        for c in range(n_channels):
+            # view of the spectrum shifted by each frequency of the block
+            XX_c = XX[:, c, f_start:]
+            ST = as_strided(XX_c, (n_epochs, f_stop - f_start, n_samp),
+                            XX_c.strides[:1] + XX_c.strides[1:] * 2) * W
+            if fold > 1:
+                ST = ST.reshape(ST.shape[:-1] + (fold, n_samp // fold))
+                TFR = ifft(ST.sum(axis=-2))[..., :n_out]
+                TFR /= fold
+            else:
+                TFR = ifft(ST)[..., :n_times:decim]
+            TFR_abs = np.abs(TFR)
+            if compute_itc:
+                TFR.real /= TFR_abs
+                TFR.imag /= TFR_abs
+                itc[c, block] = np.abs(np.mean(TFR, axis=0))
+            TFR_abs *= TFR_abs
+            psd[c, block] = np.mean(TFR_abs, axis=0)
     return psd, itc
 
 
@@ -153,8 +176,7 @@ def _induced_power_stockwell(data, sfreq, fmin, fmax, n_fft=None, width=1.0,
         individuals diagnosed with alcoholism.
         Clinical Neurophysiology 117 2128--2143
     """
-    n_epochs, n_channels = data.shape[:2]
-    n_out = data.shape[2] // decim + bool(data.shape[2] % decim)
+    n_epochs, n_channels, n_times = data.shape
     data, n_fft_, zero_pad = _check_input_st(data, n_fft)
 
     freqs = fftpack.fftfreq(n_fft_, 1. / sfreq)
@@ -167,19 +189,15 @@ def _induced_power_stockwell(data, sfreq, fmin, fmax, n_fft=None, width=1.0,
     stop_f = np.abs(freqs - fmax).argmin()
     freqs = freqs[start_f:stop_f]
 
-    W = _precompute_st_windows(data.shape[-1], start_f, stop_f, sfreq, width)
-    n_freq = stop_f - start_f
-    psd = np.empty((n_channels, n_freq, n_out))
-    itc = np.empty((n_channels, n_freq, n_out)) if return_itc else None
-
-    parallel, my_st, _ = parallel_func(_st_power_itc, n_jobs)
-    tfrs = parallel(my_st(data[:, c, :], start_f, return_itc, zero_pad,
-                          decim, W)
-                    for c in range(n_channels))
-    for c, (this_psd, this_itc) in enumerate(iter(tfrs)):
-        psd[c] = this_psd
-        if this_itc is not None:
-            itc[c] = this_itc
+    n_jobs = min(n_jobs, n_channels)
+    parallel, my_st, n_jobs = parallel_func(_st_power_itc, n_jobs)
+    tfrs = parallel(my_st(data[:, picks], start_f, stop_f, sfreq, width,
+                          return_itc, n_times, decim)
+                    for picks in np.array_split(np.arange(n_channels),
+                                                n_jobs))
+    psd = np.concatenate([this_psd for this_psd, _ in tfrs])
+    itc = np.concatenate([this_itc for _, this_itc in tfrs]) \
+        if return_itc else None
 
     return psd, itc, freqs
 
@@ -207,7 +225,8 @@ def tfr_stockwell(inst, fmin=None, fmax=None, n_fft=None,
         resolution, if > 1, increased frequency resolution. Defaults to 1.
         (classical S-Transform).
     decim : int
-        The decimation factor on the time axis. To reduce memory usage.
+        The decimation factor on the time axis. To reduce memory usage and
+        computation time, only the decimated time points are computed.
     return_itc : bool
         Return intertrial coherence (ITC) as well as averaged power.
     n_jobs : int
@@ -3,14 +3,16 @@
 # License: BSD (3-clause)
 
 import copy as cp
+from itertools import islice
 
 import numpy as np
 from scipy.fftpack import fftfreq
 
 from ..io.pick import pick_types
+from ..parallel import parallel_func
 from ..utils import logger, verbose, warn
 from ..time_frequency.multitaper import (dpss_windows, _mt_spectra,
-                                         _csd_from_mt, _psd_from_mt_adaptive)
+                                         _psd_from_mt_adaptive)
 
 
 class CrossSpectralDensity(object):
@@ -19,7 +21,10 @@ class CrossSpectralDensity(object):
     Parameters
     ----------
     data : array of shape (n_channels, n_channels)
-        The cross-spectral density matrix.
+        The cross-spectral density matrix. If ``packed`` is True, the
+        upper triangles (row by row, including the diagonal) of the
+        cross-spectral density matrices of all frequencies, of shape
+        (n_channels * (n_channels + 1) // 2, n_frequencies).
     ch_names : list of string
         List of channels' names.
     projs :
@@ -28,13 +33,20 @@ class CrossSpectralDensity(object):
         List of bad channels.
     frequencies : float | list of float
         Frequency or frequencies for which the CSD matrix was calculated. If a
-        list is passed, data is a sum across CSD matrices for all frequencies.
+        list is passed and ``packed`` is False, data is a sum across CSD
+        matrices for all frequencies.
     n_fft : int
         Length of the FFT used when calculating the CSD matrix.
+    packed : bool
+        Whether data holds the packed CSD matrices of each frequency.
+
+        .. versionadded:: 0.12.0
     """
-    def __init__(self, data, ch_names, projs, bads, frequencies, n_fft):
+    def __init__(self, data, ch_names, projs, bads, frequencies, n_fft,
+                 packed=False):
         self.data = data
-        self.dim = len(data)
+        self.packed = packed
+        self.dim = len(ch_names) if packed else len(data)
         self.ch_names = cp.deepcopy(ch_names)
         self.projs = cp.deepcopy(projs)
         self.bads = cp.deepcopy(bads)
@@ -43,16 +55,132 @@ class CrossSpectralDensity(object):
 
     def __repr__(self):
         s = 'frequencies : %s' % self.frequencies
-        s += ', size : %s x %s' % self.data.shape
-        s += ', data : %s' % self.data
+        if self.packed:
+            s += ', size : %s x %s x %s' % (self.dim, self.dim, len(self))
+        else:
+            s += ', size : %s x %s' % self.data.shape
+            s += ', data : %s' % self.data
         return '<CrossSpectralDensity  |  %s>' % s
 
+    def __len__(self):
+        """Number of CSD matrices"""
+        return self.data.shape[-1] if self.packed else 1
+
+    def __getitem__(self, index):
+        """Get the CSD of one frequency as a CrossSpectralDensity"""
+        if not self.packed:
+            raise TypeError('Only CSDs with packed data can be indexed')
+        return CrossSpectralDensity(self.get_data(index), self.ch_names,
+                                    self.projs, self.bads,
+                                    self.frequencies[index], self.n_fft)
+
+    def get_data(self, index=None):
+        """Get the CSD matrices
+
+        Parameters
+        ----------
+        index : int | None
+            The index of the frequency to get the CSD matrix of. If None,
+            the matrices of all frequencies are returned. Only used if the
+            data are packed.
+
+        Returns
+        -------
+        data : array, shape (n_channels, n_channels) or
+               (n_channels, n_channels, n_frequencies)
+            The CSD matrices.
+
+        Notes
+        -----
+        .. versionadded:: 0.12.0
+        """
+        if not self.packed:
+            return self.data
+        data = self.data if index is None else self.data[:, index]
+        return _unpack_csd(data, self.dim)
+
+
+def _unpack_csd(data, n_channels):
+    """Helper to make full Hermitian matrices from packed upper triangles"""
+    csd = np.empty((n_channels, n_channels) + data.shape[1:], data.dtype)
+    triu = np.triu_indices(n_channels)
+    csd[triu] = data
+    csd[triu[::-1]] = data.conj()
+    return csd
+
+
+def _csd_epochs_block(data, window_fun, eigvals, sfreq, n_fft, freq_mask,
+                      mt_adaptive):
+    """Sum the CSD matrices of a block of epochs
+
+    Parameters
+    ----------
+    data : array, shape (n_epochs, n_channels, n_times)
+        The epochs.
+    window_fun : array, shape (n_tapers, n_times) or (n_times,)
+        The tapers (or window).
+    eigvals : array, shape (n_tapers,) | float
+        The eigenvalues of the tapers.
+    sfreq : float
+        The sampling frequency.
+    n_fft : int
+        The length of the FFT.
+    freq_mask : array of bool
+        The frequencies to keep, among the positive ones.
+    mt_adaptive : bool
+        Use adaptive weights to combine the tapered spectra.
+
+    Returns
+    -------
+    csd : array, shape (n_channels * (n_channels + 1) // 2, n_freqs)
+        The upper triangles of the CSD matrices, summed over epochs.
+    """
+    n_epochs, n_channels, n_times = data.shape
+    # tapered spectra of all epochs in one go
+    x_mt = _mt_spectra(data.reshape(-1, n_times), window_fun, sfreq,
+                       n_fft)[0]
+    if mt_adaptive:
+        _, weights = _psd_from_mt_adaptive(x_mt, eigvals, freq_mask,
+                                           return_weights=True)
+    else:
+        weights = np.sqrt(np.atleast_1d(eigvals))[np.newaxis, :, np.newaxis]
+    x_mt = x_mt[:, :, freq_mask]
+    # scale the spectra so that the CSD is their Hermitian product summed
+    # over tapers (see _csd_from_mt)
+    x_mt *= weights * np.sqrt(2. / (weights * weights).sum(axis=-2))[
+        :, np.newaxis]
+    x_mt.shape = (n_epochs, n_channels) + x_mt.shape[1:]
+    x_mt_conj = x_mt.conj()
+
+    # upper triangle, one row at a time
+    csd = np.empty((n_channels * (n_channels + 1) // 2, x_mt.shape[-1]),
+                   np.complex128)
+    start = 0
+    for ii in range(n_channels):
+        stop = start + n_channels - ii
+        csd[start:stop] = np.einsum('ekf,ejkf->jf', x_mt[:, ii],
+                                    x_mt_conj[:, ii:])
+        start = stop
+    return csd
+
+
+def _iter_epochs_blocks(epochs, picks, tslice, n_block):
+    """Helper to iterate over the data of blocks of epochs"""
+    block = list()
+    for epoch in epochs:
+        block.append(epoch[picks][:, tslice])
+        if len(block) == n_block:
+            yield np.array(block)
+            block = list()
+    if len(block) > 0:
+        yield np.array(block)
+
 
 @verbose
 def compute_epochs_csd(epochs, mode='multitaper', fmin=0, fmax=np.inf,
                        fsum=True, tmin=None, tmax=None, n_fft=None,
                        mt_bandwidth=None, mt_adaptive=False, mt_low_bias=True,
-                       projs=None, verbose=None):
+                       projs=None, compact=False, n_jobs=1, verbose=None):
     """Estimate cross-spectral density from epochs
 
     Note: Baseline correction should be used when creating the Epochs.
@@ -95,13 +223,25 @@ def compute_epochs_csd(epochs, mode='multitaper', fmin=0, fmax=np.inf,
     projs : list of Projection | None
         List of projectors to use in CSD calculation, or None to indicate that
         the projectors from the epochs should be inherited.
+    compact : bool
+        Only used if fsum is False. If True, a single CrossSpectralDensity
+        holding the CSD matrices of all frequencies (as packed upper
+        triangles) is returned instead of a list. Use its ``get_data``
+        method or index it to get the CSD of each frequency.
+
+        .. versionadded:: 0.12.0
+    n_jobs : int
+        Number of jobs to run in parallel (over blocks of epochs).
+
+        .. versionadded:: 0.12.0
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
 
     Returns
     -------
-    csd : instance of CrossSpectralDensity
-        The computed cross-spectral density.
+    csd : instance of CrossSpectralDensity | list
+        The computed cross-spectral density. A list of CrossSpectralDensity
+        (one per frequency) if fsum is False and compact is False.
     """
     # Portions of this code adapted from mne/connectivity/spectral.py
 
@@ -179,79 +319,57 @@ def compute_epochs_csd(epochs, mode='multitaper', fmin=0, fmax=np.inf,
         window_fun = np.hanning(n_times)
         mt_adaptive = False
         eigvals = 1.
-        n_tapers = None
+        n_tapers = 1
     else:
         raise ValueError('Mode has an invalid value.')
 
-    csds_mean = np.zeros((len(ch_names), len(ch_names), n_freqs),
-                         dtype=complex)
-
     # Picking frequencies of interest
     freq_mask_mt = freq_mask[orig_frequencies >= 0]
 
-    # Compute CSD for each epoch
+    # Compute CSD for blocks of epochs of up to 50 MB of tapered spectra
+    n_block = max(50000000 // (len(ch_names) * n_tapers * len(freq_mask_mt) *
+                               16), 1)
+    if n_jobs > 1:
+        n_block = min(n_block, -(-len(epochs.events) // n_jobs))
+    parallel, my_csd_epochs_block, n_jobs = parallel_func(_csd_epochs_block,
+                                                          n_jobs)
+    blocks = _iter_epochs_blocks(epochs, picks_meeg, tslice, n_block)
+    csds_mean = 0.
     n_epochs = 0
-    for epoch in epochs:
-        epoch = epoch[picks_meeg][:, tslice]
-
-        # Calculating Fourier transform using multitaper module
-        x_mt, _ = _mt_spectra(epoch, window_fun, sfreq, n_fft)
-
-        if mt_adaptive:
-            # Compute adaptive weights
-            _, weights = _psd_from_mt_adaptive(x_mt, eigvals, freq_mask,
-                                               return_weights=True)
-            # Tiling weights so that we can easily use _csd_from_mt()
-            weights = weights[:, np.newaxis, :, :]
-            weights = np.tile(weights, [1, x_mt.shape[0], 1, 1])
-        else:
-            # Do not use adaptive weights
-            if mode == 'multitaper':
-                weights = np.sqrt(eigvals)[np.newaxis, np.newaxis, :,
-                                           np.newaxis]
-            else:
-                # Hack so we can sum over axis=-2
-                weights = np.array([1.])[:, None, None, None]
-
-        x_mt = x_mt[:, :, freq_mask_mt]
-
-        # Calculating CSD
-        # Tiling x_mt so that we can easily use _csd_from_mt()
-        x_mt = x_mt[:, np.newaxis, :, :]
-        x_mt = np.tile(x_mt, [1, x_mt.shape[0], 1, 1])
-        y_mt = np.transpose(x_mt, axes=[1, 0, 2, 3])
-        weights_y = np.transpose(weights, axes=[1, 0, 2, 3])
-        csds_epoch = _csd_from_mt(x_mt, y_mt, weights, weights_y)
-
-        # Scaling by number of samples and compensating for loss of power due
-        # to windowing (see section 11.5.2 in Bendat & Piersol).
-        if mode == 'fourier':
-            csds_epoch /= n_times
-            csds_epoch *= 8 / 3.
-
-        # Scaling by sampling frequency for compatibility with Matlab
-        csds_epoch /= sfreq
-
-        csds_mean += csds_epoch
-        n_epochs += 1
+    while True:
+        these_blocks = list(islice(blocks, n_jobs))
+        if len(these_blocks) == 0:
+            break
+        for csd in parallel(my_csd_epochs_block(
+                block, window_fun, eigvals, sfreq, n_fft, freq_mask_mt,
+                mt_adaptive) for block in these_blocks):
+            csds_mean += csd
+        n_epochs += sum(len(block) for block in these_blocks)
+
+    # Scaling by number of samples and compensating for loss of power due
+    # to windowing (see section 11.5.2 in Bendat & Piersol).
+    if mode == 'fourier':
+        csds_mean /= n_times
+        csds_mean *= 8 / 3.
+
+    # Scaling by sampling frequency for compatibility with Matlab
+    csds_mean /= sfreq
 
     csds_mean /= n_epochs
 
     logger.info('[done]')
 
-    # Summing over frequencies of interest or returning a list of separate CSD
+    # Summing over frequencies of interest or returning separate CSD
     # matrices for each frequency
     if fsum is True:
-        csd_mean_fsum = np.sum(csds_mean, 2)
+        csd_mean_fsum = _unpack_csd(np.sum(csds_mean, 1), len(ch_names))
         csd = CrossSpectralDensity(csd_mean_fsum, ch_names, projs,
                                    epochs.info['bads'],
                                    frequencies=frequencies, n_fft=n_fft)
         return csd
     else:
-        csds = []
-        for i in range(n_freqs):
-            csds.append(CrossSpectralDensity(csds_mean[:, :, i], ch_names,
-                                             projs, epochs.info['bads'],
-                                             frequencies=frequencies[i],
-                                             n_fft=n_fft))
-        return csds
+        csd = CrossSpectralDensity(csds_mean, ch_names, projs,
+                                   epochs.info['bads'],
+                                   frequencies=frequencies, n_fft=n_fft,
+                                   packed=True)
+        return csd if compact else [csd[i] for i in range(n_freqs)]
@@ -4,10 +4,23 @@
 # Parts of this code were copied from NiTime http://nipy.sourceforge.net/nitime
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 from scipy import fftpack, linalg
 
+from ..fft import fft, ifft
+from ..fixes import partial
 from ..parallel import parallel_func
-from ..utils import verbose, sum_squared, deprecated, warn
+from ..utils import verbose, sum_squared, deprecated, warn, _LRUCache
+
+# Wavelets, tapers and their spectra are reused across calls
+_bank_cache = _LRUCache(2 ** 27)
+
+
+def _bank_key(*args):
+    """Helper to make a hashable key for _bank_cache from the parameters"""
+    return tuple(tuple(np.atleast_1d(arg).tolist())
+                 if isinstance(arg, (np.ndarray, list, tuple)) else arg
+                 for arg in args)
 
 
 def tridisolve(d, e, b, overwrite_b=True):
@@ -144,7 +157,19 @@ def dpss_windows(N, half_nbw, Kmax, low_bias=True, interp_from=None,
     Slepian, D. Prolate spheroidal wave functions, Fourier analysis, and
     uncertainty V: The discrete case. Bell System Technical Journal,
     Volume 57 (1978), 1371430
+
+    The windows are cached, so they are only computed once for a given set
+    of parameters.
     """
+    key = _bank_key('dpss', int(N), float(half_nbw), int(Kmax), low_bias,
+                    interp_from, interp_kind)
+    dpss, eigvals = _bank_cache(key, partial(
+        _dpss_windows, N, half_nbw, Kmax, low_bias, interp_from, interp_kind))
+    return dpss.copy(), eigvals.copy()
+
+
+def _dpss_windows(N, half_nbw, Kmax, low_bias, interp_from, interp_kind):
+    """Aux function to compute the DPSS windows, see dpss_windows"""
     from scipy import interpolate
     Kmax = int(Kmax)
     W = float(half_nbw) / N
@@ -230,8 +255,8 @@ def dpss_windows(N, half_nbw, Kmax, low_bias=True, interp_from=None,
     # compute autocorr using FFT (same as nitime.utils.autocorr(dpss) * N)
     rxx_size = 2 * N - 1
     n_fft = 2 ** int(np.ceil(np.log2(rxx_size)))
-    dpss_fft = fftpack.fft(dpss, n_fft)
-    dpss_rxx = np.real(fftpack.ifft(dpss_fft * dpss_fft.conj()))
+    dpss_fft = fft(dpss, n_fft)
+    dpss_rxx = np.real(ifft(dpss_fft * dpss_fft.conj()))
     dpss_rxx = dpss_rxx[:, :N]
 
     r = 4 * W * np.sinc(2 * W * nidx)
@@ -299,65 +324,74 @@ def _psd_from_mt_adaptive(x_mt, eigvals, freq_mask, max_iter=150,
     x_var = np.trapz(psd_est, dx=np.pi / n_freqs) / (2 * np.pi)
     del psd_est
 
-    # allocate space for output
-    psd = np.empty((n_signals, np.sum(freq_mask)))
-
-    # only keep the frequencies of interest
+    # only keep the frequencies of interest, the iterations only need the
+    # power of the tapered spectra, arranged as (n_tapers, n_elements) with
+    # one element per signal and frequency
+    n_freqs = np.sum(freq_mask)
     x_mt = x_mt[:, :, freq_mask]
+    power = x_mt.real ** 2
+    power += x_mt.imag ** 2
+    del x_mt
+    power = power.transpose(1, 0, 2).reshape(n_tapers, -1)
+    var = np.repeat(x_var, n_freqs)
 
-    if return_weights:
-        weights = np.empty((n_signals, n_tapers, psd.shape[1]))
-
-    for i, (xk, var) in enumerate(zip(x_mt, x_var)):
-        # combine the SDFs in the traditional way in order to estimate
-        # the variance of the timeseries
-
-        # The process is to iteratively switch solving for the following
-        # two expressions:
-        # (1) Adaptive Multitaper SDF:
-        # S^{mt}(f) = [ sum |d_k(f)|^2 S_k(f) ]/ sum |d_k(f)|^2
-        #
-        # (2) Weights
-        # d_k(f) = [sqrt(lam_k) S^{mt}(f)] / [lam_k S^{mt}(f) + E{B_k(f)}]
-        #
-        # Where lam_k are the eigenvalues corresponding to the DPSS tapers,
-        # and the expected value of the broadband bias function
-        # E{B_k(f)} is replaced by its full-band integration
-        # (1/2pi) int_{-pi}^{pi} E{B_k(f)} = sig^2(1-lam_k)
-
-        # start with an estimate from incomplete data--the first 2 tapers
-        psd_iter = _psd_from_mt(xk[:2, :], rt_eig[:2, np.newaxis])
-
-        err = np.zeros_like(xk)
-        for n in range(max_iter):
-            d_k = (psd_iter / (eigvals[:, np.newaxis] * psd_iter +
-                   (1 - eigvals[:, np.newaxis]) * var))
-            d_k *= rt_eig[:, np.newaxis]
-            # Test for convergence -- this is overly conservative, since
-            # iteration only stops when all frequencies have converged.
-            # A better approach is to iterate separately for each freq, but
-            # that is a nonvectorized algorithm.
-            # Take the RMS difference in weights from the previous iterate
-            # across frequencies. If the maximum RMS error across freqs is
-            # less than 1e-10, then we're converged
-            err -= d_k
-            if np.max(np.mean(err ** 2, axis=0)) < 1e-10:
-                break
-
-            # update the iterative estimate with this d_k
-            psd_iter = _psd_from_mt(xk, d_k)
-            err = d_k
-
-        if n == max_iter - 1:
-            warn('Iterative multi-taper PSD computation did not converge.')
-
-        psd[i, :] = psd_iter
-
-        if return_weights:
-            weights[i, :, :] = d_k
+    # allocate space for output
+    psd = np.empty(n_signals * n_freqs)
+    weights = np.empty((n_tapers, n_signals * n_freqs))
+
+    # combine the SDFs in the traditional way in order to estimate
+    # the variance of the timeseries
+
+    # The process is to iteratively switch solving for the following
+    # two expressions:
+    # (1) Adaptive Multitaper SDF:
+    # S^{mt}(f) = [ sum |d_k(f)|^2 S_k(f) ]/ sum |d_k(f)|^2
+    #
+    # (2) Weights
+    # d_k(f) = [sqrt(lam_k) S^{mt}(f)] / [lam_k S^{mt}(f) + E{B_k(f)}]
+    #
+    # Where lam_k are the eigenvalues corresponding to the DPSS tapers,
+    # and the expected value of the broadband bias function
+    # E{B_k(f)} is replaced by its full-band integration
+    # (1/2pi) int_{-pi}^{pi} E{B_k(f)} = sig^2(1-lam_k)
+
+    # start with an estimate from incomplete data--the first 2 tapers
+    psd_iter = 2 * np.dot(eigvals[:2], power[:2]) / eigvals[:2].sum()
+
+    # All signals and frequencies are iterated together, each element is
+    # dropped from the iterations once its weights have converged
+    idx = np.arange(power.shape[1])
+    err = np.zeros_like(power)
+    eigvals = eigvals[:, np.newaxis]
+    for n in range(max_iter):
+        d_k = psd_iter / (eigvals * psd_iter + (1 - eigvals) * var)
+        d_k *= rt_eig[:, np.newaxis]
+        # Test for convergence: the mean squared difference in weights from
+        # the previous iterate across tapers is less than 1e-10
+        err -= d_k
+        converged = np.mean(err ** 2, axis=0) < 1e-10
+        psd[idx[converged]] = psd_iter[converged]
+        weights[:, idx[converged]] = d_k[:, converged]
+        if converged.all():
+            break
+        if converged.any():
+            keep = ~converged
+            idx, d_k, var = idx[keep], d_k[:, keep], var[keep]
+            power = power[:, keep]
+
+        # update the iterative estimate with this d_k
+        d_k_sq = d_k * d_k
+        psd_iter = 2 * (d_k_sq * power).sum(axis=0) / d_k_sq.sum(axis=0)
+        err = d_k
+    else:
+        warn('Iterative multi-taper PSD computation did not converge.')
+        psd[idx] = psd_iter
+        weights[:, idx] = d_k
 
+    psd.shape = (n_signals, n_freqs)
     if return_weights:
-        return psd, weights
+        weights.shape = (n_tapers, n_signals, n_freqs)
+        return psd, weights.transpose(1, 0, 2)
     else:
         return psd
 
@@ -449,14 +483,98 @@ def _mt_spectra(x, dpss, sfreq, n_fft=None):
     n_tapers = dpss.shape[0] if dpss.ndim > 1 else 1
     x_mt = np.zeros((len(x), n_tapers, freq_mask.sum()), dtype=np.complex128)
     for idx, sig in enumerate(x):
-        x_mt[idx] = fftpack.fft(sig[np.newaxis, :] * dpss,
-                                n=n_fft)[:, freq_mask]
+        x_mt[idx] = fft(sig[np.newaxis, :] * dpss, n=n_fft)[:, freq_mask]
     return x_mt, freqs
 
 
+def _compute_mt_params(n_times, sfreq, bandwidth, low_bias, adaptive):
+    """Helper to compute the tapers used for multitaper spectra"""
+    # compute standardized half-bandwidth
+    if bandwidth is not None:
+        half_nbw = float(bandwidth) * n_times / (2 * sfreq)
+    else:
+        half_nbw = 4
+
+    # Create tapers
+    n_tapers_max = int(2 * half_nbw)
+    dpss, eigvals = dpss_windows(n_times, half_nbw, n_tapers_max,
+                                 low_bias=low_bias)
+
+    if adaptive and len(eigvals) < 3:
+        warn('Not adaptively combining the spectral estimators due to a low '
+             'number of tapers.')
+        adaptive = False
+    return dpss, eigvals, adaptive
+
+
+def _mt_freqs(n_times, sfreq, fmin, fmax):
+    """Helper to get the frequencies of the PSDs and their mask"""
+    freqs = fftpack.fftfreq(n_times, 1. / sfreq)
+    freqs = freqs[(freqs >= 0)]  # what we get from _mt_spectra
+    freq_mask = (freqs >= fmin) & (freqs <= fmax)
+    return freqs[freq_mask], freq_mask
+
+
+def _mt_segment_sums(x, dpss, eigvals, sfreq, n_overlap, freq_mask,
+                     adaptive):
+    """Sum the multitaper PSDs of the segments of each signal
+
+    Parameters
+    ----------
+    x : array, shape=(n_signals, n_times)
+        The signals.
+    dpss : array, shape=(n_tapers, n_per_seg)
+        The tapers, which set the length of the segments.
+    eigvals : array, shape=(n_tapers,)
+        The eigenvalues of the tapers.
+    sfreq : float
+        The sampling frequency.
+    n_overlap : int
+        The number of samples shared by consecutive segments.
+    freq_mask : array of bool
+        The frequencies to keep.
+    adaptive : bool
+        Use adaptive weights to combine the tapered spectra.
+
+    Returns
+    -------
+    sums : array, shape=(n_signals, n_freqs)
+        The sums of the PSDs of the segments.
+    n_segments : int
+        The number of segments per signal.
+    """
+    n_signals, n_times = x.shape
+    n_per_seg = dpss.shape[-1]
+    step = n_per_seg - n_overlap
+    n_segments = max((n_times - n_overlap) // step, 0)
+    sums = np.zeros((n_signals, freq_mask.sum()))
+    if n_segments == 0:
+        return sums, n_segments
+    segments = as_strided(x, (n_signals, n_segments, n_per_seg),
+                          (x.strides[0], step * x.strides[1], x.strides[1]))
+    weights = np.sqrt(eigvals)[np.newaxis, :, np.newaxis]
+    # Spectra of segments of all signals are computed together, in blocks
+    # of up to 50 MB
+    n_block = max(50000000 // (len(freq_mask) * len(eigvals) * 16), 1)
+    n_seg_block = min(n_segments, n_block)
+    n_sig_block = max(n_block // n_segments, 1)
+    for ii in range(0, n_signals, n_sig_block):
+        for jj in range(0, n_segments, n_seg_block):
+            this_seg = segments[ii:ii + n_sig_block, jj:jj + n_seg_block]
+            x_mt = _mt_spectra(this_seg.reshape(-1, n_per_seg), dpss,
+                               sfreq)[0]
+            if adaptive:
+                psd = _psd_from_mt_adaptive(x_mt, eigvals, freq_mask)
+            else:
+                psd = _psd_from_mt(x_mt[:, :, freq_mask], weights)
+            sums[ii:ii + n_sig_block] += psd.reshape(
+                this_seg.shape[:2] + (-1,)).sum(axis=1)
+    return sums, n_segments
+
+
 def _psd_multitaper(x, sfreq, fmin=0, fmax=np.inf, bandwidth=None,
                     adaptive=False, low_bias=True, normalization='length',
-                    n_jobs=1):
+                    n_per_seg=None, n_overlap=0, n_jobs=1):
     """Compute power spectrum density (PSD) using a multi-taper method
 
     Parameters
@@ -481,8 +599,16 @@ def _psd_multitaper(x, sfreq, fmin=0, fmax=np.inf, bandwidth=None,
         Either "full" or "length" (default). If "full", the PSD will
         be normalized by the sampling rate as well as the length of
         the signal (as in nitime).
+    n_per_seg : int | None
+        If not None, the length of the segments the signals are split
+        into. The multitaper PSDs of the segments are averaged, as in
+        Welch's method. If None, the tapers span the whole signals.
+    n_overlap : int
+        The number of points of overlap between segments (only used if
+        ``n_per_seg`` is not None).
     n_jobs : int
-        Number of parallel jobs to use (only used if adaptive=True).
+        Number of parallel jobs to use (only used if adaptive=True or
+        ``n_per_seg`` is not None).
 
     Returns
     -------
@@ -511,45 +637,45 @@ def _psd_multitaper(x, sfreq, fmin=0, fmax=np.inf, bandwidth=None,
     dshape = x.shape[:-1]
     x = x.reshape(-1, n_times)
 
-    # compute standardized half-bandwidth
-    if bandwidth is not None:
-        half_nbw = float(bandwidth) * n_times / (2 * sfreq)
+    if n_per_seg is not None:
+        n_per_seg, n_overlap = _check_n_per_seg(n_times, n_per_seg,
+                                                n_overlap)
+        dpss, eigvals, adaptive = _compute_mt_params(
+            n_per_seg, sfreq, bandwidth, low_bias, adaptive)
+        freqs, freq_mask = _mt_freqs(n_per_seg, sfreq, fmin, fmax)
+        parallel, my_mt_segment_sums, n_jobs = \
+            parallel_func(_mt_segment_sums, n_jobs)
+        out = parallel(my_mt_segment_sums(d, dpss, eigvals, sfreq, n_overlap,
+                                          freq_mask, adaptive)
+                       for d in np.array_split(x, n_jobs))
+        psd = np.concatenate([o[0] for o in out])
+        psd /= out[0][1]
     else:
-        half_nbw = 4
-
-    # Create tapers and compute spectra
-    n_tapers_max = int(2 * half_nbw)
-    dpss, eigvals = dpss_windows(n_times, half_nbw, n_tapers_max,
-                                 low_bias=low_bias)
-
-    # descide which frequencies to keep
-    freqs = fftpack.fftfreq(x.shape[1], 1. / sfreq)
-    freqs = freqs[(freqs >= 0)]  # what we get from _mt_spectra
-    freq_mask = (freqs >= fmin) & (freqs <= fmax)
-    freqs = freqs[freq_mask]
-
-    # combine the tapered spectra
-    if adaptive and len(eigvals) < 3:
-        warn('Not adaptively combining the spectral estimators due to a low '
-             'number of tapers.')
-        adaptive = False
-
-    psd = np.zeros((x.shape[0], freq_mask.sum()))
-    # Let's go in up to 50 MB chunks of signals to save memory
-    n_chunk = max(50000000 // (len(freq_mask) * len(eigvals) * 16), n_jobs)
-    offsets = np.concatenate((np.arange(0, x.shape[0], n_chunk), [x.shape[0]]))
-    for start, stop in zip(offsets[:-1], offsets[1:]):
-        x_mt = _mt_spectra(x[start:stop], dpss, sfreq)[0]
-        if not adaptive:
-            weights = np.sqrt(eigvals)[np.newaxis, :, np.newaxis]
-            psd[start:stop] = _psd_from_mt(x_mt[:, :, freq_mask], weights)
-        else:
-            n_splits = min(stop - start, n_jobs)
-            parallel, my_psd_from_mt_adaptive, n_jobs = \
-                parallel_func(_psd_from_mt_adaptive, n_splits)
-            out = parallel(my_psd_from_mt_adaptive(x, eigvals, freq_mask)
-                           for x in np.array_split(x_mt, n_splits))
-            psd[start:stop] = np.concatenate(out)
+        dpss, eigvals, adaptive = _compute_mt_params(
+            n_times, sfreq, bandwidth, low_bias, adaptive)
+        # descide which frequencies to keep
+        freqs, freq_mask = _mt_freqs(n_times, sfreq, fmin, fmax)
+
+        # combine the tapered spectra
+        psd = np.zeros((x.shape[0], freq_mask.sum()))
+        # Let's go in up to 50 MB chunks of signals to save memory
+        n_chunk = max(50000000 // (len(freq_mask) * len(eigvals) * 16),
+                      n_jobs)
+        offsets = np.concatenate((np.arange(0, x.shape[0], n_chunk),
+                                  [x.shape[0]]))
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            x_mt = _mt_spectra(x[start:stop], dpss, sfreq)[0]
+            if not adaptive:
+                weights = np.sqrt(eigvals)[np.newaxis, :, np.newaxis]
+                psd[start:stop] = _psd_from_mt(x_mt[:, :, freq_mask],
+                                               weights)
+            else:
+                n_splits = min(stop - start, n_jobs)
+                parallel, my_psd_from_mt_adaptive, n_jobs = \
+                    parallel_func(_psd_from_mt_adaptive, n_splits)
+                out = parallel(my_psd_from_mt_adaptive(x, eigvals, freq_mask)
+                               for x in np.array_split(x_mt, n_splits))
+                psd[start:stop] = np.concatenate(out)
 
     if normalization == 'full':
         psd /= sfreq
@@ -561,6 +687,13 @@ def _psd_multitaper(x, sfreq, fmin=0, fmax=np.inf, bandwidth=None,
     return psd, freqs
 
 
+def _check_n_per_seg(n_times, n_per_seg, n_overlap):
+    """Helper to make sure n_per_seg and n_overlap make sense"""
+    n_per_seg = min(int(n_per_seg), n_times)
+    n_overlap = min(int(n_overlap), n_per_seg - 1)
+    return n_per_seg, n_overlap
+
+
 @deprecated('This will be deprecated in release v0.12, see psd_multitaper.')
 @verbose
 def multitaper_psd(x, sfreq=2 * np.pi, fmin=0, fmax=np.inf, bandwidth=None,
@@ -3,11 +3,14 @@
 # License : BSD 3-clause
 
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
+from ..fft import rfft
 from ..parallel import parallel_func
 from ..io.pick import _pick_data_channels
 from ..utils import logger, verbose, deprecated, _time_mask
-from .multitaper import _psd_multitaper
+from .multitaper import (_psd_multitaper, _compute_mt_params, _mt_freqs,
+                         _mt_segment_sums, _check_n_per_seg)
 
 
 @deprecated('This will be deprecated in release v0.12, see psd_welch.')
@@ -57,7 +60,6 @@ def compute_raw_psd(raw, tmin=0., tmax=None, picks=None, fmin=0,
     --------
     psd_welch, psd_multitaper
     """
-    from scipy.signal import welch
     from ..io.base import _BaseRaw
     if not isinstance(raw, _BaseRaw):
         raise ValueError('Input must be an instance of Raw')
@@ -69,32 +71,161 @@ def compute_raw_psd(raw, tmin=0., tmax=None, picks=None, fmin=0,
         # Copy first so it's not modified
         raw = raw.copy().apply_proj()
     data, times = raw[picks, start:(stop + 1)]
-    n_fft, n_overlap = _check_nfft(len(times), n_fft, n_overlap)
+    return _psd_welch(data, raw.info['sfreq'], fmin=fmin, fmax=fmax,
+                      n_fft=int(n_fft), n_overlap=n_overlap, n_jobs=n_jobs)
 
-    n_fft = int(n_fft)
-    Fs = raw.info['sfreq']
 
-    logger.info("Effective window size : %0.3f (s)" % (n_fft / float(Fs)))
+# bytes of segment spectra computed at once by _welch_sums
+_WELCH_BLOCK_BYTES = 2 ** 24
+# bytes of Raw data read at once by _iter_raw_chunks
+_RAW_CHUNK_BYTES = 2 ** 26
 
-    parallel, my_pwelch, n_jobs = parallel_func(_pwelch, n_jobs=n_jobs,
-                                                verbose=verbose)
 
-    freqs = np.arange(n_fft // 2 + 1) * (Fs / n_fft)
-    freq_mask = (freqs >= fmin) & (freqs <= fmax)
-    freqs = freqs[freq_mask]
+def _welch_window(n_fft):
+    """Helper to get the (periodic) Hann window used for Welch segments"""
+    from scipy.signal import get_window
+    return get_window('hann', n_fft)
 
-    psds = np.array(parallel(my_pwelch([channel],
-                                       noverlap=n_overlap, nfft=n_fft, fs=Fs,
-                                       freq_mask=freq_mask, welch_fun=welch)
-                             for channel in data))[:, 0, :]
 
-    return psds, freqs
+def _welch_sums(x, window, n_overlap, freq_mask):
+    """Sum the periodograms of the Welch segments of each signal
 
+    Parameters
+    ----------
+    x : ndarray, shape (n_signals, n_times)
+        The signals, whose dtype is used for the computations.
+    window : ndarray, shape (n_fft,)
+        The window applied to each segment.
+    n_overlap : int
+        The number of samples shared by consecutive segments.
+    freq_mask : ndarray of bool, shape (n_fft // 2 + 1,)
+        The frequencies to keep.
+
+    Returns
+    -------
+    sums : ndarray, shape (n_signals, n_freqs)
+        The unscaled sums of the squared magnitudes of the segment spectra,
+        with each segment detrended (constant) and windowed.
+    n_segments : int
+        The number of segments per signal.
+    """
+    n_signals, n_times = x.shape
+    n_fft = len(window)
+    step = n_fft - n_overlap
+    n_segments = max((n_times - n_overlap) // step, 0)
+    sums = np.zeros((n_signals, freq_mask.sum()), x.dtype)
+    if n_segments == 0:
+        return sums, n_segments
+    window = window.astype(x.dtype)
+    window_fft = rfft(window)[freq_mask]
+    # View of all segments, the windowed copies are made one block at a time
+    segments = as_strided(x, (n_signals, n_segments, n_fft),
+                          (x.strides[0], step * x.strides[1], x.strides[1]))
+    n_block = max(_WELCH_BLOCK_BYTES // (16 * n_fft), 1)
+    n_seg_block = min(n_segments, n_block)
+    n_sig_block = max(n_block // n_segments, 1)
+    for ii in range(0, n_signals, n_sig_block):
+        for jj in range(0, n_segments, n_seg_block):
+            this_seg = segments[ii:ii + n_sig_block, jj:jj + n_seg_block]
+            # Detrending commutes with the FFT: remove the windowed mean
+            # from the spectrum instead of from each segment
+            spectra = rfft(this_seg * window)[..., freq_mask]
+            spectra -= this_seg.mean(-1)[..., np.newaxis] * window_fft
+            power = spectra.real ** 2
+            power += spectra.imag ** 2
+            sums[ii:ii + n_sig_block] += power.sum(axis=1)
+    return sums, n_segments
+
+
+def _welch_scale(psds, window, sfreq, n_segments, freq_mask):
+    """Helper to turn periodogram sums into one-sided PSDs (in place)"""
+    n_fft = len(window)
+    scale = np.full(n_fft // 2 + 1, 2.)
+    scale[0] = 1.
+    if n_fft % 2 == 0:
+        scale[-1] = 1.
+    scale /= sfreq * (window * window).sum() * max(n_segments, 1)
+    psds *= scale[freq_mask].astype(psds.dtype)
+    return psds
+
+
+def _welch(x, sfreq, n_fft, n_overlap, freq_mask):
+    """Compute Welch PSDs of 2D data, in the dtype of the data"""
+    window = _welch_window(n_fft)
+    psds, n_segments = _welch_sums(x, window, n_overlap, freq_mask)
+    return _welch_scale(psds, window, sfreq, n_segments, freq_mask)
+
+
+def _iter_raw_chunks(raw, picks, start, stop, n_per_seg, n_overlap, dtype):
+    """Helper to read Raw data in time chunks made of whole segments
+
+    Consecutive chunks share ``n_overlap`` samples, so that each segment
+    of ``n_per_seg`` samples is in exactly one chunk.
+    """
+    step = n_per_seg - n_overlap
+    n_segments = (stop - start - n_overlap) // step
+    n_chunk = max(_RAW_CHUNK_BYTES // (8 * len(picks) * step), 1)
+    for first in range(0, n_segments, n_chunk):
+        chunk_start = start + first * step
+        chunk_stop = min(chunk_start + n_chunk * step + n_overlap, stop)
+        yield raw[picks, chunk_start:chunk_stop][0].astype(dtype, copy=False)
 
-def _pwelch(epoch, noverlap, nfft, fs, freq_mask, welch_fun):
-    """Aux function"""
-    return welch_fun(epoch, nperseg=nfft, noverlap=noverlap,
-                     nfft=nfft, fs=fs)[1][..., freq_mask]
+
+def _psd_welch_raw(raw, picks, start, stop, fmin=0, fmax=np.inf, n_fft=256,
+                   n_overlap=0, dtype=np.float64, n_jobs=1):
+    """Compute Welch PSDs of Raw data, reading it in time chunks
+
+    The periodograms are accumulated over chunks, so the data do not need
+    to be preloaded.
+    """
+    sfreq = raw.info['sfreq']
+    n_fft, n_overlap = _check_nfft(stop - start, n_fft, n_overlap)
+    logger.info("Effective window size : %0.3f (s)" % (n_fft / float(sfreq)))
+    freqs = np.arange(n_fft // 2 + 1, dtype=float) * (sfreq / n_fft)
+    freq_mask = (freqs >= fmin) & (freqs <= fmax)
+    window = _welch_window(n_fft)
+    parallel, my_welch_sums, n_jobs = parallel_func(_welch_sums, n_jobs)
+    psds = np.zeros((len(picks), freq_mask.sum()), dtype)
+    n_segments = 0
+    for data in _iter_raw_chunks(raw, picks, start, stop, n_fft, n_overlap,
+                                 dtype):
+        sums = parallel(my_welch_sums(d, window, n_overlap, freq_mask)
+                        for d in np.array_split(data, n_jobs))
+        psds += np.concatenate([ss[0] for ss in sums])
+        n_segments += sums[0][1]
+    return _welch_scale(psds, window, sfreq, n_segments, freq_mask), \
+        freqs[freq_mask]
+
+
+def _psd_multitaper_raw(raw, picks, start, stop, fmin=0, fmax=np.inf,
+                        bandwidth=None, adaptive=False, low_bias=True,
+                        normalization='length', n_per_seg=None,
+                        n_overlap=0, n_jobs=1):
+    """Compute segmented multitaper PSDs of Raw data in time chunks"""
+    if normalization not in ('length', 'full'):
+        raise ValueError('Normalization must be "length" or "full", not %s'
+                         % normalization)
+    sfreq = raw.info['sfreq']
+    n_per_seg, n_overlap = _check_n_per_seg(stop - start, n_per_seg,
+                                            n_overlap)
+    dpss, eigvals, adaptive = _compute_mt_params(n_per_seg, sfreq, bandwidth,
+                                                 low_bias, adaptive)
+    freqs, freq_mask = _mt_freqs(n_per_seg, sfreq, fmin, fmax)
+    parallel, my_mt_segment_sums, n_jobs = parallel_func(_mt_segment_sums,
+                                                         n_jobs)
+    psds = np.zeros((len(picks), freq_mask.sum()))
+    n_segments = 0
+    for data in _iter_raw_chunks(raw, picks, start, stop, n_per_seg,
+                                 n_overlap, np.float64):
+        sums = parallel(my_mt_segment_sums(d, dpss, eigvals, sfreq,
+                                           n_overlap, freq_mask, adaptive)
+                        for d in np.array_split(data, n_jobs))
+        psds += np.concatenate([ss[0] for ss in sums])
+        n_segments += sums[0][1]
+    psds /= n_segments
+    if normalization == 'full':
+        psds /= sfreq
+    return psds, freqs
 
 
 def _compute_psd(data, fmin, fmax, Fs, n_fft, psd, n_overlap, pad_to):
@@ -115,8 +246,8 @@ def _check_nfft(n, n_fft, n_overlap):
     return n_fft, n_overlap
 
 
-def _check_psd_data(inst, tmin, tmax, picks, proj):
-    """Helper to do checks on PSD data / pull arrays from inst"""
+def _check_psd_inst(inst, tmin, tmax, picks, proj):
+    """Helper to do checks on PSD data"""
     from ..io.base import _BaseRaw
     from ..epochs import _BaseEpochs
     from ..evoked import Evoked
@@ -130,6 +261,15 @@ def _check_psd_data(inst, tmin, tmax, picks, proj):
     if proj:
         # Copy first so it's not modified
         inst = inst.copy().apply_proj()
+    return inst, picks, time_mask
+
+
+def _check_psd_data(inst, tmin, tmax, picks, proj):
+    """Helper to do checks on PSD data / pull arrays from inst"""
+    from ..io.base import _BaseRaw
+    from ..epochs import _BaseEpochs
+    from ..evoked import Evoked
+    inst, picks, time_mask = _check_psd_inst(inst, tmin, tmax, picks, proj)
 
     sfreq = inst.info['sfreq']
     if isinstance(inst, _BaseRaw):
@@ -144,7 +284,7 @@ def _check_psd_data(inst, tmin, tmax, picks, proj):
 
 
 def _psd_welch(x, sfreq, fmin=0, fmax=np.inf, n_fft=256, n_overlap=0,
-               n_jobs=1):
+               dtype=np.float64, n_jobs=1):
     """Compute power spectral density (PSD) using Welch's method.
 
     x : array, shape=(..., n_times)
@@ -163,6 +303,8 @@ def _psd_welch(x, sfreq, fmin=0, fmax=np.inf, n_fft=256, n_overlap=0,
     n_overlap : int
         The number of points of overlap between blocks. Will be adjusted
         to be <= n_fft. The default value is 0.
+    dtype : dtype
+        The dtype used for the computations and the PSDs.
     n_jobs : int
         Number of CPUs to use in the computation.
 
@@ -174,10 +316,9 @@ def _psd_welch(x, sfreq, fmin=0, fmax=np.inf, n_fft=256, n_overlap=0,
     freqs : ndarray, shape (n_freqs,)
         The frequencies.
     """
-    from scipy.signal import welch
     dshape = x.shape[:-1]
     n_times = x.shape[-1]
-    x = x.reshape(-1, n_times)
+    x = x.reshape(-1, n_times).astype(dtype, copy=False)
 
     # Prep the PSD
     n_fft, n_overlap = _check_nfft(n_times, n_fft, n_overlap)
@@ -188,11 +329,9 @@ def _psd_welch(x, sfreq, fmin=0, fmax=np.inf, n_fft=256, n_overlap=0,
     freqs = freqs[freq_mask]
 
     # Parallelize across first N-1 dimensions
-    parallel, my_pwelch, n_jobs = parallel_func(_pwelch, n_jobs=n_jobs)
+    parallel, my_welch, n_jobs = parallel_func(_welch, n_jobs=n_jobs)
     x_splits = np.array_split(x, n_jobs)
-    f_psd = parallel(my_pwelch(d, noverlap=n_overlap, nfft=n_fft,
-                     fs=sfreq, freq_mask=freq_mask,
-                     welch_fun=welch)
+    f_psd = parallel(my_welch(d, sfreq, n_fft, n_overlap, freq_mask)
                      for d in x_splits)
 
     # Combining/reshaping to original data shape
@@ -203,7 +342,8 @@ def _psd_welch(x, sfreq, fmin=0, fmax=np.inf, n_fft=256, n_overlap=0,
 
 @verbose
 def psd_welch(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None, n_fft=256,
-              n_overlap=0, picks=None, proj=False, n_jobs=1, verbose=None):
+              n_overlap=0, picks=None, proj=False, n_jobs=1,
+              dtype=np.float64, verbose=None):
     """Compute the power spectral density (PSD) using Welch's method.
 
     Calculates periodigrams for a sliding window over the
@@ -236,6 +376,9 @@ def psd_welch(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None, n_fft=256,
         Apply SSP projection vectors. If inst is ndarray this is not used.
     n_jobs : int
         Number of CPUs to use in the computation.
+    dtype : dtype
+        The dtype used for the computations and the PSDs. Using
+        ``np.float32`` halves the memory needed.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
 
@@ -254,19 +397,30 @@ def psd_welch(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None, n_fft=256,
 
     Notes
     -----
+    Raw data are read and processed in time chunks, so they do not need to
+    be preloaded.
+
     .. versionadded:: 0.12.0
     """
+    from ..io.base import _BaseRaw
+    if isinstance(inst, _BaseRaw):
+        inst, picks, time_mask = _check_psd_inst(inst, tmin, tmax, picks,
+                                                 proj)
+        start, stop = np.where(time_mask)[0][[0, -1]]
+        return _psd_welch_raw(inst, picks, start, stop + 1, fmin=fmin,
+                              fmax=fmax, n_fft=n_fft, n_overlap=n_overlap,
+                              dtype=dtype, n_jobs=n_jobs)
     # Prep data
     data, sfreq = _check_psd_data(inst, tmin, tmax, picks, proj)
     return _psd_welch(data, sfreq, fmin=fmin, fmax=fmax, n_fft=n_fft,
-                      n_overlap=n_overlap, n_jobs=n_jobs)
+                      n_overlap=n_overlap, dtype=dtype, n_jobs=n_jobs)
 
 
 @verbose
 def psd_multitaper(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None,
                    bandwidth=None, adaptive=False, low_bias=True,
                    normalization='length', picks=None, proj=False,
-                   n_jobs=1, verbose=None):
+                   n_jobs=1, n_per_seg=None, n_overlap=0, verbose=None):
     """Compute the power spectral density (PSD) using multitapers.
 
     Calculates spectral density for orthogonal tapers, then averages them
@@ -305,6 +459,14 @@ def psd_multitaper(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None,
         Apply SSP projection vectors. If inst is ndarray this is not used.
     n_jobs : int
         Number of CPUs to use in the computation.
+    n_per_seg : int | None
+        If not None, the data are split into segments of ``n_per_seg``
+        samples, and the multitaper PSDs of the segments are averaged as
+        in Welch's method. ``bandwidth`` then applies to the segments.
+        If None (default), the tapers span the whole data.
+    n_overlap : int
+        The number of points of overlap between segments. Only used if
+        ``n_per_seg`` is not None. The default value is 0.
     verbose : bool, str, int, or None
         If not None, override default verbose level (see mne.verbose).
 
@@ -333,14 +495,29 @@ def psd_multitaper(inst, fmin=0, fmax=np.inf, tmin=None, tmax=None,
 
     Notes
     -----
+    With ``n_per_seg``, the tapers and spectra are only as long as the
+    segments, and Raw data are read and processed in time chunks, so long
+    recordings do not need to be preloaded.
+
     .. versionadded:: 0.12.0
     """
+    from ..io.base import _BaseRaw
+    if isinstance(inst, _BaseRaw) and n_per_seg is not None:
+        inst, picks, time_mask = _check_psd_inst(inst, tmin, tmax, picks,
+                                                 proj)
+        start, stop = np.where(time_mask)[0][[0, -1]]
+        return _psd_multitaper_raw(
+            inst, picks, start, stop + 1, fmin=fmin, fmax=fmax,
+            bandwidth=bandwidth, adaptive=adaptive, low_bias=low_bias,
+            normalization=normalization, n_per_seg=n_per_seg,
+            n_overlap=n_overlap, n_jobs=n_jobs)
     # Prep data
     data, sfreq = _check_psd_data(inst, tmin, tmax, picks, proj)
     return _psd_multitaper(data, sfreq, fmin=fmin, fmax=fmax,
                            bandwidth=bandwidth, adaptive=adaptive,
                            low_bias=low_bias,
-                           normalization=normalization,  n_jobs=n_jobs)
+                           normalization=normalization, n_per_seg=n_per_seg,
+                           n_overlap=n_overlap, n_jobs=n_jobs)
 
 
 @deprecated('This will be deprecated in release v0.12, see psd_welch.')
@@ -391,15 +568,11 @@ def compute_epochs_psd(epochs, picks=None, fmin=0, fmax=np.inf, tmin=None,
     --------
     psd_welch, psd_multitaper
     """
-    from scipy.signal import welch
     from ..epochs import _BaseEpochs
     if not isinstance(epochs, _BaseEpochs):
         raise ValueError("Input must be an instance of Epochs")
-    n_fft = int(n_fft)
-    Fs = epochs.info['sfreq']
     if picks is None:
         picks = _pick_data_channels(epochs.info, with_ref_meg=False)
-    n_fft, n_overlap = _check_nfft(len(epochs.times), n_fft, n_overlap)
 
     if tmin is not None or tmax is not None:
         time_mask = _time_mask(epochs.times, tmin, tmax,
@@ -410,25 +583,5 @@ def compute_epochs_psd(epochs, picks=None, fmin=0, fmax=np.inf, tmin=None,
         # Copy first so it's not modified
         epochs = epochs.copy().apply_proj()
     data = epochs.get_data()[:, picks][:, :, time_mask]
-
-    logger.info("Effective window size : %0.3f (s)" % (n_fft / float(Fs)))
-
-    freqs = np.arange(n_fft // 2 + 1, dtype=float) * (Fs / n_fft)
-    freq_mask = (freqs >= fmin) & (freqs <= fmax)
-    freqs = freqs[freq_mask]
-    psds = np.empty(data.shape[:-1] + (freqs.size,))
-
-    parallel, my_pwelch, n_jobs = parallel_func(_pwelch, n_jobs=n_jobs,
-                                                verbose=verbose)
-
-    for idx, fepochs in zip(np.array_split(np.arange(len(data)), n_jobs),
-                            parallel(my_pwelch(epoch, noverlap=n_overlap,
-                                               nfft=n_fft, fs=Fs,
-                                               freq_mask=freq_mask,
-                                               welch_fun=welch)
-                                     for epoch in np.array_split(data,
-                                                                 n_jobs))):
-        for i_epoch, f_epoch in zip(idx, fepochs):
-            psds[i_epoch, :, :] = f_epoch
-
-    return psds, freqs
+    return _psd_welch(data, epochs.info['sfreq'], fmin=fmin, fmax=fmax,
+                      n_fft=int(n_fft), n_overlap=n_overlap, n_jobs=n_jobs)
@@ -1,6 +1,6 @@
 import numpy as np
 from nose.tools import assert_raises, assert_equal, assert_true
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 from os import path as op
 import warnings
 
@@ -9,6 +9,7 @@ import mne
 from mne.io import Raw
 from mne.utils import sum_squared
 from mne.time_frequency import compute_epochs_csd, tfr_morlet
+from mne.time_frequency.multitaper import _mt_spectra, _csd_from_mt
 
 warnings.simplefilter('always')
 base_dir = op.join(op.dirname(__file__), '..', '..', 'io', 'tests', 'data')
@@ -110,6 +111,46 @@ def test_compute_epochs_csd():
     assert_array_equal(csd_fsum.data, csd_sum)
 
 
+def test_compute_epochs_csd_compact():
+    """Test computing CSD of many frequencies with packed storage
+    """
+    rng = np.random.RandomState(0)
+    data = rng.randn(7, 4, 200)
+    epochs = mne.EpochsArray(data, mne.create_info(4, 100., 'eeg'),
+                             baseline=(None, None))
+    for mode in ('multitaper', 'fourier'):
+        csd = compute_epochs_csd(epochs, mode=mode, fmin=5, fmax=30,
+                                 fsum=False, compact=True)
+        csds = compute_epochs_csd(epochs, mode=mode, fmin=5, fmax=30,
+                                  fsum=False, n_jobs=2)
+        csd_fsum = compute_epochs_csd(epochs, mode=mode, fmin=5, fmax=30)
+        assert_true(csd.packed)
+        assert_equal(len(csd), len(csds))
+        assert_equal(csd.data.shape, (10, len(csds)))
+        assert_array_equal(csd.frequencies,
+                           [this_csd.frequencies[0] for this_csd in csds])
+        csd_data = csd.get_data()
+        assert_equal(csd_data.shape, (4, 4, len(csds)))
+        assert_array_equal(csd_data, csd_data.transpose(1, 0, 2).conj())
+        for ii, this_csd in enumerate(csds):
+            assert_allclose(csd[ii].data, this_csd.data, rtol=1e-12)
+            assert_allclose(csd.get_data(ii), this_csd.data, rtol=1e-12)
+        assert_allclose(csd_data.sum(axis=-1), csd_fsum.data, rtol=1e-12)
+
+    # compare with the CSD computed one epoch at a time
+    window_fun, eigvals = mne.time_frequency.dpss_windows(200, 2, 4)
+    x_mt, freqs = _mt_spectra(data.reshape(-1, 200), window_fun, 100.)
+    freq_mask = (freqs > 5) & (freqs < 30)
+    x_mt = x_mt[:, :, freq_mask].reshape(7, 4, len(eigvals), -1)
+    weights = np.sqrt(eigvals)[np.newaxis, :, np.newaxis]
+    csd_ref = np.mean([_csd_from_mt(x[:, np.newaxis], x[np.newaxis],
+                                    weights, weights) for x in x_mt], axis=0)
+    csd = compute_epochs_csd(epochs, fmin=5, fmax=30, fsum=False,
+                             compact=True)
+    assert_allclose(csd.get_data(), csd_ref / 100., rtol=1e-12)
+    assert_raises(TypeError, csd_fsum.__getitem__, 0)
+
+
 def test_compute_epochs_csd_on_artificial_data():
     """Test computing CSD on artificial data
     """
@@ -127,6 +168,10 @@ def test_compute_epochs_csd_on_artificial_data():
     mt_power = np.abs(data_csd_mt.data[0, 0]) * sfreq
     assert_true(abs(fourier_power - signal_power) <= 0.5)
     assert_true(abs(mt_power - signal_power) <= 1)
+    data_csd_mt = compute_epochs_csd(epochs_sin, mode='multitaper',
+                                     mt_adaptive=True)
+    mt_power = np.abs(data_csd_mt.data[0, 0]) * sfreq
+    assert_true(abs(mt_power - signal_power) <= 1)
 
     # Power per sample should not depend on time window length
     for tmax in [0.2, 0.4, 0.6, 0.8]:
@@ -1,10 +1,11 @@
 import numpy as np
-from nose.tools import assert_raises
-from numpy.testing import assert_array_almost_equal
+from nose.tools import assert_raises, assert_equal
+from numpy.testing import assert_array_almost_equal, assert_allclose
 from distutils.version import LooseVersion
 
 from mne.time_frequency import psd_multitaper
-from mne.time_frequency.multitaper import dpss_windows
+from mne.time_frequency.multitaper import (dpss_windows, _mt_spectra,
+                                           _psd_from_mt_adaptive)
 from mne.utils import requires_nitime
 from mne.io import RawArray
 from mne import create_info
@@ -60,3 +61,37 @@ def test_multitaper_psd():
         # causing the value at 0 to be different
         assert_array_almost_equal(psd[:, 1:], psd_ni[:, 1:-1], decimal=3)
         assert_array_almost_equal(freqs, freqs_ni[:-1])
+
+
+def test_psd_from_mt_adaptive():
+    """Test adaptive weighting of tapered spectra across signals"""
+    rng = np.random.RandomState(0)
+    x = rng.randn(4, 500) + np.sin(np.arange(500) * 0.3)
+    dpss, eigvals = dpss_windows(500, 4, 8)
+    x_mt, freqs = _mt_spectra(x, dpss, 500.)
+    freq_mask = freqs > 10
+    psd, weights = _psd_from_mt_adaptive(x_mt, eigvals, freq_mask,
+                                         return_weights=True)
+    assert_equal(psd.shape, (4, freq_mask.sum()))
+    assert_equal(weights.shape, (4, len(eigvals), freq_mask.sum()))
+    # each signal and frequency is iterated until its own convergence
+    for ii in range(len(x)):
+        psd_1, weights_1 = _psd_from_mt_adaptive(
+            x_mt[ii:ii + 1], eigvals, freq_mask, return_weights=True)
+        assert_array_almost_equal(psd[ii:ii + 1], psd_1, 12)
+        assert_array_almost_equal(weights[ii:ii + 1], weights_1, 12)
+    # reference values from the former loop over signals and frequencies,
+    # which stopped iterating at a slightly different convergence
+    idx = [0, 10, 100]
+    assert_allclose(psd[:, idx],
+                    [[1.586076005, 35.29688188, 1.730271462],
+                     [1.093268420, 35.38299074, 1.581106938],
+                     [1.957097268, 28.63508536, 2.737595245],
+                     [2.149768554, 39.20712318, 2.395929686]], rtol=1e-5)
+    assert_allclose(weights[:, -1, idx],
+                    [[0.9726956882, 1.030372866, 0.9774700749],
+                     [0.9460263543, 1.030320131, 0.9713271552],
+                     [0.9865750644, 1.029924887, 0.9994483702],
+                     [0.9860474771, 1.030550210, 0.9906979247]], rtol=1e-5)
+    assert_raises(ValueError, _psd_from_mt_adaptive, x_mt, eigvals[:-1],
+                  freq_mask)
@@ -1,14 +1,18 @@
 import numpy as np
 import warnings
 import os.path as op
-from numpy.testing import assert_array_almost_equal, assert_raises
-from nose.tools import assert_true
+from numpy.testing import (assert_array_almost_equal, assert_raises,
+                           assert_allclose)
+from nose.tools import assert_true, assert_equal
 
-from mne import io, pick_types, Epochs, read_events
+from mne import io, pick_types, Epochs, read_events, create_info
 from mne.io import RawArray
-from mne.utils import requires_version, slow_test
+from mne.utils import requires_version, slow_test, _TempDir
 from mne.time_frequency import (compute_raw_psd, compute_epochs_psd,
                                 psd_welch, psd_multitaper)
+from mne.time_frequency import psd as psd_mod
+from mne.time_frequency.psd import _psd_welch
+from mne.time_frequency.multitaper import _psd_multitaper
 
 base_dir = op.join(op.dirname(__file__), '..', '..', 'io', 'tests', 'data')
 raw_fname = op.join(base_dir, 'test_raw.fif')
@@ -138,6 +142,79 @@ def test_psd():
         assert_true(len(w), 3)
 
 
+@requires_version('scipy', '0.12')
+def test_psd_welch_scipy():
+    """Test native Welch PSD against scipy.signal.welch
+    """
+    from scipy.signal import welch
+    rng = np.random.RandomState(0)
+    x = rng.randn(2, 3, 1000) + 1.
+    for n_fft, n_overlap in ((256, 0), (255, 100), (128, 127)):
+        psds, freqs = _psd_welch(x, 250., fmin=3, fmax=100, n_fft=n_fft,
+                                 n_overlap=n_overlap)
+        freqs_sp, psds_sp = welch(x, fs=250., nperseg=n_fft,
+                                  noverlap=n_overlap)
+        mask = (freqs_sp >= 3) & (freqs_sp <= 100)
+        assert_allclose(freqs, freqs_sp[mask])
+        assert_allclose(psds, psds_sp[..., mask], rtol=1e-10)
+        psds_32, _ = _psd_welch(x, 250., fmin=3, fmax=100, n_fft=n_fft,
+                                n_overlap=n_overlap, dtype=np.float32)
+        assert_equal(psds_32.dtype, np.float32)
+        assert_allclose(psds_32, psds, rtol=1e-4)
+
+    # Raw data are read in chunks, without preloading
+    tempdir = _TempDir()
+    fname = op.join(tempdir, 'test_raw.fif')
+    RawArray(rng.randn(3, 5000), create_info(3, 250., 'eeg')).save(fname)
+    raw = io.read_raw_fif(fname)
+    data = raw[:, 250:4001][0]
+    chunk_bytes = psd_mod._RAW_CHUNK_BYTES
+    try:
+        psd_mod._RAW_CHUNK_BYTES = 10000
+        psds, freqs = psd_welch(raw, tmin=1, tmax=16, n_fft=300,
+                                n_overlap=77)
+    finally:
+        psd_mod._RAW_CHUNK_BYTES = chunk_bytes
+    assert_true(not raw.preload)
+    freqs_sp, psds_sp = welch(data, fs=250., nperseg=300, noverlap=77)
+    assert_allclose(freqs, freqs_sp)
+    assert_allclose(psds, psds_sp, rtol=1e-10)
+
+
+def test_psd_multitaper_segments():
+    """Test multitaper PSD averaged over segments
+    """
+    rng = np.random.RandomState(0)
+    data = rng.randn(3, 2000)
+    for adaptive in (False, True):
+        psds, freqs = _psd_multitaper(data, 250., fmin=2, fmax=80,
+                                      adaptive=adaptive, n_per_seg=200,
+                                      n_overlap=50)
+        psds_seg = [_psd_multitaper(data[:, start:start + 200], 250.,
+                                    fmin=2, fmax=80, adaptive=adaptive)
+                    for start in range(0, 1801, 150)]
+        assert_allclose(freqs, psds_seg[0][1])
+        assert_allclose(psds, np.mean([p[0] for p in psds_seg], axis=0),
+                        rtol=1e-10)
+
+    # Raw data are read in chunks, without preloading
+    tempdir = _TempDir()
+    fname = op.join(tempdir, 'test_raw.fif')
+    RawArray(data, create_info(3, 250., 'eeg')).save(fname)
+    raw = io.read_raw_fif(fname)
+    chunk_bytes = psd_mod._RAW_CHUNK_BYTES
+    try:
+        psd_mod._RAW_CHUNK_BYTES = 10000
+        psds, freqs = psd_multitaper(raw, n_per_seg=200, n_overlap=50)
+    finally:
+        psd_mod._RAW_CHUNK_BYTES = chunk_bytes
+    assert_true(not raw.preload)
+    psds_arr, freqs_arr = _psd_multitaper(raw[:, :][0], 250., n_per_seg=200,
+                                          n_overlap=50)
+    assert_allclose(freqs, freqs_arr)
+    assert_allclose(psds, psds_arr, rtol=1e-10)
+
+
 @slow_test
 @requires_version('scipy', '0.12')
 def test_compares_psd():
@@ -14,7 +14,8 @@ from scipy import fftpack
 
 from mne import io, read_events, Epochs, pick_types
 from mne.time_frequency._stockwell import (tfr_stockwell, _st,
-                                           _precompute_st_windows)
+                                           _precompute_st_windows,
+                                           _induced_power_stockwell)
 from mne.time_frequency.tfr import AverageTFR
 
 base_dir = op.join(op.dirname(__file__), '..', '..', 'io', 'tests', 'data')
@@ -74,6 +75,30 @@ def test_stockwell_core():
     assert_array_almost_equal(pulse, y_inv)
 
 
+def test_stockwell_power_itc():
+    """Test batched and decimated stockwell power and ITC"""
+    sfreq = 1000.
+    rng = np.random.RandomState(0)
+    for n_times, n_fft in ((300, 512), (256, 256)):
+        data = rng.randn(5, 2, n_times)
+        freqs = fftpack.fftfreq(n_fft, 1. / sfreq)
+        start_f, stop_f = [np.abs(freqs - f).argmin() for f in (10., 100.)]
+        W = _precompute_st_windows(n_fft, start_f, stop_f, sfreq, 1.)
+        data_pad = np.concatenate(
+            [data, np.zeros((5, 2, n_fft - n_times))], axis=-1)
+        st = _st(data_pad, start_f, W)[..., :n_times]
+        power = np.mean(np.abs(st) ** 2, axis=0)
+        itc = np.abs(np.mean(st / np.abs(st), axis=0))
+        for decim in (1, 2, 3):
+            with warnings.catch_warnings(record=True):  # zero padding
+                power_st, itc_st, freqs_st = _induced_power_stockwell(
+                    data, sfreq, 10., 100., n_fft=n_fft, decim=decim,
+                    return_itc=True)
+            assert_allclose(freqs_st, freqs[start_f:stop_f])
+            assert_allclose(power_st, power[..., ::decim], rtol=1e-10)
+            assert_allclose(itc_st, itc[..., ::decim], rtol=1e-10)
+
+
 def test_stockwell_api():
     """Test stockwell functions"""
     epochs = Epochs(raw, events,  # XXX pick 2 has epochs of zeros.
@@ -11,7 +11,7 @@ from mne.time_frequency import single_trial_power
 from mne.time_frequency.tfr import (cwt_morlet, morlet, tfr_morlet,
                                     _dpss_wavelet, tfr_multitaper,
                                     AverageTFR, read_tfrs, write_tfrs,
-                                    combine_tfr, cwt)
+                                    combine_tfr, cwt, tfr_morlet_stream)
 
 import matplotlib
 matplotlib.use('Agg')  # for testing don't use X server
@@ -30,6 +30,12 @@ def test_morlet():
     assert_true(np.abs(np.mean(np.real(Wz[0]))) < 1e-5)
     assert_true(np.abs(np.mean(np.real(W[0]))) > 1e-3)
 
+    # the wavelets are cached, modifying them must not affect later calls
+    W[0][:] = 0.
+    assert_array_equal(morlet(1000, [10], 2., zero_mean=False)[0],
+                       morlet(1000., np.array([10.]), [2.])[0])
+    assert_true(np.abs(morlet(1000, [10], 2., zero_mean=False)[0]).max() > 0)
+
 
 def test_time_frequency():
     """Test time frequency transform (PSD and phase lock)
@@ -208,6 +214,112 @@ def test_time_frequency():
                   decim='decim')
 
 
+def test_cwt():
+    """Test batched FFT-based cwt against temporal convolutions"""
+    from mne.time_frequency import tfr
+    rng = np.random.RandomState(0)
+    sfreq = 200.
+    freqs = np.array([2., 5., 10., 40., 80.])
+    # very different wavelet lengths give several FFT lengths
+    Ws = morlet(sfreq, freqs, n_cycles=2.)
+    assert_true(len(tfr._cwt_fft_groups(400, Ws)) > 1)
+    X = rng.randn(7, 400)
+    block_bytes = tfr._CWT_BLOCK_BYTES
+    try:
+        for block in (block_bytes, 2 ** 12):  # blocks of signals and freqs
+            tfr._CWT_BLOCK_BYTES = block
+            for x in (X, X + 1j * rng.randn(*X.shape)):
+                tfr_full = cwt(x, Ws, use_fft=False)
+                # only the decimated samples are computed
+                for decim in (slice(None, None, 3), slice(None, None, 10),
+                              slice(5, 300, 7), slice(2, 3)):
+                    for use_fft in (True, False):
+                        assert_array_almost_equal(
+                            cwt(x, Ws, use_fft=use_fft, decim=decim),
+                            tfr_full[..., decim])
+                assert_array_almost_equal(cwt(x, Ws, decim=1), tfr_full)
+    finally:
+        tfr._CWT_BLOCK_BYTES = block_bytes
+    # decimation of the valid part of the convolutions
+    Ws_valid = [rng.randn(n_w) + 1j * rng.randn(n_w)
+                for n_w in (36, 37, 100, 101)]
+    for n_times in (998, 999, 1000, 1001):
+        x = rng.randn(2, n_times)
+        for use_fft in (True, False):
+            tfr_valid = cwt(x, Ws_valid, use_fft=use_fft, mode='valid')
+            for ii, W in enumerate(Ws_valid):
+                valid = tfr_valid[:, ii, (W.size - 1) // 2:]
+                assert_array_almost_equal(
+                    valid[:, :n_times - W.size + 1],
+                    [np.convolve(xx, W, 'valid') for xx in x])
+            for decim in (2, 3, 4, 5, slice(5, None, 4)):
+                sl = decim if isinstance(decim, slice) else \
+                    slice(None, None, decim)
+                tfr_decim = cwt(x, Ws_valid, use_fft=use_fft, mode='valid',
+                                decim=decim)
+                assert_array_almost_equal(tfr_decim, tfr_valid[..., sl])
+    power = single_trial_power(X.reshape(1, 7, 400), sfreq, freqs,
+                               n_cycles=2., n_jobs=2)
+    assert_array_almost_equal(power[0], np.abs(cwt(X, Ws)) ** 2)
+
+
+def test_tfr_morlet_stream():
+    """Test streaming statistics of single-trial TFRs"""
+    rng = np.random.RandomState(0)
+    data = rng.randn(40, 3, 200)
+    info = create_info(3, 100., 'eeg')
+    epochs = EpochsArray(data, info, tmin=-0.5)
+    freqs = np.array([8., 10., 12., 20., 30.])
+    out = tfr_morlet_stream(epochs, freqs, 3., stats=(
+        'power', 'itc', 'var', 'band_power', 'quantile'),
+        bands=[(8, 12), (20, 30)], quantiles=(0.5,), decim=2, picks=[0, 2])
+    power, itc = tfr_morlet(epochs, freqs, 3., decim=2, picks=[0, 2])
+    assert_array_almost_equal(out['power'].data, power.data)
+    assert_array_almost_equal(out['itc'].data, itc.data)
+    assert_equal(out['power'].nave, 40)
+    single_power = single_trial_power(data[:, [0, 2]], 100., freqs,
+                                      n_cycles=3., decim=2, zero_mean=True)
+    assert_array_almost_equal(out['var'].data,
+                              np.var(single_power, axis=0, ddof=1))
+    assert_array_almost_equal(out['band_power'].data[:, 1],
+                              single_power[:, :, 3:].mean(axis=(0, 2)))
+    assert_array_equal(out['band_power'].freqs, [10., 25.])
+    median = np.median(single_power, axis=0)
+    assert_true(np.median(np.abs(out['quantile'][0].data - median) /
+                          median) < 0.2)
+    # epochs read one at a time from the raw data
+    raw = io.RawArray(data.transpose(1, 0, 2).reshape(3, -1), info)
+    events = np.c_[np.arange(50, 8000, 200), np.zeros(40, int),
+                   np.ones(40, int)]
+    epochs_raw = Epochs(raw, events, tmin=-0.5, tmax=0.99, baseline=None,
+                        add_eeg_ref=False, preload=False)
+    assert_false(epochs_raw.preload)
+    out_raw = tfr_morlet_stream(epochs_raw, freqs, 3.,
+                                stats=('power', 'itc', 'var'), decim=2,
+                                picks=[0, 2])
+    assert_false(epochs_raw.preload)
+    epochs_raw.load_data()
+    power, itc = tfr_morlet(epochs_raw, freqs, 3., decim=2, picks=[0, 2])
+    assert_equal(out_raw['power'].nave, len(epochs_raw))
+    assert_array_almost_equal(out_raw['power'].data, power.data)
+    assert_array_almost_equal(out_raw['itc'].data, itc.data)
+    single_power = single_trial_power(epochs_raw.get_data()[:, [0, 2]],
+                                      100., freqs, n_cycles=3., decim=2,
+                                      zero_mean=True)
+    assert_array_almost_equal(out_raw['var'].data,
+                              np.var(single_power, axis=0, ddof=1))
+    # evoked data
+    out = tfr_morlet_stream(epochs.average(), freqs, 3., stats=['power'],
+                            picks=[0])
+    assert_equal(out['power'].data.shape, (1, len(freqs), 200))
+    assert_raises(ValueError, tfr_morlet_stream, epochs, freqs, 3.,
+                  stats=['foo'])
+    assert_raises(ValueError, tfr_morlet_stream, epochs, freqs, 3.,
+                  stats=['band_power'])
+    assert_raises(ValueError, tfr_morlet_stream, epochs, freqs, 3.,
+                  stats=['band_power'], bands=[(40, 45)])
+
+
 def test_dpsswavelet():
     """Test DPSS wavelet"""
     freqs = np.arange(5, 25, 3)
@@ -350,6 +462,70 @@ def test_io():
     assert_raises(ValueError, read_tfrs, fname, condition='nonono')
 
 
+@requires_h5py
+def test_io_lazy():
+    """Test reading TFRs without preloading"""
+    import matplotlib.pyplot as plt
+    from mne.time_frequency import tfr as tfr_module
+    tempdir = _TempDir()
+    fname = op.join(tempdir, 'test-tfr.h5')
+    rng = np.random.RandomState(0)
+    info = mne.create_info(['Fz', 'Cz', 'Pz', 'C3', 'C4'], 1000., 'eeg',
+                           montage='standard_1020')
+    times = np.arange(10) / 1000. - 0.004
+    tfrs = [AverageTFR(info, rng.randn(5, 3, 10), times, np.arange(1., 4.),
+                       nave=10, comment=comment)
+            for comment in ('a', 'b')]
+    write_tfrs(fname, tfrs)
+
+    chunk_bytes = tfr_module._TFR_CHUNK_BYTES
+    tfr_module._TFR_CHUNK_BYTES = 2 * 3 * 10 * 8  # read two channels at once
+    try:
+        tfr = read_tfrs(fname, condition='a', preload=False)
+        assert_false(tfr.preload)
+        assert_true('channels : 5' in repr(tfr))
+        tfr.crop(-0.002, 0.004)
+        tfr.apply_baseline((None, 0), mode='zscore')
+        tfr.crop(None, 0.003)
+        assert_false(tfr.preload)
+        tfr_b = read_tfrs(fname, condition='b', preload=False)
+        tfr_b.crop(-0.002, 0.003)
+        tfr_sum = tfr_b.copy().crop(None, 0.002) + tfrs[1].copy().crop(
+            -0.002, 0.002)
+        assert_false(tfr_b.preload)
+        assert_array_almost_equal(tfr_sum.data, 2 * tfrs[1].data[:, :, 2:7])
+        tfr_comb = combine_tfr([tfr, tfr_b], weights=[0.5, -0.5])
+        fig = tfr.plot_topomap(baseline=(None, 0), tmin=0.)
+        assert_false(tfr.preload)
+        tfr_ref = tfrs[0].copy().crop(-0.002, 0.004)
+        tfr_ref.apply_baseline((None, 0), mode='zscore')
+        tfr_ref.crop(None, 0.003)
+        fig_ref = tfr_ref.plot_topomap(baseline=(None, 0), tmin=0.)
+        assert_array_equal(fig.axes[0].images[0].get_array(),
+                           fig_ref.axes[0].images[0].get_array())
+        plt.close('all')
+        assert_array_almost_equal(
+            tfr_comb.data, 0.5 * (tfr_ref.data - tfrs[1].data[:, :, 2:8]))
+        # writing reads the data in chunks
+        fname_2 = op.join(tempdir, 'test2-tfr.h5')
+        write_tfrs(fname_2, tfr, dtype=np.float32)
+        assert_false(tfr.preload)
+        assert_array_almost_equal(tfr.data, tfr_ref.data)
+        assert_true(tfr.preload)
+    finally:
+        tfr_module._TFR_CHUNK_BYTES = chunk_bytes
+    tfr_32 = read_tfrs(fname_2, condition='a')
+    assert_equal(tfr_32.data.dtype, np.float32)
+    assert_array_almost_equal(tfr_32.data, tfr_ref.data, decimal=5)
+    tfr_32 = read_tfrs(fname_2, condition='a', preload=False)
+    tfr_32 = combine_tfr([tfr_32, tfr_32])
+    assert_equal(tfr_32.data.dtype, np.float32)
+    # overwriting the file the data are read from
+    tfr = read_tfrs(fname, condition='b', preload=False)
+    write_tfrs(fname, tfr, overwrite=True)
+    assert_array_equal(read_tfrs(fname, condition='b').data, tfrs[1].data)
+
+
 def test_plot():
     """Test TFR plotting."""
     import matplotlib.pyplot as plt
@@ -10,20 +10,21 @@ Morlet code inspired by Matlab code from Sheraz Khan & Brainstorm & SPM
 
 from copy import deepcopy
 from math import sqrt
+import os.path as op
 
 import numpy as np
 from scipy import linalg
-from scipy.fftpack import fftn, ifftn
 
-from ..fixes import partial
+from ..fft import fft, ifft, rfft
+from ..fixes import partial, get_next_fast_len
 from ..baseline import rescale
 from ..parallel import parallel_func
 from ..utils import (logger, verbose, _time_mask, warn, check_fname,
-                     _check_copy_dep)
+                     _check_copy_dep, object_hash)
 from ..channels.channels import ContainsMixin, UpdateChannelsMixin
 from ..io.pick import pick_info, pick_types
 from ..io.meas_info import Info
-from .multitaper import dpss_windows
+from .multitaper import dpss_windows, _bank_cache, _bank_key
 from ..viz.utils import figure_nobar, plt_show
 from ..externals.h5io import write_hdf5, read_hdf5
 from ..externals.six import string_types
@@ -75,7 +76,21 @@ def morlet(sfreq, freqs, n_cycles=7, sigma=None, zero_mean=False):
     --------
     mne.time_frequency.cwt_morlet : Compute time-frequency decomposition
                                     with Morlet wavelets
+
+    Notes
+    -----
+    The wavelets are cached, so they are only computed once for a given set
+    of parameters.
     """
+    key = _bank_key('morlet', float(sfreq), np.asarray(freqs, float),
+                    np.asarray(n_cycles, float), sigma, zero_mean)
+    Ws = _bank_cache(key, partial(_morlet, sfreq, freqs, n_cycles, sigma,
+                                  zero_mean))
+    return [W.copy() for W in Ws]
+
+
+def _morlet(sfreq, freqs, n_cycles, sigma, zero_mean):
+    """Aux function to compute Morlet wavelets, see morlet"""
     Ws = list()
     n_cycles = np.atleast_1d(n_cycles)
 
@@ -131,6 +146,16 @@ def _dpss_wavelet(sfreq, freqs, n_cycles=7, time_bandwidth=4.0,
     Ws : list of array
         Wavelets time series
     """
+    key = _bank_key('dpss_wavelet', float(sfreq), np.asarray(freqs, float),
+                    np.asarray(n_cycles, float), float(time_bandwidth),
+                    zero_mean)
+    Ws = _bank_cache(key, partial(_compute_dpss_wavelet, sfreq, freqs,
+                                  n_cycles, time_bandwidth, zero_mean))
+    return [[W.copy() for W in Wm] for Wm in Ws]
+
+
+def _compute_dpss_wavelet(sfreq, freqs, n_cycles, time_bandwidth, zero_mean):
+    """Aux function to compute DPSS wavelets, see _dpss_wavelet"""
     Ws = list()
     if time_bandwidth < 2.0:
         raise ValueError("time_bandwidth should be >= 2.0 for good tapers")
@@ -182,9 +207,100 @@ def _centered(arr, newsize):
     return arr[tuple(myslice)]
 
 
+# memory used by the spectra of a block of signals and wavelets in _cwt,
+# small blocks are faster as they stay in the cache
+_CWT_BLOCK_BYTES = 2 ** 20
+
+
+def _cwt_fft_groups(n_times, Ws, step=1):
+    """Aux function to group wavelets sharing an FFT length
+
+    Each wavelet gets the next fast FFT length that fits the linear
+    convolution (and is a multiple of the decimation step). Starting from
+    the longest wavelet, wavelets are put in the same group as long as their
+    own length is not much smaller than the group one, so that short
+    wavelets do not pay for the longest one while the signals are only
+    transformed once per group.
+    """
+    next_fast_len = get_next_fast_len()
+    fsizes = np.array([step * next_fast_len(-(-(n_times + W.size - 1) // step))
+                       for W in Ws])
+    groups = list()
+    for ii in np.argsort(fsizes)[::-1]:
+        if len(groups) == 0 or fsizes[ii] < 0.75 * groups[-1][0]:
+            groups.append((fsizes[ii], list()))
+        groups[-1][1].append(ii)
+    return groups
+
+
+def _cwt_fft_bank(n_times, Ws, start=None, step=1):
+    """Aux function to compute the spectra of wavelets for _cwt
+
+    If start is not None, the spectra are shifted so that the inverse FFT
+    starts at the sample start of the centered ('same') convolution.
+    """
+    groups = list()
+    for fsize, idx in _cwt_fft_groups(n_times, Ws, step):
+        fft_Ws = np.array([fft(Ws[ii], fsize) for ii in idx])
+        if start is not None:
+            shifts = np.array([(Ws[ii].size - 1) // 2 + start for ii in idx])
+            fft_Ws *= np.exp(2j * np.pi * np.arange(fsize) *
+                             shifts[:, np.newaxis] / float(fsize))
+        groups.append((fsize, idx, fft_Ws))
+    return groups
+
+
+def _decim_start_step(n_times, decim):
+    """Aux function to get the first sample and the step of a decimation
+
+    Returns None if the decimated samples are not regularly increasing.
+    """
+    idx = np.arange(n_times)[decim]
+    if len(idx) == 0:
+        return None
+    step = idx[1] - idx[0] if len(idx) > 1 else 1
+    if step < 1:
+        return None
+    return idx[0], step
+
+
+def _convolve_decim(x, W, start, step, n_out):
+    """Aux function for the centered convolution at decimated samples only
+
+    Computes np.convolve(x, W, mode='same')[start::step][:n_out] for all
+    signals in x. The wavelet is split in step polyphase components, each
+    convolved with the matching decimated signals, so only the output
+    samples are evaluated. The signals are concatenated to do a single
+    convolution per component.
+    """
+    n_w = W.size
+    x_pad = np.zeros((len(x), x.shape[1] + 2 * (n_w - 1)), x.dtype)
+    x_pad[:, n_w - 1:n_w - 1 + x.shape[1]] = x
+    first = start + (n_w - 1) // 2
+    W_rev = W[::-1]
+    out = np.zeros((len(x), n_out), np.complex128)
+    for phase in range(min(step, n_w)):
+        W_phase = W_rev[phase::step]
+        x_phase = x_pad[:, first + phase::step][:, :n_out + len(W_phase) - 1]
+        conv = np.convolve(x_phase.ravel(), W_phase[::-1], 'valid')
+        conv = np.concatenate([conv, np.zeros(x_phase.size - conv.size)])
+        out += conv.reshape(x_phase.shape)[:, :n_out]
+    return out
+
+
 def _cwt(X, Ws, mode="same", decim=1, use_fft=True):
     """Compute cwt with fft based convolutions or temporal convolutions.
-    Return a generator over signals.
+
+    Return a generator over blocks of signals, yielding arrays of shape
+    (n_signals_block, n_freqs, n_times_out). With use_fft, the spectra of
+    all the signals of a block are computed at once (with a real FFT for
+    real signals) and multiplied by the stacked spectra of the wavelets,
+    then inverse transformed together.
+
+    With mode='same', only the decimated samples are computed: the
+    products of spectra are folded (aliased) to a length divided by the
+    decimation step before the inverse FFT, or the temporal convolutions
+    are evaluated at the decimated samples only.
     """
     if mode not in ['same', 'valid', 'full']:
         raise ValueError("`mode` must be 'same', 'valid' or 'full', "
@@ -196,52 +312,94 @@ def _cwt(X, Ws, mode="same", decim=1, use_fft=True):
     decim = _check_decim(decim)
     X = np.asarray(X)
 
-    # Precompute wavelets for given frequency range to save time
     n_signals, n_times = X.shape
     n_times_out = X[:, decim].shape[1]
     n_freqs = len(Ws)
-
-    Ws_max_size = max(W.size for W in Ws)
-    size = n_times + Ws_max_size - 1
-    # Always use 2**n-sized FFT
-    fsize = 2 ** int(np.ceil(np.log2(size)))
-
-    # precompute FFTs of Ws
-    if use_fft:
-        fft_Ws = np.empty((n_freqs, fsize), dtype=np.complex128)
-    for i, W in enumerate(Ws):
+    for W in Ws:
         if len(W) > n_times:
             raise ValueError('Wavelet is too long for such a short signal. '
                              'Reduce the number of cycles.')
-        if use_fft:
-            fft_Ws[i] = fftn(W, [fsize])
-
-    # Make generator looping across signals
-    tfr = np.zeros((n_freqs, n_times_out), dtype=np.complex128)
-    for x in X:
-        if use_fft:
-            fft_x = fftn(x, [fsize])
-
-        # Loop across wavelets
-        for ii, W in enumerate(Ws):
+    start_step = _decim_start_step(n_times, decim) if mode == 'same' else None
+    times_out = np.arange(n_times)[decim]
+
+    def _store(tfr, ii, ret, W):
+        """Center and decimate the decomposition"""
+        if mode == "valid":
+            sz = abs(W.size - n_times) + 1
+            offset = (n_times - sz) // 2
+            # the decimated samples within the valid part of the signal
+            mask = (times_out >= offset) & (times_out < offset + sz)
             if use_fft:
-                ret = ifftn(fft_x * fft_Ws[ii])[:n_times + W.size - 1]
-            else:
-                ret = np.convolve(x, W, mode=mode)
-
-            # Center and decimate decomposition
-            if mode == "valid":
-                sz = abs(W.size - n_times) + 1
-                offset = (n_times - sz) / 2
-                this_slice = slice(offset // decim.step,
-                                   (offset + sz) // decim.step)
-                if use_fft:
-                    ret = _centered(ret, sz)
-                tfr[ii, this_slice] = ret[decim]
+                ret = _centered(ret, ret.shape[:-1] + (sz,))
+            tfr[..., ii, mask] = ret[..., times_out[mask] - offset]
+        else:
+            if use_fft:
+                ret = _centered(ret, ret.shape[:-1] + (n_times,))
+            tfr[..., ii, :] = ret[..., decim]
+
+    if not use_fft:
+        if start_step is not None and start_step[1] > 1:
+            start, step = start_step
+            n_sig_block = int(np.clip(_CWT_BLOCK_BYTES // (
+                16 * (n_times + 2 * max(W.size for W in Ws))), 1, n_signals))
+            for sig_start in range(0, n_signals, n_sig_block):
+                x = X[sig_start:sig_start + n_sig_block]
+                tfr = np.zeros((len(x), n_freqs, n_times_out), np.complex128)
+                for ii, W in enumerate(Ws):
+                    tfr[:, ii] = _convolve_decim(x, W, start, step,
+                                                 n_times_out)
+                yield tfr
+            return
+        tfr = np.zeros((1, n_freqs, n_times_out), dtype=np.complex128)
+        for x in X:
+            for ii, W in enumerate(Ws):
+                _store(tfr[0], ii, np.convolve(x, W, mode=mode), W)
+            yield tfr
+        return
+
+    # Spectra of the wavelets, one array per FFT length, reused across calls
+    start, step = (None, 1) if start_step is None else start_step
+    groups = _bank_cache(
+        _bank_key('cwt_fft', n_times, start, step, object_hash(Ws)),
+        partial(_cwt_fft_bank, n_times, Ws, start, step))
+    is_real = not np.iscomplexobj(X)
+    # blocks of signals and of wavelets within a group fit the memory cap
+    n_bytes = 16 * groups[0][0]
+    n_sig_block = int(np.clip(_CWT_BLOCK_BYTES // (4 * n_bytes), 1,
+                              n_signals))
+    for sig_start in range(0, n_signals, n_sig_block):
+        x = X[sig_start:sig_start + n_sig_block]
+        tfr = np.zeros((len(x), n_freqs, n_times_out), dtype=np.complex128)
+        for fsize, idx, fft_Ws in groups:
+            if is_real:
+                fft_x = np.empty((len(x), fsize), np.complex128)
+                n_pos = fsize // 2 + 1
+                fft_x[:, :n_pos] = rfft(x, fsize)
+                # Hermitian symmetry gives the negative frequencies
+                fft_x[:, n_pos:] = np.conj(
+                    fft_x[:, 1:(fsize + 1) // 2][:, ::-1])
             else:
-                if use_fft:
-                    ret = _centered(ret, n_times)
-                tfr[ii, :] = ret[decim]
+                fft_x = fft(x, fsize)
+            n_freq_block = max(_CWT_BLOCK_BYTES // (16 * fsize * len(x)), 1)
+            for fstart in range(0, len(idx), n_freq_block):
+                these_idx = idx[fstart:fstart + n_freq_block]
+                prod = fft_x[:, np.newaxis] * \
+                    fft_Ws[fstart:fstart + n_freq_block]
+                if start is None:
+                    ret = ifft(prod, fsize)
+                    for ii, this_ret in zip(these_idx, np.rollaxis(ret, 1)):
+                        W = Ws[ii]
+                        _store(tfr, ii, this_ret[:, :n_times + W.size - 1],
+                               W)
+                else:
+                    # decimating in time is aliasing in frequency
+                    if step > 1:
+                        prod = prod.reshape(prod.shape[:2] +
+                                            (step, fsize // step)).sum(2)
+                        prod /= step
+                    ret = ifft(prod, fsize // step)
+                    tfr[:, these_idx] = ret[..., :n_times_out]
+                del prod, ret
         yield tfr
 
 
@@ -291,13 +449,7 @@ def cwt_morlet(X, sfreq, freqs, use_fft=True, n_cycles=7.0, zero_mean=False,
     # Precompute wavelets for given frequency range to save time
     Ws = morlet(sfreq, freqs, n_cycles=n_cycles, zero_mean=zero_mean)
 
-    coefs = cwt(X, Ws, use_fft=use_fft, mode=mode, decim=decim)
-
-    tfrs = np.empty((n_signals, len(freqs), n_times), dtype=np.complex)
-    for k, tfr in enumerate(coefs):
-        tfrs[k] = tfr
-
-    return tfrs
+    return cwt(X, Ws, use_fft=use_fft, mode=mode, decim=decim)
 
 
 def cwt(X, Ws, use_fft=True, mode='same', decim=1):
@@ -338,8 +490,10 @@ def cwt(X, Ws, use_fft=True, mode='same', decim=1):
     coefs = _cwt(X, Ws, mode, decim=decim, use_fft=use_fft)
 
     tfrs = np.empty((n_signals, len(Ws), n_times), dtype=np.complex)
-    for k, tfr in enumerate(coefs):
-        tfrs[k] = tfr
+    start = 0
+    for tfr in coefs:
+        tfrs[start:start + len(tfr)] = tfr
+        start += len(tfr)
 
     return tfrs
 
@@ -358,13 +512,24 @@ def _time_frequency(X, Ws, use_fft, decim):
 
     for tfr in tfrs:
         tfr_abs = np.abs(tfr)
-        psd += tfr_abs ** 2
-        plf += tfr / tfr_abs
+        psd += (tfr_abs ** 2).sum(axis=0)
+        plf += (tfr / tfr_abs).sum(axis=0)
     psd /= n_epochs
     plf = np.abs(plf) / n_epochs
     return psd, plf
 
 
+def _cwt_power(X, Ws, use_fft, mode, decim):
+    """Aux function to compute the power of the cwt of signals"""
+    decim = _check_decim(decim)
+    power = np.empty((len(X), len(Ws), X[:, decim].shape[1]))
+    start = 0
+    for tfr in _cwt(X, Ws, mode, decim=decim, use_fft=use_fft):
+        power[start:start + len(tfr)] = (tfr * tfr.conj()).real
+        start += len(tfr)
+    return power
+
+
 @verbose
 def single_trial_power(data, sfreq, frequencies, use_fft=True, n_cycles=7,
                        baseline=None, baseline_mode='ratio', times=None,
@@ -426,25 +591,16 @@ def single_trial_power(data, sfreq, frequencies, use_fft=True, n_cycles=7,
     # Precompute wavelets for given frequency range to save time
     Ws = morlet(sfreq, frequencies, n_cycles=n_cycles, zero_mean=zero_mean)
 
-    parallel, my_cwt, _ = parallel_func(cwt, n_jobs)
+    parallel, my_cwt_power, n_jobs = parallel_func(_cwt_power, n_jobs)
 
     logger.info("Computing time-frequency power on single epochs...")
 
-    power = np.empty((n_epochs, n_channels, n_frequencies, n_times),
-                     dtype=np.float)
-
-    # Package arguments for `cwt` here to minimize omissions where only one of
-    # the two calls below is updated with new function arguments.
-    cwt_kw = dict(Ws=Ws, use_fft=use_fft, mode=mode, decim=decim)
-    if n_jobs == 1:
-        for k, e in enumerate(data):
-            x = cwt(e, **cwt_kw)
-            power[k] = (x * x.conj()).real
-    else:
-        # Precompute tf decompositions in parallel
-        tfrs = parallel(my_cwt(e, **cwt_kw) for e in data)
-        for k, tfr in enumerate(tfrs):
-            power[k] = (tfr * tfr.conj()).real
+    # all epochs and channels are transformed together, in blocks
+    data = data.reshape(n_epochs * n_channels, data.shape[2])
+    power = np.concatenate(parallel(
+        my_cwt_power(d, Ws, use_fft, mode, decim)
+        for d in np.array_split(data, n_jobs) if len(d) > 0))
+    power = power.reshape(n_epochs, n_channels, n_frequencies, n_times)
 
     # Run baseline correction.  Be sure to decimate the times array as well if
     # needed.
@@ -551,6 +707,58 @@ def _preproc_tfr(data, times, freqs, tmin, tmax, fmin, fmax, mode,
     return data, times, freqs, vmin, vmax
 
 
+# bytes of TFR data read at once from HDF5 files
+_TFR_CHUNK_BYTES = 2 ** 26
+
+
+def _crop_chunk(data, mask):
+    """Aux function"""
+    return data[:, :, mask]
+
+
+class _TFRReader(object):
+    """Reader of the data of an AverageTFR stored in an HDF5 file
+
+    The data are read in chunks of channels. Cropping before any other
+    operation only restricts the time samples that are read, the other
+    operations are recorded and applied to each chunk after it is read.
+    """
+    ndim = 3
+
+    def __init__(self, fname, key, shape, dtype):
+        self.fname = fname
+        self.key = key
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.time_slice = slice(0, self.shape[2])
+        self.ops = list()
+
+    def crop(self, mask):
+        """Crop the data to the time samples in mask"""
+        idx = np.where(mask)[0]
+        if len(self.ops) == 0:
+            start = self.time_slice.start
+            self.time_slice = slice(start + idx[0], start + idx[-1] + 1)
+        else:
+            self.ops.append(partial(_crop_chunk, mask=mask))
+        self.shape = self.shape[:2] + (len(idx),)
+
+    def iter_chunks(self):
+        """Iterate over the data of chunks of channels"""
+        import h5py
+        n_read = self.time_slice.stop - self.time_slice.start
+        n_chunk = max(_TFR_CHUNK_BYTES // (self.dtype.itemsize *
+                                           self.shape[1] * n_read), 1)
+        with h5py.File(self.fname, mode='r') as fid:
+            dset = fid[self.key]
+            for start in range(0, self.shape[0], n_chunk):
+                chunk = slice(start, min(start + n_chunk, self.shape[0]))
+                data = dset[chunk, :, self.time_slice]
+                for func in self.ops:
+                    data = func(data)
+                yield chunk, data
+
+
 class AverageTFR(ContainsMixin, UpdateChannelsMixin):
     """Container for Time-Frequency data
 
@@ -582,6 +790,14 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
     ----------
     ch_names : list
         The names of the channels.
+    preload : bool
+        Whether the data are in memory. TFRs read with
+        ``read_tfrs(..., preload=False)`` are not; their data are read from
+        the file when needed.
+
+    Notes
+    -----
+    The data can be stored as float32 to halve the memory used.
     """
     @verbose
     def __init__(self, info, data, times, freqs, nave, comment=None,
@@ -599,7 +815,10 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
         if n_times != len(times):
             raise ValueError("Number of times and data size don't match"
                              " (%d != %d)." % (n_times, len(times)))
-        self.data = data
+        if isinstance(data, _TFRReader):
+            self._data, self._reader = None, data
+        else:
+            self.data = data
         self.times = np.asarray(times)
         self.freqs = np.asarray(freqs)
         self.nave = nave
@@ -610,6 +829,31 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
     def ch_names(self):
         return self.info['ch_names']
 
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = np.empty(self._reader.shape, self._reader.dtype)
+            for chunk, data in self._reader.iter_chunks():
+                self._data[chunk] = data
+            self._reader = None
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data, self._reader = data, None
+
+    @property
+    def preload(self):
+        return self._reader is None
+
+    def _iter_data_chunks(self):
+        """Iterate over the data of chunks of channels, read if needed"""
+        if self._reader is None:
+            yield slice(None), self._data
+        else:
+            for chunk, data in self._reader.iter_chunks():
+                yield chunk, data
+
     def crop(self, tmin=None, tmax=None, copy=None):
         """Crop data to a given time interval
 
@@ -632,7 +876,10 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
         inst = _check_copy_dep(self, copy)
         mask = _time_mask(inst.times, tmin, tmax, sfreq=self.info['sfreq'])
         inst.times = inst.times[mask]
-        inst.data = inst.data[:, :, mask]
+        if inst.preload:
+            inst.data = inst.data[:, :, mask]
+        else:
+            inst._reader.crop(mask)
         return inst
 
     @verbose
@@ -899,25 +1146,27 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
         assert np.all(tfr.freqs == self.freqs)
 
     def __add__(self, tfr):
-        self._check_compat(tfr)
         out = self.copy()
-        out.data += tfr.data
+        out += tfr
         return out
 
     def __iadd__(self, tfr):
         self._check_compat(tfr)
-        self.data += tfr.data
+        data = self.data
+        for chunk, tfr_data in tfr._iter_data_chunks():
+            data[chunk] += tfr_data
         return self
 
     def __sub__(self, tfr):
-        self._check_compat(tfr)
         out = self.copy()
-        out.data -= tfr.data
+        out -= tfr
         return out
 
     def __isub__(self, tfr):
         self._check_compat(tfr)
-        self.data -= tfr.data
+        data = self.data
+        for chunk, tfr_data in tfr._iter_data_chunks():
+            data[chunk] -= tfr_data
         return self
 
     def copy(self):
@@ -928,7 +1177,7 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
         s = "time : [%f, %f]" % (self.times[0], self.times[-1])
         s += ", freq : [%f, %f]" % (self.freqs[0], self.freqs[-1])
         s += ", nave : %d" % self.nave
-        s += ', channels : %d' % self.data.shape[0]
+        s += ', channels : %d' % len(self.ch_names)
         return "<AverageTFR  |  %s>" % s
 
     @verbose
@@ -953,9 +1202,19 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
             If None, baseline no correction will be performed.
         verbose : bool, str, int, or None
             If not None, override default verbose level (see mne.verbose).
+
+        Notes
+        -----
+        If the data are not preloaded, the correction is applied when they
+        are read.
         """
-        self.data = rescale(self.data, self.times, baseline, mode,
-                            copy=False)
+        if self.preload:
+            self.data = rescale(self.data, self.times, baseline, mode,
+                                copy=False)
+        else:
+            self._reader.ops.append(partial(
+                rescale, times=self.times.copy(), baseline=baseline,
+                mode=mode, copy=False, verbose=False))
 
     def plot_topomap(self, tmin=None, tmax=None, fmin=None, fmax=None,
                      ch_type=None, baseline=None, mode='mean',
@@ -1091,13 +1350,29 @@ class AverageTFR(ContainsMixin, UpdateChannelsMixin):
 
 def _prepare_write_tfr(tfr, condition):
     """Aux function"""
+    # the data are written separately, see _write_tfr_data
     return (condition, dict(times=tfr.times, freqs=tfr.freqs,
-                            data=tfr.data, info=tfr.info,
+                            data=None, info=tfr.info,
                             nave=tfr.nave, comment=tfr.comment,
                             method=tfr.method))
 
 
-def write_tfrs(fname, tfr, overwrite=False):
+def _write_tfr_data(node, tfr, dtype):
+    """Write the data of a TFR to a chunked HDF5 dataset, chunk by chunk"""
+    dset = None
+    for chunk, data in tfr._iter_data_chunks():
+        if dset is None:
+            shape = (len(tfr.ch_names),) + data.shape[1:]
+            dtype = data.dtype if dtype is None else np.dtype(dtype)
+            n_times = max(min(2 ** 20 // (dtype.itemsize * shape[1]),
+                              shape[2]), 1)
+            dset = node.create_dataset('key_data', shape=shape, dtype=dtype,
+                                       chunks=(1, shape[1], n_times))
+            dset.attrs['TITLE'] = 'ndarray'
+        dset[chunk] = data
+
+
+def write_tfrs(fname, tfr, overwrite=False, dtype=None):
     """Write a TFR dataset to hdf5.
 
     Parameters
@@ -1110,6 +1385,11 @@ def write_tfrs(fname, tfr, overwrite=False):
         based on the order in which the TFR objects are passed
     overwrite : bool
         If True, overwrite file (if it exists). Defaults to False.
+    dtype : dtype | None
+        The dtype used to store the data, e.g. ``np.float32`` to halve the
+        file size. If None (default), the dtype of the data is used.
+
+        .. versionadded:: 0.12.0
 
     See Also
     --------
@@ -1117,18 +1397,53 @@ def write_tfrs(fname, tfr, overwrite=False):
 
     Notes
     -----
+    The data are stored in chunks of channels, so that they can be read
+    in chunks with ``read_tfrs(..., preload=False)``. TFRs that are not
+    preloaded are written chunk by chunk.
+
     .. versionadded:: 0.9.0
     """
+    import h5py
     out = []
     if not isinstance(tfr, (list, tuple)):
         tfr = [tfr]
     for ii, tfr_ in enumerate(tfr):
+        if not tfr_.preload and \
+                op.realpath(tfr_._reader.fname) == op.realpath(fname):
+            tfr_.data  # the file is about to be overwritten, read it first
         comment = ii if tfr_.comment is None else tfr_.comment
         out.append(_prepare_write_tfr(tfr_, condition=comment))
     write_hdf5(fname, out, overwrite=overwrite, title='mnepython')
-
-
-def read_tfrs(fname, condition=None):
+    with h5py.File(fname, mode='a') as fid:
+        for ii, tfr_ in enumerate(tfr):
+            node = fid['mnepython/idx_%d/idx_1' % ii]
+            del node['key_data']
+            _write_tfr_data(node, tfr_, dtype)
+
+
+def _read_tfrs_lazy(fname):
+    """Helper to read the TFRs of a file, except their data"""
+    import h5py
+    from ..externals.h5io._h5io import _triage_read
+    tfr_data = list()
+    with h5py.File(fname, mode='r') as fid:
+        if 'mnepython' not in fid:
+            raise ValueError('no "mnepython" data found')
+        root = fid['mnepython']
+        while 'idx_%d' % len(tfr_data) in root:
+            node = root['idx_%d' % len(tfr_data)]
+            tfr = dict()
+            for key, sub_node in node['idx_1'].items():
+                if key == 'key_data':
+                    tfr['data'] = _TFRReader(fname, sub_node.name,
+                                             sub_node.shape, sub_node.dtype)
+                else:
+                    tfr[key[4:]] = _triage_read(sub_node)
+            tfr_data.append((_triage_read(node['idx_0']), tfr))
+    return tfr_data
+
+
+def read_tfrs(fname, condition=None, preload=True):
     """
     Read TFR datasets from hdf5 file.
 
@@ -1139,6 +1454,14 @@ def read_tfrs(fname, condition=None):
     condition : int or str | list of int or str | None
         The condition to load. If None, all conditions will be returned.
         Defaults to None.
+    preload : bool
+        If True (default), the data are read. If False, they are read from
+        the file, in chunks of channels, only when needed. ``crop``,
+        ``apply_baseline``, ``plot_topomap``, ``+``, ``-`` and
+        :func:`combine_tfr` then work chunk by chunk, other methods read
+        the data.
+
+        .. versionadded:: 0.12.0
 
     See Also
     --------
@@ -1158,7 +1481,10 @@ def read_tfrs(fname, condition=None):
     check_fname(fname, 'tfr', ('-tfr.h5',))
 
     logger.info('Reading %s ...' % fname)
-    tfr_data = read_hdf5(fname, title='mnepython')
+    if preload:
+        tfr_data = read_hdf5(fname, title='mnepython')
+    else:
+        tfr_data = _read_tfrs_lazy(fname)
     for k, tfr in tfr_data:
         tfr['info'] = Info(tfr['info'])
 
@@ -1241,6 +1567,262 @@ def tfr_morlet(inst, freqs, n_cycles, use_fft=False, return_itc=True, decim=1,
     return out
 
 
+class _PowerMean(object):
+    """Accumulate the mean power over epochs"""
+
+    def __init__(self, shape):
+        self.sum = np.zeros(shape)
+
+    def update(self, tfr, power):
+        self.sum += power
+
+    def result(self, n):
+        return self.sum / n
+
+
+class _ITC(object):
+    """Accumulate the inter-trial coherence over epochs"""
+
+    def __init__(self, shape):
+        self.sum = np.zeros(shape, np.complex128)
+
+    def update(self, tfr, power):
+        self.sum += tfr / np.abs(tfr)
+
+    def result(self, n):
+        return np.abs(self.sum) / n
+
+
+class _PowerVar(object):
+    """Accumulate the variance of the power over epochs (Welford)"""
+
+    def __init__(self, shape):
+        self.n = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+
+    def update(self, tfr, power):
+        self.n += 1
+        delta = power - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (power - self.mean)
+
+    def result(self, n):
+        return self.m2 / max(n - 1, 1)
+
+
+class _BandPower(object):
+    """Accumulate the mean power in frequency bands"""
+
+    def __init__(self, shape, freqs, bands):
+        freqs = np.asarray(freqs)
+        self.masks = [(freqs >= fmin) & (freqs <= fmax)
+                      for fmin, fmax in bands]
+        for (fmin, fmax), mask in zip(bands, self.masks):
+            if not mask.any():
+                raise ValueError('No frequency in the band (%s, %s)'
+                                 % (fmin, fmax))
+        self.sum = np.zeros((shape[0], len(bands), shape[2]))
+
+    def update(self, tfr, power):
+        for ii, mask in enumerate(self.masks):
+            self.sum[:, ii] += power[:, mask].mean(axis=1)
+
+    def result(self, n):
+        return self.sum / n
+
+
+class _PowerQuantile(object):
+    """Estimate a quantile of the power over epochs with the P^2 algorithm
+
+    The P^2 algorithm (Jain & Chlamtac, 1985) tracks 5 markers per
+    element, so the memory does not depend on the number of epochs.
+    """
+
+    def __init__(self, shape, q):
+        self.q = q
+        self.heights = np.zeros((5,) + shape)
+        self.pos = np.tile(np.arange(5.).reshape((5,) + (1,) * len(shape)),
+                           (1,) + shape)
+        self.desired = np.array([0., 2 * q, 4 * q, 2 + 2 * q, 4.])
+        self.incr = np.array([0., q / 2., q, (1 + q) / 2., 1.])
+        self.n = 0
+
+    def update(self, tfr, power):
+        h, pos = self.heights, self.pos
+        if self.n < 5:
+            h[self.n] = power
+            self.n += 1
+            if self.n == 5:
+                h.sort(axis=0)
+            return
+        self.n += 1
+        np.minimum(h[0], power, out=h[0])
+        np.maximum(h[4], power, out=h[4])
+        k = (power >= h[1]).astype(int) + (power >= h[2]) + (power >= h[3])
+        for ii in range(1, 5):
+            pos[ii] += k < ii
+        self.desired += self.incr
+        for ii in range(1, 4):
+            d = self.desired[ii] - pos[ii]
+            move = (((d >= 1) & (pos[ii + 1] - pos[ii] > 1)) |
+                    ((d <= -1) & (pos[ii - 1] - pos[ii] < -1)))
+            if not move.any():
+                continue
+            d = np.sign(d[move])
+            hm, hi, hp = h[ii - 1][move], h[ii][move], h[ii + 1][move]
+            nm, ni, np_ = pos[ii - 1][move], pos[ii][move], pos[ii + 1][move]
+            parabolic = hi + d / (np_ - nm) * (
+                (ni - nm + d) * (hp - hi) / (np_ - ni) +
+                (np_ - ni - d) * (hi - hm) / (ni - nm))
+            linear = np.where(d > 0, hi + (hp - hi) / (np_ - ni),
+                              hi - (hm - hi) / (nm - ni))
+            h[ii][move] = np.where((hm < parabolic) & (parabolic < hp),
+                                   parabolic, linear)
+            pos[ii][move] += d
+
+    def result(self, n):
+        if self.n < 5:  # exact quantile of the few epochs seen
+            return np.percentile(self.heights[:self.n], 100 * self.q, axis=0)
+        return self.heights[2].copy()
+
+
+def _iter_inst_data(inst):
+    """Aux function to iterate over the epochs (or the evoked) data"""
+    from ..epochs import _BaseEpochs
+    from ..evoked import Evoked
+    if isinstance(inst, _BaseEpochs):
+        for data in inst:
+            yield data
+    elif isinstance(inst, Evoked):
+        yield inst.data
+    else:
+        raise TypeError('inst must be Epochs or Evoked')
+
+
+@verbose
+def tfr_morlet_stream(inst, freqs, n_cycles, stats=('power', 'itc'),
+                      bands=None, quantiles=(0.5,), use_fft=False, decim=1,
+                      picks=None, zero_mean=True, verbose=None):
+    """Compute statistics of single-trial Morlet TFRs, one epoch at a time
+
+    The time-frequency decomposition of each epoch is computed and
+    immediately reduced, so the memory used does not depend on the number
+    of epochs. The data of epochs that are not preloaded are read one
+    epoch at a time.
+
+    Parameters
+    ----------
+    inst : Epochs | Evoked
+        The epochs or evoked object.
+    freqs : ndarray, shape (n_freqs,)
+        The frequencies in Hz.
+    n_cycles : float | ndarray, shape (n_freqs,)
+        The number of cycles globally or for each frequency.
+    stats : list of str
+        The statistics to compute over epochs, any of 'power' (mean
+        power), 'itc' (intertrial coherence), 'var' (variance of the
+        power), 'band_power' (mean power in the frequency bands given by
+        ``bands``) and 'quantile' (quantiles of the power given by
+        ``quantiles``).
+    bands : list of tuple | None
+        The (fmin, fmax) frequency bands, used if 'band_power' is in
+        ``stats``.
+    quantiles : list of float
+        The quantiles (between 0 and 1), used if 'quantile' is in
+        ``stats``. They are estimated with the P^2 algorithm [1]_, which
+        does not store the epochs.
+    use_fft : bool
+        The fft based convolution or not.
+    decim : int | slice
+        Decimation of the time points of the decomposition, see
+        :func:`tfr_morlet`.
+    picks : array-like of int | None
+        The indices of the channels to use. If None, the good MEG and EEG
+        channels are used.
+    zero_mean : bool
+        Make sure the wavelets are zero mean.
+    verbose : bool, str, int, or None
+        If not None, override default verbose level (see mne.verbose).
+
+    Returns
+    -------
+    out : dict
+        The statistics, as instances of AverageTFR. 'quantile' is a list
+        with one AverageTFR per quantile, and the frequencies of
+        'band_power' are the centers of the bands.
+
+    See Also
+    --------
+    tfr_morlet, single_trial_power
+
+    Notes
+    -----
+    .. versionadded:: 0.12.0
+
+    References
+    ----------
+    .. [1] Jain, R., Chlamtac, I. (1985). "The P^2 algorithm for dynamic
+           calculation of quantiles and histograms without storing
+           observations". Communications of the ACM 28 (10): 1076-85.
+    """
+    valid_stats = ('power', 'itc', 'var', 'band_power', 'quantile')
+    for stat in stats:
+        if stat not in valid_stats:
+            raise ValueError('stats must be among %s, got %s'
+                             % (valid_stats, stat))
+    if 'band_power' in stats and not bands:
+        raise ValueError('bands must be given to compute band_power')
+    decim = _check_decim(decim)
+    info = inst.info
+    if picks is None:
+        picks = pick_types(info, meg=True, eeg=True, ref_meg=False,
+                           exclude='bads')
+    info = pick_info(info, picks)
+    freqs = np.asarray(freqs, float)
+    times = inst.times[decim].copy()
+    shape = (len(picks), len(freqs), len(times))
+    Ws = morlet(info['sfreq'], freqs, n_cycles=n_cycles, zero_mean=zero_mean)
+
+    accumulators = dict()
+    for stat in stats:
+        if stat == 'band_power':
+            accumulators[stat] = _BandPower(shape, freqs, bands)
+        elif stat == 'quantile':
+            accumulators[stat] = [_PowerQuantile(shape, q)
+                                  for q in quantiles]
+        else:
+            accumulators[stat] = dict(power=_PowerMean, itc=_ITC,
+                                      var=_PowerVar)[stat](shape)
+    nave = 0
+    for data in _iter_inst_data(inst):
+        tfr = cwt(data[picks], Ws, use_fft=use_fft, decim=decim)
+        power = (tfr * tfr.conj()).real
+        for acc in accumulators.values():
+            for this_acc in (acc if isinstance(acc, list) else [acc]):
+                this_acc.update(tfr, power)
+        nave += 1
+    if nave == 0:
+        raise RuntimeError('No epochs to compute the TFR from')
+    logger.info('Computed the TFR statistics of %d epochs' % nave)
+
+    out = dict()
+    for stat, acc in accumulators.items():
+        if stat == 'quantile':
+            out[stat] = [AverageTFR(info, this_acc.result(nave), times,
+                                    freqs, nave, comment='%s quantile' % q,
+                                    method='morlet-power-quantile')
+                         for q, this_acc in zip(quantiles, acc)]
+        elif stat == 'band_power':
+            centers = np.array([np.mean(band) for band in bands])
+            out[stat] = AverageTFR(info, acc.result(nave), times, centers,
+                                   nave, method='morlet-band-power')
+        else:
+            out[stat] = AverageTFR(info, acc.result(nave), times, freqs,
+                                   nave, method='morlet-%s' % stat)
+    return out
+
+
 def _prepare_picks(info, data, picks):
     if picks is None:
         picks = pick_types(info, meg=True, eeg=True, ref_meg=False,
@@ -1439,6 +2021,9 @@ def combine_tfr(all_tfr, weights='nave'):
 
     Notes
     -----
+    TFRs read with ``read_tfrs(..., preload=False)`` are combined without
+    reading their whole data at once.
+
     .. versionadded:: 0.11.0
     """
     tfr = all_tfr[0].copy()
@@ -1469,7 +2054,16 @@ def combine_tfr(all_tfr, weights='nave'):
                                               for t_ in all_tfr[1:])))
     tfr.info['bads'] = bads
 
-    tfr.data = sum(w * t_.data for w, t_ in zip(weights, all_tfr))
+    # accumulate chunk by chunk, so TFRs that are not preloaded are read
+    # one chunk at a time
+    data = None
+    for w, t_ in zip(weights, all_tfr):
+        for chunk, t_data in t_._iter_data_chunks():
+            if data is None:
+                data = np.zeros((len(ch_names),) + t_data.shape[1:],
+                                t_data.dtype)
+            data[chunk] += w * t_data
+    tfr.data = data
     tfr.nave = max(int(1. / sum(w ** 2 / e.nave
                                 for w, e in zip(weights, all_tfr))), 1)
     return tfr
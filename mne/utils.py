@@ -146,6 +146,58 @@ def object_hash(x, h=None):
     return int(h.hexdigest(), 16)
 
 
+def _nbytes(x):
+    """Helper to get the number of bytes of the arrays in an object"""
+    if isinstance(x, np.ndarray):
+        return x.nbytes
+    elif isinstance(x, dict):
+        return sum(_nbytes(xx) for xx in x.values())
+    elif isinstance(x, (list, tuple)):
+        return sum(_nbytes(xx) for xx in x)
+    return 0
+
+
+class _LRUCache(object):
+    """Cache of the least recently used values, bounded in memory
+
+    Parameters
+    ----------
+    max_bytes : int
+        Maximum number of bytes taken by the arrays of the cached values.
+        The least recently used values are dropped first, and values larger
+        than this are never cached.
+    """
+
+    def __init__(self, max_bytes):
+        from collections import OrderedDict
+        self.max_bytes = max_bytes
+        self._values = OrderedDict()
+        self._n_bytes = 0
+
+    def __call__(self, key, compute):
+        """Get the value for key, calling compute() if it is not cached"""
+        if key in self._values:
+            value = self._values.pop(key)
+        else:
+            value = compute()
+            n_bytes = _nbytes(value)
+            if n_bytes > self.max_bytes:
+                return value
+            self._n_bytes += n_bytes
+        self._values[key] = value  # now the most recently used
+        while self._n_bytes > self.max_bytes:
+            self._n_bytes -= _nbytes(self._values.popitem(last=False)[1])
+        return value
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        """Empty the cache"""
+        self._values.clear()
+        self._n_bytes = 0
+
+
 def object_diff(a, b, pre=''):
     """Compute all differences between two python variables
 
@@ -1196,6 +1248,8 @@ known_config_types = (
     'MNE_DATASETS_SPM_FACE_DATASETS_TESTS',
     'MNE_DATASETS_SPM_FACE_PATH',
     'MNE_DATASETS_TESTING_PATH',
+    'MNE_FFT_BACKEND',
+    'MNE_FFT_N_THREADS',
     'MNE_FORCE_SERIAL',
     'MNE_LOGGING_LEVEL',
     'MNE_MEMMAP_MIN_SIZE',
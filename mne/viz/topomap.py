@@ -972,9 +972,6 @@ def plot_tfr_topomap(tfr, tmin=None, tmax=None, fmin=None, fmax=None,
     if not show_names:
         names = None
 
-    data = tfr.data
-    data = rescale(data, tfr.times, baseline, mode, copy=True)
-
     # crop time
     itmin, itmax = None, None
     idx = np.where(_time_mask(tfr.times, tmin, tmax))[0]
@@ -991,8 +988,13 @@ def plot_tfr_topomap(tfr, tmin=None, tmax=None, fmin=None, fmax=None,
     if fmax is not None:
         ifmax = idx[-1] + 1
 
-    data = data[picks, ifmin:ifmax, itmin:itmax]
-    data = np.mean(np.mean(data, axis=2), axis=1)[:, np.newaxis]
+    # average chunk by chunk, TFRs that are not preloaded are read in chunks
+    data = np.empty((len(tfr.ch_names), 1))
+    for chunk, tfr_data in tfr._iter_data_chunks():
+        tfr_data = rescale(tfr_data, tfr.times, baseline, mode, copy=True)
+        tfr_data = tfr_data[:, ifmin:ifmax, itmin:itmax]
+        data[chunk, 0] = np.mean(np.mean(tfr_data, axis=2), axis=1)
+    data = data[picks]
 
     if merge_grads:
         from ..channels.layout import _merge_grad_data